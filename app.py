@@ -1,7 +1,11 @@
 # app.py
+import io
+
 import streamlit as st
 import requests
 
+import explorer
+
 # ----------------------------
 # Streamlit Page Config
 # ----------------------------
@@ -59,6 +63,27 @@ if st.button("Run Scraper"):
     else:
         st.error(message)
 
+with st.expander("Run in this session instead"):
+    st.caption("Scrapes from this server with live progress; keep the page open until it finishes. "
+               "The report is saved to the history and opens in the explorer below.")
+    if st.button("Run here"):
+        import history
+        from main import run_scraper
+        from progress import StreamlitSink, get_progress
+
+        # a progress bar per crawl region and warehouse, and the last log lines
+        bus = get_progress()
+        sink = bus.add_sink(StreamlitSink(bus))
+        try:
+            df_compare, _ = run_scraper(log_callback=bus)
+            path = history.save_snapshot(df_compare)
+        except Exception as e:
+            st.error(f"Scraper failed: {e}")
+        else:
+            st.success(f"✅ {len(df_compare)} products saved to {path}")
+        finally:
+            bus.remove_sink(sink)
+
 # ----------------------------
 # Download Instructions Section
 # ----------------------------
@@ -74,6 +99,83 @@ st.markdown(
 )                                      
 
 
+# ----------------------------
+# Explore Report Section
+# ----------------------------
+@st.cache_data(show_spinner="Loading report snapshot...")
+def load_snapshot(source, version):
+    """Parsed once per snapshot file; version (its mtime) changes when the file is rewritten."""
+    return explorer.load_report(source)
+
+
+@st.cache_data(show_spinner="Loading report snapshot...")
+def load_uploaded_snapshot(data):
+    return explorer.load_report(io.BytesIO(data))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def filtered_csv(_filtered, source, version, filters):
+    """
+    CSV of the filtered rows, once per snapshot and filter instead of on every rerun of the script.
+    _filtered is not hashed: (source, version, filters) identify it.
+    """
+    return explorer.to_csv(_filtered)
+
+
+st.header("Explore Report")
+
+uploaded = st.file_uploader(
+    "Report snapshot (Parquet from the `report-snapshot` artifact, or leave empty for the latest local run)",
+    type="parquet",
+)
+if uploaded is not None:
+    df = load_uploaded_snapshot(uploaded.getvalue())
+    source, version = uploaded.name, uploaded.file_id
+else:
+    source = explorer.snapshot_source()
+    version = explorer.snapshot_version(source) if source else None
+    df = load_snapshot(source, version) if source else None
+
+if df is None:
+    st.info("No report snapshot yet. Run the scraper, or upload a snapshot Parquet file.")
+else:
+    st.caption(f"{source}: {len(df)} products")
+    regions = explorer.suffixes(df)
+
+    col1, col2, col3 = st.columns(3)
+    search = col1.text_input("Search part number, design ID or name")
+    statuses = col2.multiselect("Availability status", explorer.values(df, "Availability_Status"))
+    available_in = col3.multiselect("Available in", regions)
+    col1, col2, col3 = st.columns(3)
+    grades = col1.multiselect("Grade", explorer.values(df, "Grade"))
+    product_types = col2.multiselect("Product type", explorer.values(df, "ProductType"))
+    min_total = col3.number_input("Minimum total availability", min_value=0, value=0, step=1)
+
+    filters = (search, statuses, available_in, grades, product_types, min_total)
+    filtered = explorer.filter_report(df, *filters)
+
+    group_by = st.selectbox(
+        "Summarize by", [col for col in ["Availability_Status", "Grade", "Size", "Available_Count"] if col in df.columns]
+    )
+    st.dataframe(explorer.aggregate(filtered, group_by), hide_index=True, width="stretch")
+
+    col1, col2 = st.columns(2)
+    size = col1.selectbox("Rows per page", explorer.PAGE_SIZES, index=1)
+    pages = explorer.page_count(len(filtered), size)
+    number = col2.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+    st.dataframe(
+        explorer.page(filtered, number, size).drop(columns=explorer.SEARCH_KEY),
+        hide_index=True, width="stretch",
+    )
+
+    st.download_button(
+        label=f"Download filtered rows ({len(filtered)}) as CSV",
+        data=filtered_csv(filtered, source, version, filters),
+        file_name="wilsonart_availability_filtered.csv",
+        mime="text/csv",
+    )
+
+
 # if st.button("Run Scraper"):
 #     response = requests.post(
 #         f"https://api.github.com/repos/{st.secrets.REPO}/actions/workflows/wilsonart_scraper.yml/dispatches",
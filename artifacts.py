@@ -0,0 +1,146 @@
+"""
+Content-hashed stage artifacts for the step-by-step CLI (run_scraper_job.py crawl | stock | transform |
+compare | export).
+
+Every artifact is stored under a key that hashes the stage version, the content hash of the artifacts
+it reads, its parameters and the source of the modules that compute it:
+
+    artifacts/transform-3f9a0c1e6b2d4a77.parquet
+    artifacts/transform.latest.json      {"key", "path", "hash", "version", "inputs", "created"}
+
+A stage whose key already has an artifact is skipped, so editing the merge logic in main.py only
+reruns the stages that depend on it, and a re-crawl with identical content reuses everything after it.
+Stages that read the network pass max_age: their key can't see the site change, so an artifact
+older than that is rebuilt under the same key.
+"""
+import datetime
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import time
+
+import config
+
+
+def file_hash(path):
+    """sha256 of a file, or of every file under a directory (names included)."""
+    digest = hashlib.sha256()
+    paths = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+    )
+    for item in paths:
+        if item != path:
+            digest.update(os.path.relpath(item, path).encode("utf-8"))
+        with open(item, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hash(modules):
+    """Hash of the source files of the named top-level modules, found without importing them."""
+    digest = hashlib.sha256()
+    for name in modules:
+        digest.update(file_hash(importlib.util.find_spec(name).origin).encode("ascii"))
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    def __init__(self, directory=None, log_callback=None):
+        self.directory = directory or config.ARTIFACT_DIR
+        self.log_callback = log_callback or (lambda msg: None)
+
+    def _latest_path(self, stage):
+        return os.path.join(self.directory, f"{stage}.latest.json")
+
+    def latest(self, stage):
+        """Manifest of the artifact `stage` last produced or reused, or None."""
+        try:
+            with open(self._latest_path(stage), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self, stage, load):
+        manifest = self.latest(stage)
+        if manifest is None:
+            raise FileNotFoundError(f"No {stage} artifact in {self.directory}, run `{stage}` first")
+        return load(manifest["path"])
+
+    def run(self, stage, version, build, save, inputs=(), params=None, code=(), extension="json", force=False,
+            max_age=None):
+        """
+        Make sure `stage` has an artifact for its current key and return its path.
+
+        inputs are the upstream stages whose latest artifacts it reads; build() computes the value
+        (loading those itself, so a skipped stage never loads them) and save(value, path) writes it.
+        extension=None stores the artifact as a directory; an artifact older than max_age seconds is rebuilt.
+        """
+        upstream = {}
+        for name in inputs:
+            manifest = self.latest(name)
+            if manifest is None:
+                raise FileNotFoundError(f"{stage} needs the {name} artifact, run `{name}` first")
+            upstream[name] = manifest["hash"]
+
+        key = hashlib.sha256(json.dumps({
+            "stage": stage, "version": version, "inputs": upstream, "params": params or {},
+            "code": source_hash(code) if code else None,
+        }, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(self.directory, f"{stage}-{key}" + (f".{extension}" if extension else ""))
+
+        expired = max_age is not None and os.path.exists(path) and time.time() - os.path.getmtime(path) >= max_age
+        if os.path.exists(path) and not force and not expired:
+            self.log_callback(f"{stage}: inputs unchanged, reusing {path}")
+        else:
+            if expired and not force:
+                self.log_callback(f"{stage}: artifact older than {max_age:g}s, rebuilding {path}")
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = path + ".tmp"
+            if os.path.isdir(tmp_path):
+                shutil.rmtree(tmp_path)
+            save(build(), tmp_path)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.replace(tmp_path, path)
+            self.log_callback(f"{stage}: saved {path}")
+
+        manifest = {
+            "key": key, "path": path, "hash": file_hash(path), "version": version, "inputs": upstream,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_latest = self._latest_path(stage) + ".tmp"
+        with open(tmp_latest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_latest, self._latest_path(stage))
+        return path
+
+
+# ================= FORMATS =================
+
+def save_json(value, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(value, f)
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_frames(frames, path):
+    """{name: DataFrame} as one Parquet file per frame in directory `path`."""
+    os.makedirs(path, exist_ok=True)
+    for name, df in frames.items():
+        df.to_parquet(os.path.join(path, f"{name}.parquet"), index=False)
+
+
+def load_frames(path):
+    import pandas as pd
+
+    return {
+        os.path.splitext(name)[0]: pd.read_parquet(os.path.join(path, name))
+        for name in sorted(os.listdir(path)) if name.endswith(".parquet")
+    }
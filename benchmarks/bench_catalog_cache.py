@@ -0,0 +1,78 @@
+"""
+Catalog page cache: crawl time, requests and pages parsed for the same catalog crawled without the
+cache, into a cold cache, revalidated with conditional requests (304s), revalidated against a server
+that sends no ETag (content hash), within the freshness window (no requests) and after --changed
+pages got a new body. The server runs on a thread of this process, so its time shares the GIL with
+the crawl; every crawl must return the rows of the uncached one.
+
+    python -m benchmarks.bench_catalog_cache --designs 2400 --latency 0.05 --filler 400
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def crawl(server, page_cache):
+    from catalog import crawl_catalog
+    from main import ZIPCODES
+    from metrics import get_metrics
+
+    def parse_seconds():
+        return get_metrics().stages.get("parse", {}).get("seconds", 0.0)
+
+    requests, parse = server.requests_served, parse_seconds()
+    start = time.perf_counter()
+    region_rows = crawl_catalog(ZIPCODES, page_cache=page_cache)
+    seconds = time.perf_counter() - start
+    return region_rows, seconds, server.requests_served - requests, parse_seconds() - parse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--designs", type=int, default=2400, help="designs in the synthetic catalog")
+    parser.add_argument("--latency", type=float, default=0.05, help="server seconds per response")
+    parser.add_argument("--filler", type=int, default=400, help="menu links per catalog page, for real page weight")
+    parser.add_argument("--changed", type=int, default=20, help="pages whose body changes before the last crawl")
+    args = parser.parse_args()
+
+    import config
+    from benchmarks.standin_server import StandInServer
+    from catalog_cache import CatalogPageCache
+
+    server = StandInServer(latency=args.latency, designs=args.designs, filler=args.filler).start()
+    config.use_base_url(server.base_url)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog_pages.sqlite3")
+
+        def scenario(freshness=0):
+            page_cache = CatalogPageCache(path, freshness=freshness)
+            result = crawl(server, page_cache)
+            page_cache.close()
+            return result + (page_cache.parsed,)
+
+        baseline = crawl(server, None)
+        results = {"no cache": baseline + (None,)}
+        results["cold cache"] = scenario()
+        results["revalidate (304)"] = scenario()
+        results["fresh window"] = scenario(freshness=3600)
+        server.etags = False
+        results["revalidate (no ETag)"] = scenario()
+        server.etags = True
+        render = server.catalog_page
+        server.catalog_page = lambda zipcode, page: render(zipcode, page) + (
+            "<!-- revised -->" if page <= args.changed else "")
+        results[f"{args.changed} pages/region new"] = scenario()
+
+    print(f"\n{args.designs} designs, {args.latency * 1000:.0f} ms per response, {args.filler} filler links per page")
+    print(f"{'crawl':>22} {'seconds':>8} {'requests':>9} {'parsed':>7} {'parse s':>8}  rows")
+    for name, (region_rows, seconds, requests, parse_seconds, parsed) in results.items():
+        parsed = "all" if parsed is None else parsed
+        rows = "same" if region_rows == baseline[0] else "MISMATCH"
+        print(f"{name:>22} {seconds:8.2f} {requests:>9} {parsed:>7} {parse_seconds:8.2f}  {rows}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
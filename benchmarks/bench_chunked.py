@@ -0,0 +1,140 @@
+"""
+Chunked mode: peak RSS and run time of the in-memory post-processing (clean_catalog, build_report,
+export_frames) against the spill (Parquet batches, report built bucket by bucket) on a synthetic
+catalog, each in a process of its own, without any network: pages are rendered and parsed locally
+and stock answers are synthesized. Both write the report as Parquet and must hold the same rows
+(the chunked report is grouped by bucket, so rows are compared in sorted order).
+
+    python -m benchmarks.bench_chunked --scale 10
+    python -m benchmarks.bench_chunked --scale 100 --buckets 64 --batch-rows 20000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.bench_report import DESIGNS
+
+SHEETS = ("All Products", "Both Available")
+
+
+def synthetic_pages(designs):
+    """(region, page, rows) of every catalog page, parsed one at a time."""
+    from benchmarks.synthetic import PER_PAGE, build_catalog, render_page
+    from catalog import parse_catalog_page
+    from main import ZIPCODES
+
+    catalog = build_catalog(designs)
+    pages = -(-len(catalog) // PER_PAGE)
+    for region in ZIPCODES:
+        for page in range(1, pages + 1):
+            yield region, page, parse_catalog_page(render_page(catalog, page))
+
+
+def run_in_memory(designs, options):
+    from benchmarks.synthetic import stock_response
+    from main import WAREHOUSES, ZIPCODES, build_report, clean_catalog, export_frames, stock_frames
+
+    region_rows = {region: [] for region in ZIPCODES}
+    answers = {warehouse: {} for warehouse, _ in WAREHOUSES.values()}
+    for region, _, rows in synthetic_pages(designs):
+        region_rows[region].extend(rows)
+        warehouse = WAREHOUSES[region][0]
+        for row in rows:
+            pn = str(row[2]).strip().upper()
+            answers[warehouse][pn] = stock_response(pn, warehouse)
+    catalog = clean_catalog(region_rows)
+    return export_frames(*build_report(catalog, stock_frames(catalog, answers)))
+
+
+def run_chunked(designs, options):
+    import spill
+    from benchmarks.synthetic import stock_response
+    from deadletter import DeadLetters
+    from main import WAREHOUSES
+
+    batches = spill.Spill(os.path.join(options["tmp"], "spill"), options["buckets"], options["batch_rows"])
+    # the stock queue's bookkeeping: every part number once per warehouse
+    queued = {warehouse: set() for warehouse, _ in WAREHOUSES.values()}
+    for region, page, rows in synthetic_pages(designs):
+        batches.add_page(region, page, rows)
+        warehouse = WAREHOUSES[region][0]
+        for row in rows:
+            pn = str(row[2]).strip().upper()
+            if pn not in queued[warehouse]:
+                queued[warehouse].add(pn)
+                batches.answers[warehouse][pn] = stock_response(pn, warehouse)
+    batches.close()
+
+    dead_letters = DeadLetters(os.path.join(options["tmp"], "dead_letters.json"), reset=True)
+    buckets, report_columns, seqs, _, _ = spill.build_buckets(batches, dead_letters)
+    columns = spill.wide_columns(report_columns, seqs)
+    return (spill.report_chunks(batches, buckets, columns),
+            spill.report_chunks(batches, buckets, columns, both_available=True))
+
+
+MODES = {"in-memory": run_in_memory, "chunked": run_chunked}
+
+
+def _run(mode, designs, options, stem, result_queue):
+    from exporters import write_parquet
+
+    start = time.perf_counter()
+    df_compare, both_available = MODES[mode](designs, options)
+    write_parquet(dict(zip(SHEETS, (df_compare, both_available))), stem)
+    result_queue.put((time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def run(mode, designs, options):
+    stem = os.path.join(options["tmp"], mode)
+    result_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run, args=(mode, designs, options, stem, result_queue))
+    process.start()
+    process.join()
+    if process.exitcode:
+        raise SystemExit(f"{mode} run failed")
+    seconds, peak_rss_mb = result_queue.get()
+    return seconds, peak_rss_mb, stem
+
+
+def same_rows(stem_a, stem_b):
+    import pandas as pd
+
+    for sheet in SHEETS:
+        frames = []
+        for stem in (stem_a, stem_b):
+            df = pd.read_parquet(f"{stem}_{sheet.lower().replace(' ', '_')}.parquet").astype(object)
+            # categoricals of one file are plain strings in the other: compare every cell as text
+            df = df.where(df.notna(), None).astype(str)
+            frames.append(df.sort_values(list(df.columns), ignore_index=True))
+        if not frames[0].equals(frames[1]):
+            return f"MISMATCH in {sheet}"
+    return "identical"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10, help="multiple of the live catalog size")
+    parser.add_argument("--buckets", type=int, default=16, help="spill buckets")
+    parser.add_argument("--batch-rows", type=int, default=50000, help="records per spilled Parquet batch")
+    args = parser.parse_args()
+
+    designs = DESIGNS * args.scale
+    with tempfile.TemporaryDirectory() as tmp:
+        options = {"tmp": tmp, "buckets": args.buckets, "batch_rows": args.batch_rows}
+        results = {mode: run(mode, designs, options) for mode in MODES}
+        check = same_rows(results["in-memory"][2], results["chunked"][2])
+
+    print(f"\n{designs} designs ({args.scale}x the live catalog), {args.buckets} buckets, "
+          f"{args.batch_rows} records per batch")
+    for mode, (seconds, peak_rss_mb, _) in results.items():
+        print(f"{mode:>10} {seconds:8.2f}s  peak RSS {peak_rss_mb:7.0f} MB")
+    print(f"report rows: {check}")
+    if check != "identical":
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
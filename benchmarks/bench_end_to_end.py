@@ -0,0 +1,129 @@
+"""
+End-to-end benchmark: run_scraper against the stand-in server, with throughput, stage timings,
+peak memory and an equivalence check against a golden report.
+
+    python -m benchmarks.bench_end_to_end --golden benchmarks/golden               # first run saves it
+    python -m benchmarks.bench_end_to_end --golden benchmarks/golden --latency 0.05 --error-rate 0.05
+    python -m benchmarks.bench_end_to_end --latency 0.05 --capacity 12      # server answers 429 past 12 in flight
+
+The server runs in its own process so it takes neither GIL time nor memory from the scraper.
+Make the golden report on the code before a change, then compare the changed code against it.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+GOLDEN_SHEETS = ("All Products", "Both Available")
+
+
+def _serve(port_queue, options):
+    from benchmarks.standin_server import StandInServer
+
+    server = StandInServer(**options)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_server(options):
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(port_queue, options), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+
+
+def check_golden(golden, df_compare, both_available):
+    """Compare with the golden report in directory `golden`, or save it there if there is none yet."""
+    import pandas as pd
+    from exporters import write_parquet
+
+    stem = os.path.join(golden, "report")
+    sheets = dict(zip(GOLDEN_SHEETS, (df_compare, both_available)))
+    paths = [f"{stem}_{sheet.lower().replace(' ', '_')}.parquet" for sheet in GOLDEN_SHEETS]
+    if not all(os.path.exists(path) for path in paths):
+        os.makedirs(golden, exist_ok=True)
+        write_parquet(sheets, stem)
+        return "saved"
+
+    for path, (sheet, actual) in zip(paths, sheets.items()):
+        expected = pd.read_parquet(path)
+        try:
+            pd.testing.assert_frame_equal(expected, actual.reset_index(drop=True))
+        except AssertionError as e:
+            return f"MISMATCH in {sheet}: {e}"
+    return "identical"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--designs", type=int, default=240, help="designs in the synthetic catalog")
+    parser.add_argument("--latency", type=float, default=0.02, help="server seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 503")
+    parser.add_argument("--filler", type=int, default=400, help="menu links per catalog page, for real page weight")
+    parser.add_argument("--pages-dir", default=None, help="recorded catalog pages, <zipcode>_<page>.html")
+    parser.add_argument("--capacity", type=int, default=0, help="server requests in flight before it answers 429")
+    parser.add_argument("--concurrency", type=int, default=None, help="stock requests in flight (default: config)")
+    parser.add_argument("--rps", type=float, default=0, help="stock request budget, 0 = unlimited")
+    parser.add_argument("--golden", default=None, help="golden report directory to compare with (saved if missing)")
+    parser.add_argument("--json", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    server, base_url = start_server({
+        "latency": args.latency, "designs": args.designs, "error_rate": args.error_rate,
+        "filler": args.filler, "pages_dir": args.pages_dir, "capacity": args.capacity,
+    })
+
+    import config
+    from http_client import get_client
+    from main import run_scraper
+    from metrics import get_metrics
+
+    config.use_base_url(base_url)
+    config.STOCK_RPS = args.rps
+    if args.concurrency:
+        config.STOCK_CONCURRENCY = args.concurrency
+
+    try:
+        with tempfile.TemporaryDirectory() as state_dir:
+            config.STATE_DIR = state_dir
+            start = time.perf_counter()
+            df_compare, both_available = run_scraper(cache_ttl=0)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+
+    metrics = get_metrics()
+    stages = metrics.to_dict()["stages"]
+    parts = sum(stage["rows"] for name, stage in stages.items() if name.startswith("stock "))
+    results = {
+        "seconds": elapsed,
+        "parts": parts,
+        "parts_per_second": parts / elapsed,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "report_rows": len(df_compare),
+        "concurrency_limit": {"final": get_client().limiter.limit, "peak": get_client().limiter.peak},
+        "metrics": metrics.to_dict(get_client().stats),
+    }
+    if args.golden:
+        results["golden"] = check_golden(args.golden, df_compare, both_available)
+
+    print(f"\n{args.designs} designs, {args.latency * 1000:.0f}ms latency, {args.error_rate:.0%} errors")
+    print(f"{elapsed:.2f}s end to end, {parts} parts, {results['parts_per_second']:.1f} parts/s, "
+          f"peak RSS {results['peak_rss_mb']:.0f} MB, {len(df_compare)} report rows")
+    print(metrics.format_table(get_client().stats))
+    print(get_client().limiter.format_summary())
+    if args.golden:
+        print(f"golden report ({args.golden}): {results['golden']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+
+    if results.get("golden", "").startswith("MISMATCH"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Streamlit explorer (explorer.py): cost of one rerun of the app's Explore Report section on a
+synthetic report snapshot, filter + aggregate + page, with the CSV of the filtered rows built on
+every rerun (as before app.filtered_csv) and built once per filter (cached, later reruns only look it up).
+
+    python -m benchmarks.bench_explorer --scale 10 --reruns 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas  # noqa: F401 -- loaded up front so its import time is not charged to the first rerun
+
+import explorer
+import history
+from benchmarks.bench_report import DESIGNS, synthetic_answers, synthetic_crawl
+from main import build_report, clean_catalog, export_frames, stock_frames
+
+
+def user_filters(df):
+    """(label, filter_report arguments): what a user clicks through, with values the snapshot has."""
+    return [
+        ("no filter", {}),
+        ("search", {"search": "white"}),
+        ("status", {"statuses": explorer.values(df, "Availability_Status")[:1]}),
+        ("grade + min total", {"grades": explorer.values(df, "Grade")[:1], "min_total": 25}),
+    ]
+
+
+def rerun(df, filters, size=50):
+    """What app.py computes on every rerun, without the CSV."""
+    filtered = explorer.filter_report(df, **filters)
+    explorer.aggregate(filtered, "Availability_Status")
+    explorer.page(filtered, 1, size)
+    return filtered
+
+
+def timed(fn, reruns):
+    start = time.perf_counter()
+    for _ in range(reruns):
+        fn()
+    return (time.perf_counter() - start) / reruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10, help="multiple of the live catalog size")
+    parser.add_argument("--reruns", type=int, default=20, help="reruns timed per filter")
+    args = parser.parse_args()
+
+    region_rows = synthetic_crawl(DESIGNS * args.scale)
+    catalog = clean_catalog(region_rows)
+    df_compare, _ = export_frames(*build_report(catalog, stock_frames(catalog, synthetic_answers(region_rows))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "snapshot.parquet")
+        history.snapshot_frame(df_compare, None).to_parquet(path, index=False)
+        start = time.perf_counter()
+        df = explorer.load_report(path)
+        load_seconds = time.perf_counter() - start
+
+    print(f"{len(df)} report rows, {args.scale}x the live catalog, snapshot loaded in {load_seconds * 1000:.0f} ms")
+    print(f"{'filter':>18} {'rows':>7} {'rerun ms':>9} {'+ csv ms':>9} {'cached ms':>10}")
+    for label, filters in user_filters(df):
+        filtered = rerun(df, filters)
+        plain = timed(lambda: rerun(df, filters), args.reruns)
+        with_csv = timed(lambda: explorer.to_csv(rerun(df, filters)), args.reruns)
+        # cached: the CSV is built on the first rerun of a filter only
+        cached = plain + (with_csv - plain) / args.reruns
+        print(f"{label:>18} {len(filtered):>7} {plain * 1000:>9.1f} {with_csv * 1000:>9.1f} {cached * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
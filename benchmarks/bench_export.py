@@ -0,0 +1,72 @@
+"""
+Write time and peak RSS of every report format, on the synthetic report at several catalog sizes.
+
+    python -m benchmarks.bench_export --scale 1 10
+
+Peak RSS is the growth of the process high-water mark while the writer runs; it is reset before
+each write through /proc/self/clear_refs, so this needs Linux.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+from benchmarks.bench_report import DESIGNS, synthetic_answers, synthetic_crawl
+from exporters import EXPORTERS, export_report
+from main import build_report, clean_catalog, export_frames, stock_frames
+
+
+def synthetic_sheets(scale):
+    region_rows = synthetic_crawl(DESIGNS * scale)
+    catalog = clean_catalog(region_rows)
+    df_compare, both_available = export_frames(*build_report(catalog, stock_frames(catalog, synthetic_answers(region_rows))))
+    return {"All Products": df_compare, "Both Available": both_available}
+
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} missing from /proc/self/status")
+
+
+def measure(sheets, name, directory):
+    gc.collect()
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # reset VmHWM to the current RSS
+    baseline = _status_kb("VmRSS")
+
+    start = time.perf_counter()
+    paths = export_report(sheets, os.path.join(directory, name, "report"), [name])
+    elapsed = time.perf_counter() - start
+
+    peak_mb = (_status_kb("VmHWM") - baseline) / 1024
+    size_mb = sum(os.path.getsize(path) for path in paths) / 2 ** 20
+    return elapsed, peak_mb, size_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10], help="multiples of the live catalog size")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=sorted(EXPORTERS), default=list(EXPORTERS))
+    args = parser.parse_args()
+
+    for scale in args.scale:
+        sheets = synthetic_sheets(scale)
+        rows = sum(len(df) for df in sheets.values())
+        print(f"\n{scale}x catalog: {rows} report rows over {len(sheets)} sheets")
+        print(f"{'format':>14} {'seconds':>9} {'peak RSS MB':>12} {'file MB':>8}")
+        with tempfile.TemporaryDirectory() as directory:
+            for name in args.formats:
+                try:
+                    elapsed, peak_mb, size_mb = measure(sheets, name, directory)
+                except ImportError as e:
+                    print(f"{name:>14}  skipped ({e})")
+                    continue
+                print(f"{name:>14} {elapsed:>9.2f} {peak_mb:>12.1f} {size_mb:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Catalog page parser backends: speed and row equivalence against the BeautifulSoup reference.
+
+    python -m benchmarks.bench_parsers --repeat 5
+
+Pages saved from the live site can be dropped into benchmarks/fixtures/*.html;
+synthetic pages are added so the run never depends on the network.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from benchmarks.synthetic import build_catalog, render_page
+from page_parsers import PARSERS, parse_bs4
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_pages(synthetic_pages, filler):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    designs = build_catalog(synthetic_pages * 12)
+    for page in range(1, synthetic_pages + 1):
+        pages[f"synthetic_p{page}"] = render_page(designs, page, filler=filler)
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--synthetic-pages", type=int, default=20)
+    parser.add_argument("--filler", type=int, default=400, help="menu links per page to mimic real page weight")
+    args = parser.parse_args()
+
+    pages = load_pages(args.synthetic_pages, args.filler)
+    expected = {name: json.dumps(parse_bs4(html)) for name, html in pages.items()}
+    total_kb = sum(len(html) for html in pages.values()) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB, {args.repeat} repeats")
+
+    baseline = None
+    print(f"{'backend':>12} {'ms/page':>9} {'speedup':>8}  rows")
+    for name, parse in PARSERS.items():
+        try:
+            mismatched = [page for page, html in pages.items() if json.dumps(parse(html)) != expected[page]]
+        except ImportError as e:
+            print(f"{name:>12}  skipped ({e})")
+            continue
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for html in pages.values():
+                parse(html)
+        per_page = (time.perf_counter() - start) * 1000 / (args.repeat * len(pages))
+        baseline = baseline or per_page
+
+        status = "identical" if not mismatched else f"DIFFER on {', '.join(mismatched)}"
+        print(f"{name:>12} {per_page:>9.2f} {baseline / per_page:>7.1f}x  {status}")
+
+
+if __name__ == "__main__":
+    main()
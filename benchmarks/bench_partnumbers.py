@@ -0,0 +1,98 @@
+"""
+Part-number decoding: partnumbers.decode() against the piecemeal steps it replaced (a re.match per
+part in the page parser, the K split and 4-character fallback in clean_catalog, the 6-digit strip,
+the two SizeDescription replaces and the size table rebuilt in build_report), on synthetic rows.
+
+    python -m benchmarks.bench_partnumbers --rows 1000000
+"""
+import argparse
+import random
+import re
+import time
+
+import pandas as pd
+
+from partnumbers import SIZE_CODES, decode
+
+DESIGN_ID_RE = re.compile(r"(\d{4,6})")
+SIZES = ["48X96", "60X144", "60 X 120", "48X120", "60X96", "30X144", "36X96", "49X97", "50X100", "30  X 72"]
+
+
+def synthetic_rows(count, seed=7):
+    """Cleaned catalog columns (upper-cased, stripped) in every part-number shape the pages use."""
+    rng = random.Random(seed)
+    vendpartnumbers, finish_ids, sizes = [], [], []
+    for n in range(count):
+        design_id = str(1000 + n % 9000)
+        finish_id = rng.choice(["60", "01", "12", "38", "78"])
+        size = rng.choice(SIZES)
+        style = rng.random()
+        if style < 0.6:
+            part = f"{design_id}{finish_id}{rng.choice(['HGP', 'VGP', 'HGS', 'VGS'])}{size.replace(' ', '')}"
+        elif style < 0.8:
+            part = f"{design_id}K{finish_id}{size.replace(' ', '')}"
+        else:
+            part = f"D{design_id}-{finish_id}"
+        vendpartnumbers.append(part)
+        finish_ids.append(finish_id if rng.random() < 0.95 else None)
+        sizes.append(size)
+    return pd.DataFrame({"VendPartNumber": vendpartnumbers, "FinishID": finish_ids, "SizeDescription": sizes})
+
+
+def legacy_decode(df):
+    """The steps decode() replaced, in the order the pipeline ran them."""
+    design_ids = []
+    for vend_part_number in df["VendPartNumber"]:
+        match = DESIGN_ID_RE.match(vend_part_number)
+        design_ids.append(match.group(1) if match else "")
+    out = pd.DataFrame({"DesignID": design_ids}, index=df.index)
+
+    out["FinishID"] = df["FinishID"].fillna(df["VendPartNumber"].str.split("K").str[1].str[:2])
+    out["DesignID"] = out["DesignID"].mask(out["DesignID"] == "", df["VendPartNumber"].str[:4])
+
+    condition = (out["DesignID"].str.len() == 6) & \
+                (out["DesignID"].str[-2:] == out["FinishID"].astype(str).str.zfill(2))
+    out.loc[condition, "DesignID"] = out.loc[condition, "DesignID"].str[:-2]
+
+    size_mapping_df = pd.DataFrame({"SizeDescription": list(SIZE_CODES), "Size": list(SIZE_CODES.values())})
+    out["SizeDescription"] = df["SizeDescription"].str.replace("X", " X ", regex=False)\
+                                                  .str.replace(r"\s+", " ", regex=True)\
+                                                  .str.strip()
+    out["Size"] = out["SizeDescription"].map(size_mapping_df.set_index("SizeDescription")["Size"]).astype("category")
+    return out
+
+
+def timed(fn, df, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic part numbers")
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    df = synthetic_rows(args.rows)
+    legacy_seconds, expected = timed(legacy_decode, df, args.repeat)
+    decode_seconds, decoded = timed(decode, df, args.repeat)
+
+    columns = ["DesignID", "FinishID", "SizeDescription", "Size"]
+    identical = expected[columns].astype(str).equals(decoded[columns].astype(str))
+    issues = decoded["Decode_Issue"].value_counts()
+
+    print(f"\n{args.rows} part numbers, best of {args.repeat}")
+    print(f"{'legacy steps':>14} {legacy_seconds:>8.3f}s")
+    print(f"{'decode':>14} {decode_seconds:>8.3f}s  {legacy_seconds / decode_seconds:.1f}x")
+    print("flagged: " + (", ".join(f"{issue} {rows}" for issue, rows in issues.items()) or "none"))
+    print(f"decoded columns: {'identical' if identical else 'MISMATCH'}")
+    if not identical:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Progress reporting cost per part number: a log line per part (what run_scraper_job printed), the
+old Streamlit log that re-joined every line on each call, and the throttled progress bus, for
+growing part counts. Output goes to /dev/null; what matters is the cost per item as counts grow.
+
+    python -m benchmarks.bench_progress --parts 10000 100000 1000000
+"""
+import argparse
+import os
+import time
+
+from progress import ConsoleSink, ProgressBus
+
+# the joined log is quadratic: past this many parts it is only extrapolated
+JOINED_LOG_MAX = 20000
+
+
+def log_per_part(parts, out):
+    for i in range(parts):
+        print(f"Processed LA ->  {i + 1}/{parts}: 1000{i:06d}VGS60X144", file=out)
+
+
+def joined_log(parts, out):
+    lines = []
+    for i in range(parts):
+        lines.append(f"Processed LA ->  {i + 1}/{parts}: 1000{i:06d}VGS60X144")
+        out.write("\n".join(lines))  # text_area(value="\n".join(log_lines)) on every call
+
+
+class EventCount:
+    def __init__(self):
+        self.events = 0
+
+    def handle(self, event):
+        self.events += 1
+
+    def close(self):
+        pass
+
+
+def progress_bus(parts, out, interval=0.5):
+    bus = ProgressBus(interval=interval)
+    bus.add_sink(ConsoleSink(out))
+    count = bus.add_sink(EventCount())
+    bus.start("stock LA", total=parts)
+    for _ in range(parts):
+        bus.advance("stock LA")
+    bus.finish("stock LA")
+    return count.events
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parts", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'parts':>9} {'line per part':>16} {'joined log':>16} {'progress bus':>16} {'events':>7}")
+    with open(os.devnull, "w") as out:
+        for parts in args.parts:
+            lines_seconds, _ = timed(log_per_part, parts, out)
+            if parts <= JOINED_LOG_MAX:
+                joined = f"{timed(joined_log, parts, out)[0] / parts * 1e6:12.2f}us"
+            else:
+                joined = "(quadratic)"
+            bus_seconds, events = timed(progress_bus, parts, out)
+            print(f"{parts:>9} {lines_seconds / parts * 1e6:14.2f}us {joined:>16} "
+                  f"{bus_seconds / parts * 1e6:14.2f}us {events:>7}")
+
+
+if __name__ == "__main__":
+    main()
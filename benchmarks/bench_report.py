@@ -0,0 +1,197 @@
+"""
+Post-processing cost (catalog cleanup, report build, wide export) on a synthetic catalog,
+without any network: pages are rendered and parsed locally, stock answers are synthesized.
+Each stage runs twice: "before" keeps the layout the compact frames replaced (object strings
+everywhere, arrival dates split into wide columns per stock frame with per-column date inference),
+"after" is the pipeline in main.py.
+
+    python -m benchmarks.bench_report --scale 10
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd  # main imports pandas lazily: loaded here so its import time is not charged to the first stage
+
+from benchmarks.synthetic import PER_PAGE, build_catalog, render_page, stock_response
+from catalog import parse_catalog_page
+from main import (SUFFIXES, WAREHOUSES, ZIPCODES, availability_status, build_report, clean_catalog, columns,
+                  export_frames, is_available, region_partnumbers, stock_frames)
+from partnumbers import decode
+from stock_status import parse_stock_response
+
+DESIGNS = 240  # about the size of the live HPL catalog
+
+
+def synthetic_crawl(designs):
+    catalog = build_catalog(designs)
+    pages = -(-len(catalog) // PER_PAGE)
+    return {
+        region: [row for page in range(1, pages + 1) for row in parse_catalog_page(render_page(catalog, page))]
+        for region in ZIPCODES
+    }
+
+
+def synthetic_answers(region_rows):
+    answers = {}
+    for region, (warehouse, _) in WAREHOUSES.items():
+        partnumbers = {str(row[2]).strip().upper() for row in region_rows[region]}
+        answers[warehouse] = {pn: stock_response(pn, warehouse) for pn in partnumbers}
+    return answers
+
+
+# ================= BEFORE =================
+
+def legacy_clean_catalog(region_rows):
+    """clean_catalog() with every column left an object string."""
+    df = pd.concat(
+        [pd.DataFrame(region_rows[region], columns=columns) for region in ZIPCODES], keys=list(ZIPCODES), names=["Region"]
+    ).reset_index(level="Region").reset_index(drop=True)
+    df[columns] = df[columns].apply(lambda col: col.astype(str).str.strip().str.upper())
+    grade = df["Grade"].str.split(" ")
+    df["ProductType"] = grade.str[1]
+    df["Grade"] = grade.str[0]
+    finish = df["Finish"].str.split(" ")
+    df["FinishID"] = finish.str[0]
+    df["Finish"] = finish.str[1:].str.join(" ").fillna("")
+    df = df.drop_duplicates(ignore_index=True)
+    decoded = decode(df)
+    df[decoded.columns] = decoded.astype(object)
+    return df
+
+
+def legacy_stock_frames(catalog, answers):
+    """stock_frames() with string quantities and the dates split into Arrival Dates{i} columns per frame."""
+    frames = {}
+    for region, (warehouse, _) in WAREHOUSES.items():
+        rows = [parse_stock_response(pn, answers[warehouse][pn])
+                for pn in region_partnumbers(catalog, region) if pn in answers[warehouse]]
+        results = pd.DataFrame(rows, columns=["Vendor Product", "Current Availability", "Quantity on Order",
+                                              "Quantity on Backorder", "Arrival Dates"])
+        dates = results["Arrival Dates"].str.split(",", expand=True).apply(pd.to_datetime, errors="coerce")
+        dates.columns = [f"Arrival Dates{i + 1}" for i in range(dates.shape[1])]
+        frames[region] = pd.concat([results, dates], axis=1)
+    return frames
+
+
+def legacy_build_report(catalog, stock):
+    """build_report() + export_frames() carrying every wide arrival column through the pivot."""
+    arrival_cols = {region: [c for c in frame.columns if c.startswith("Arrival Dates")] for region, frame in stock.items()}
+    all_arrival_cols = list(dict.fromkeys(c for cols in arrival_cols.values() for c in cols))
+    results = pd.concat([frame.assign(Region=region) for region, frame in stock.items()], ignore_index=True) \
+        .rename(columns={"Vendor Product": "VendPartNumber"})
+    df = results.merge(catalog, on=["Region", "VendPartNumber"], how="left")
+    df["PartNumber"] = df["DesignID"].astype(str) + "-" + df["FinishID"].astype(str) + "-" + \
+        df["Grade"].astype(str) + df["Size"].astype(str)
+    df = df.rename(columns={"Current Availability": "Availability", "Quantity on Order": "OnOrder",
+                            "Quantity on Backorder": "Backorder"})
+
+    merge_cols = ["VendPartNumber", "PartNumber", "DesignID", "FinishID", "Grade"]
+    value_cols = ["DesignName", "Finish", "SizeDescription", "ProductType", "Size",
+                  "Availability", "OnOrder", "Backorder", "In"]
+    df["In"] = True
+    df["Occurrence"] = df.groupby(["Region"] + merge_cols, dropna=False).cumcount()
+    df_compare = df.set_index(merge_cols + ["Occurrence", "Region"])[value_cols + all_arrival_cols].unstack("Region")
+    df_compare.columns = [f"{col}_{SUFFIXES[region]}" for col, region in df_compare.columns]
+    region_cols = [f"{col}_{suffix}" for region, suffix in SUFFIXES.items()
+                   for col in value_cols + arrival_cols.get(region, [])]
+    df_compare = df_compare.reindex(columns=region_cols).reset_index().drop(columns="Occurrence")
+
+    for suffix in SUFFIXES.values():
+        df_compare[f"In_{suffix}"] = df_compare[f"In_{suffix}"].notna()
+        df_compare[f"Availability_{suffix}"] = pd.to_numeric(df_compare[f"Availability_{suffix}"], errors="coerce").fillna(0)
+        date_cols = [c for c in df_compare.columns if c.startswith("Arrival Dates") and c.endswith(f"_{suffix}")]
+        df_compare[f"Available_{suffix}"] = is_available(
+            df_compare[f"In_{suffix}"], df_compare[f"Availability_{suffix}"], df_compare[date_cols].notna().any(axis=1)
+        )
+    suffixes = list(SUFFIXES.values())
+    available = df_compare[[f"Available_{s}" for s in suffixes]]
+    df_compare["Total_Availability"] = df_compare[[f"Availability_{s}" for s in suffixes]].sum(axis=1)
+    df_compare["Available_Count"] = available.sum(axis=1)
+    df_compare["Availability_Status"] = availability_status(available)
+    for col in [f"{name}_{s}" for name in ("SizeDescription", "Size") for s in suffixes]:
+        df_compare[col] = df_compare[col].replace(["", " ", "NaN"], np.nan)
+    for name in ("SizeDescription", "Size"):
+        df_compare[name] = df_compare[f"{name}_{suffixes[0]}"]
+        for suffix in suffixes[1:]:
+            df_compare[name] = df_compare[name].combine_first(df_compare[f"{name}_{suffix}"])
+        for suffix in suffixes:
+            df_compare[f"{name}_{suffix}"] = df_compare[f"{name}_{suffix}"].fillna(df_compare[name])
+
+    first, others = suffixes[0], suffixes[1:]
+    base_cols = ["PartNumber", "VendPartNumber", "DesignID", f"DesignName_{first}", "Grade", "FinishID",
+                 "SizeDescription", "Size", f"Finish_{first}", f"ProductType_{first}",
+                 f"Availability_{first}", f"OnOrder_{first}", f"Backorder_{first}"]
+    for suffix in others:
+        base_cols += [f"DesignName_{suffix}", f"Finish_{suffix}", f"ProductType_{suffix}",
+                      f"Availability_{suffix}", f"OnOrder_{suffix}", f"Backorder_{suffix}"]
+    base_cols += [f"In_{s}" for s in suffixes] + [f"Available_{s}" for s in suffixes]
+    base_cols += ["Total_Availability", "Available_Count", "Availability_Status"]
+    df_compare = df_compare[base_cols + [col for col in region_cols if col.startswith("Arrival Dates")]]
+
+    both_available = df_compare[df_compare["Available_Count"] == len(SUFFIXES)].copy()
+    return df_compare, both_available
+
+
+# ================= MEASURE =================
+
+def frame_mb(*frames):
+    return sum(df.memory_usage(deep=True).sum() for df in frames) / 2 ** 20
+
+
+def measure(fn, *args):
+    """Run a stage untraced for the timing, then again under tracemalloc for its allocation peak."""
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = fn(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def compare(label, before, after):
+    """Print one stage before -> after, returns both results."""
+    (before, before_seconds, before_peak), (after, after_seconds, after_peak) = before, after
+    print(f"{label:>14} {before_seconds:>9.3f} {after_seconds:>9.3f} {before_peak:>10.1f} {after_peak:>10.1f}")
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=10, help="multiple of the live catalog size")
+    args = parser.parse_args()
+
+    region_rows = synthetic_crawl(DESIGNS * args.scale)
+    answers = synthetic_answers(region_rows)
+    print(f"{sum(len(rows) for rows in region_rows.values())} catalog rows, {args.scale}x the live catalog")
+
+    print(f"{'':>14} {'seconds':>19} {'peak MB':>21}")
+    print(f"{'stage':>14} {'before':>9} {'after':>9} {'before':>10} {'after':>10}")
+    old_catalog, catalog = compare("clean_catalog", measure(legacy_clean_catalog, region_rows),
+                                   measure(clean_catalog, region_rows))
+    old_stock, stock = compare("stock_frames", measure(legacy_stock_frames, old_catalog, answers),
+                               measure(stock_frames, catalog, answers))
+    (old_compare, old_both), (report, arrivals) = compare(
+        "build_report", measure(legacy_build_report, old_catalog, old_stock), measure(build_report, catalog, stock))
+    # before, the wide columns came out of build_report itself
+    (df_compare, both_available), seconds, peak = measure(export_frames, report, arrivals)
+    print(f"{'export_frames':>14} {'-':>9} {seconds:>9.3f} {'-':>10} {peak:>10.1f}")
+
+    print(f"{'frame MB':>14} {'before':>9} {'after':>9}")
+    for label, before, after in [
+        ("catalog", frame_mb(old_catalog), frame_mb(catalog)),
+        ("stock", frame_mb(*old_stock.values()), frame_mb(*stock.values())),
+        ("report", frame_mb(old_compare, old_both), frame_mb(report, arrivals)),
+        ("wide export", frame_mb(old_compare, old_both), frame_mb(df_compare, both_available)),
+    ]:
+        print(f"{label:>14} {before:>9.1f} {after:>9.1f}")
+    rows = "same" if (len(old_compare), len(old_both)) == (len(df_compare), len(both_available)) else "MISMATCH"
+    print(f"report rows: {rows} ({len(df_compare)} products, {len(both_available)} available everywhere)")
+
+
+if __name__ == "__main__":
+    main()
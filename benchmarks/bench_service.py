@@ -0,0 +1,116 @@
+"""
+Availability service benchmark: index build time, in-process and HTTP lookup latency, and how many
+upstream stockstatus calls a burst of identical /stock lookups turns into.
+
+    python -m benchmarks.bench_service --designs 240 --lookups 20000
+    python -m benchmarks.bench_service --latency 0.2 --burst 50      # 50 identical /stock lookups at once
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+
+from benchmarks.standin_server import StandInServer
+
+
+def percentiles(seconds):
+    ordered = sorted(seconds)
+    return {
+        "p50": ordered[len(ordered) // 2] * 1e6,
+        "p99": ordered[int(len(ordered) * 0.99)] * 1e6,
+        "mean": statistics.fmean(ordered) * 1e6,
+    }
+
+
+def format_us(name, stats):
+    return f"{name:<24} p50 {stats['p50']:8.1f}us  p99 {stats['p99']:8.1f}us  mean {stats['mean']:8.1f}us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--designs", type=int, default=240, help="designs in the synthetic catalog")
+    parser.add_argument("--latency", type=float, default=0.05, help="server seconds per response")
+    parser.add_argument("--lookups", type=int, default=20000, help="in-process index lookups to time")
+    parser.add_argument("--http-lookups", type=int, default=2000, help="HTTP lookups to time")
+    parser.add_argument("--burst", type=int, default=32, help="identical /stock lookups sent at once")
+    args = parser.parse_args()
+
+    upstream = StandInServer(latency=args.latency, designs=args.designs).start()
+
+    import config
+    import service
+
+    config.use_base_url(upstream.base_url)
+    config.STOCK_CACHE_TTL = 0
+
+    with tempfile.TemporaryDirectory() as history_dir, tempfile.TemporaryDirectory() as state_dir:
+        config.SERVICE_STATE_DIR = state_dir
+        config.SERVICE_DEAD_LETTER_FILE = os.path.join(state_dir, "dead_letters.json")
+        availability = service.AvailabilityService(history_dir)
+        availability.full_sweep()
+        index = availability.index
+
+        start = time.perf_counter()
+        service.AvailabilityIndex(service.history.load_snapshot(index.source), index.source)
+        build_seconds = time.perf_counter() - start
+
+        keys = {name: list(index.maps[name]) for name in service.INDEX_KEYS}
+        in_process = {}
+        for name in service.INDEX_KEYS:
+            timings = []
+            for i in range(args.lookups):
+                value = keys[name][i % len(keys[name])]
+                start = time.perf_counter()
+                availability.lookup(name, value)
+                timings.append(time.perf_counter() - start)
+            in_process[name] = percentiles(timings)
+
+        server = service.ServiceServer(availability, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        timings = []
+        for i in range(args.http_lookups):
+            value = keys["designs"][i % len(keys["designs"])]
+            start = time.perf_counter()
+            with urllib.request.urlopen(f"{base}/designs/{value}") as response:
+                response.read()
+            timings.append(time.perf_counter() - start)
+        http = percentiles(timings)
+
+        region = next(iter(config.load_regions()))["region"]
+        partnumber = keys["vendparts"][0]
+        served_before = upstream.requests_served
+        barrier = threading.Barrier(args.burst)
+
+        def lookup_stock():
+            barrier.wait()
+            with urllib.request.urlopen(f"{base}/stock/{region}/{partnumber}") as response:
+                response.read()
+
+        threads = [threading.Thread(target=lookup_stock) for _ in range(args.burst)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        burst_seconds = time.perf_counter() - start
+        upstream_calls = upstream.requests_served - served_before
+
+        server.shutdown()
+        server.server_close()
+    upstream.stop()
+
+    print(f"\n{index.rows} report rows, index built in {build_seconds * 1000:.1f}ms")
+    for name, stats in in_process.items():
+        print(format_us(f"lookup /{name}", stats))
+    print(format_us("HTTP /designs", http))
+    print(f"{args.burst} identical /stock lookups in {burst_seconds * 1000:.0f}ms: "
+          f"{upstream_calls} upstream call(s), {availability.stock_calls.coalesced} coalesced")
+
+
+if __name__ == "__main__":
+    main()
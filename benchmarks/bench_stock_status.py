@@ -0,0 +1,45 @@
+"""
+Stock-status throughput against the stand-in server at several concurrency limits.
+
+    python -m benchmarks.bench_stock_status --parts 400 --latency 0.1
+"""
+import argparse
+import time
+
+import config
+from benchmarks.standin_server import StandInServer
+from benchmarks.synthetic import synthetic_partnumbers
+from stock_status import get_availability_for_warehouses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--parts", type=int, default=400, help="part numbers per warehouse")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--rps", type=float, default=0, help="global budget, 0 = unlimited")
+    args = parser.parse_args()
+
+    server = StandInServer(latency=args.latency).start()
+    config.use_base_url(server.base_url)
+    partnumbers = synthetic_partnumbers(args.parts)
+
+    print(f"{args.parts} parts x 2 warehouses, {args.latency:.3f}s server latency")
+    print(f"{'concurrency':>12} {'seconds':>9} {'req/s':>8}")
+    try:
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            frames = get_availability_for_warehouses(
+                {"SEA": (partnumbers, 109283), "LA": (partnumbers, 109284)},
+                concurrency=concurrency,
+                rps=args.rps
+            )
+            elapsed = time.perf_counter() - start
+            assert all(len(df) == args.parts for df in frames.values())
+            print(f"{concurrency:>12} {elapsed:>9.2f} {2 * args.parts / elapsed:>8.1f}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
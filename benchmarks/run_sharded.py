@@ -0,0 +1,77 @@
+"""
+Run the sharded pipeline locally with N processes against the stand-in server and check the
+merged report matches a single unsharded run, and that merge refuses once a shard is missing.
+
+    python -m benchmarks.run_sharded --shards 4 --latency 0.05
+"""
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.standin_server import StandInServer
+
+JOB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "run_scraper_job.py")
+
+
+def run_job(workdir, env, *args):
+    return subprocess.Popen([sys.executable, JOB, *args], cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+
+
+def wait_all(processes):
+    for process in processes:
+        if process.wait() != 0:
+            raise SystemExit(f"{process.args} exited with {process.returncode}")
+
+
+def read_report(workdir):
+    path, = glob.glob(os.path.join(workdir, "output", "*.xlsx"))
+    return pd.read_excel(path, sheet_name=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--designs", type=int, default=240)
+    args = parser.parse_args()
+
+    server = StandInServer(latency=args.latency, designs=args.designs).start()
+    env = dict(os.environ, WILSONART_BASE_URL=server.base_url, WILSONART_STOCK_CACHE_TTL="0")
+
+    try:
+        with tempfile.TemporaryDirectory() as single_dir, tempfile.TemporaryDirectory() as sharded_dir:
+            start = time.perf_counter()
+            wait_all([run_job(single_dir, env)])
+            single_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            wait_all([run_job(sharded_dir, env, "crawl")])
+            wait_all([run_job(sharded_dir, env, "--shard", f"{i}/{args.shards}") for i in range(args.shards)])
+            wait_all([run_job(sharded_dir, env, "merge")])
+            sharded_seconds = time.perf_counter() - start
+
+            single, sharded = read_report(single_dir), read_report(sharded_dir)
+            for sheet in single:
+                pd.testing.assert_frame_equal(single[sheet], sharded[sheet])
+
+            # without one shard the merge must fail instead of writing a partial report
+            shutil.rmtree(os.path.join(sharded_dir, "output", "shards", f"shard_{args.shards - 1}of{args.shards}"))
+            merge = subprocess.run([sys.executable, JOB, "merge"], cwd=sharded_dir, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if merge.returncode == 0:
+                raise SystemExit("merge with a missing shard succeeded")
+    finally:
+        server.stop()
+
+    print(f"single process: {single_seconds:.1f}s, {args.shards} shards: {sharded_seconds:.1f}s, reports identical, merge refuses a missing shard")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Local stand-in for the Wilsonart endpoints the scraper talks to.
+
+    python -m benchmarks.standin_server --port 8765 --latency 0.2 --error-rate 0.05
+
+then run the scraper with WILSONART_BASE_URL=http://127.0.0.1:8765
+
+Catalog pages are synthetic unless --pages-dir holds recorded ones, named <zipcode>_<page>.html.
+With --error-rate, that share of requests gets a 503, but never the same request twice in a row,
+so a single retry always recovers and the report stays comparable with an error-free run.
+With --capacity, requests beyond that many in flight get a 429 with a Retry-After header,
+like a rate-limiting front end. With --down-rate, that share of the (part, warehouse) stockstatus
+lookups always gets a 503, to exercise the dead letters; restart without it to let them recover.
+Catalog pages carry an ETag (a hash of the body) and a request whose If-None-Match matches it gets
+a 304; --no-etag leaves the header out, like a server that always answers 200.
+"""
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import build_catalog, render_page, stock_response
+
+CATALOG_PATH = "/en/catalog/category/view/s/hpl/id/8/"
+STOCK_STATUS_PATH = "/en/webservices/index/stockstatus/"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=UTF-8", headers=None):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != CATALOG_PATH:
+            self._send(404, "not found")
+            return
+
+        query = parse_qs(url.query)
+        zipcode = query.get("zipcode", [""])[0]
+        page = int(query.get("p", ["1"])[0])
+        self._serve(("catalog", zipcode, page), lambda: self.server.catalog_page(zipcode, page), conditional=True)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+
+        if self.path.split("?")[0] != STOCK_STATUS_PATH:
+            self._send(404, "not found")
+            return
+
+        partnumber = form.get("partnumber", [""])[0]
+        warehouse = form.get("warehouse", [""])[0]
+        if self.server.is_down(partnumber, warehouse):
+            self._serve(("stockstatus", partnumber, warehouse), lambda: None)
+            return
+        self._serve(("stockstatus", partnumber, warehouse), lambda: stock_response(partnumber, warehouse))
+
+    def _serve(self, key, body, conditional=False):
+        if not self.server.enter():
+            self._send(429, "Too Many Requests", headers={"Retry-After": str(self.server.retry_after)})
+            return
+        try:
+            time.sleep(self.server.latency)
+            content = None if self.server.should_fail(key) else body()
+            if content is None:
+                self._send(503, "Service Unavailable")
+                return
+            if conditional and self.server.etags:
+                etag = '"' + hashlib.sha1(content.encode("utf-8")).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.server.count_not_modified()
+                    self._send(304, "", headers={"ETag": etag})
+                    return
+                self._send(200, content, headers={"ETag": etag})
+                return
+            self._send(200, content)
+        finally:
+            self.server.leave()
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, port=0, latency=0.0, designs=240, error_rate=0.0, filler=0, pages_dir=None, seed=1,
+                 capacity=0, retry_after=1, down_rate=0.0, etags=True):
+        super().__init__(("127.0.0.1", port), StandInHandler)
+        self.latency = latency
+        self.designs = designs
+        self.error_rate = error_rate
+        self.filler = filler
+        self.pages_dir = pages_dir
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.down_rate = down_rate
+        self.etags = etags
+        self.requests_served = 0
+        self.not_modified_served = 0
+        self.errors_served = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self._count_lock = threading.Lock()
+        self._catalogs = {}
+        self._rng = random.Random(seed)
+        self._failed = set()
+
+    def catalog_for(self, zipcode):
+        # every zipcode sees a slightly different slice of the same catalog
+        if zipcode not in self._catalogs:
+            self._catalogs[zipcode] = build_catalog(self.designs - int(zipcode or 0) % 17)
+        return self._catalogs[zipcode]
+
+    def catalog_page(self, zipcode, page):
+        if self.pages_dir:
+            path = os.path.join(self.pages_dir, f"{zipcode}_{page}.html")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return f.read()
+        return render_page(self.catalog_for(zipcode), page, base_query=f"zipcode={zipcode}", filler=self.filler)
+
+    def should_fail(self, key):
+        """Fail error_rate of the requests, but never the same request twice in a row."""
+        if not self.error_rate:
+            return False
+        with self._count_lock:
+            if key in self._failed:
+                self._failed.discard(key)
+                return False
+            if self._rng.random() < self.error_rate:
+                self._failed.add(key)
+                self.errors_served += 1
+                return True
+            return False
+
+    def is_down(self, partnumber, warehouse):
+        """The same down_rate share of lookups fails on every attempt."""
+        return bool(self.down_rate) and \
+            zlib.crc32(f"{partnumber}|{warehouse}".encode("utf-8")) % 10000 < self.down_rate * 10000
+
+    def enter(self):
+        """Count a request in, False if it is over capacity (it then isn't in flight)."""
+        with self._count_lock:
+            self.requests_served += 1
+            if self.capacity and self.in_flight >= self.capacity:
+                self.throttled += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def count_not_modified(self):
+        with self._count_lock:
+            self.not_modified_served += 1
+
+    def leave(self):
+        with self._count_lock:
+            self.in_flight -= 1
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--designs", type=int, default=240, help="designs in the synthetic catalog")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 503")
+    parser.add_argument("--filler", type=int, default=0, help="menu links per catalog page, for real page weight")
+    parser.add_argument("--pages-dir", default=None, help="recorded catalog pages, <zipcode>_<page>.html")
+    parser.add_argument("--capacity", type=int, default=0, help="requests in flight before answering 429 (0 = no cap)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--down-rate", type=float, default=0.0, help="share of stock lookups that always fail")
+    parser.add_argument("--no-etag", action="store_true", help="no ETag on catalog pages, so never a 304")
+    args = parser.parse_args()
+
+    server = StandInServer(args.port, args.latency, args.designs, args.error_rate, args.filler, args.pages_dir,
+                           capacity=args.capacity, retry_after=args.retry_after, down_rate=args.down_rate,
+                           etags=not args.no_etag)
+    print(f"Stand-in Wilsonart server on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,110 @@
+import html
+import json
+import random
+
+
+# ================= SYNTHETIC CATALOG =================
+
+GRADES = ["HGP STANDARD", "VGP STANDARD", "HGS POSTFORM", "VGS POSTFORM"]
+FINISHES = ["60 MATTE", "01 POLISHED", "12 FINE VELVET", "38 SOFT GRAIN", "78 LINEARITY"]
+SIZES = ["48X96", "60X144", "60 X 120", "48x120", "60X96", "30X144", "36X96", "49X97", "50X100"]
+NAMES = ["Frosty White", "Designer White", "Black", "Pearl Soapstone", "Calcutta Marble",
+         "Amber Cherry", "Fusion Maple", "Studio Teak", "Grey Mesh", "Neutral Glace"]
+PER_PAGE = 12
+
+
+def build_catalog(num_designs=240, seed=7):
+    """Return a list of (design_id, design_name, prototypes) tuples."""
+    rng = random.Random(seed)
+    designs = []
+    for n in range(num_designs):
+        design_id = str(1000 + n * 7)
+        name = f"{rng.choice(NAMES)} {n}"
+        prototypes = []
+        for grade in rng.sample(GRADES, rng.randint(1, 2)):
+            finishes = []
+            for finish in rng.sample(FINISHES, rng.randint(1, 2)):
+                finish_id = finish.split(" ")[0]
+                sizes = []
+                for size in rng.sample(SIZES, rng.randint(1, 3)):
+                    compact = size.replace(" ", "").upper()
+                    style = rng.random()
+                    if style < 0.6:
+                        part = f"{design_id}{finish_id}{grade.split(' ')[0]}{compact}"
+                    elif style < 0.8:
+                        part = f"{design_id}K{finish_id}{compact}"
+                    else:
+                        part = f"D{design_id}-{finish_id}"
+                    sizes.append({"name": size, "partnumber": [{"name": part}]})
+                finishes.append({"name": finish, "sizes": sizes})
+            prototypes.append({"name": grade, "finishes": finishes})
+        if rng.random() < 0.1:
+            prototypes = [prototypes]
+        designs.append((design_id, name, prototypes))
+    return designs
+
+
+def render_page(designs, page, per_page=PER_PAGE, base_query="zipcode=90058", filler=0):
+    """Render one Magento-style catalog listing page; filler adds that many menu links of page weight."""
+    last_page = max(1, -(-len(designs) // per_page))
+    chunk = designs[(page - 1) * per_page:page * per_page] if page <= last_page else []
+    parts = ["<html><head><title>HPL</title></head><body>"]
+    if filler:
+        parts.append('<nav class="navigation"><ul>')
+        parts.extend(
+            f'<li class="level1 nav-{i}"><a href="/en/catalog/category/view/id/{i}/"><span>Category {i}</span></a></li>'
+            for i in range(filler)
+        )
+        parts.append("</ul></nav>")
+    parts.append('<ol class="products list items product-items">')
+    for design_id, name, prototypes in chunk:
+        parts.append(
+            '<li class="item product product-item">'
+            '<form data-role="tocart-form" action="/checkout/cart/add/" method="post">'
+            '<input type="hidden" name="form_key" value="abc"/>'
+            f'<div class="rec_heading">{design_id}<br/>{html.escape(name)}</div>'
+            '<script type="text/javascript">\n'
+            "app.controller('ProductCtrl', function($scope) {\n"
+            f"    $scope.prototypes = {json.dumps(prototypes)};\n"
+            "    $scope.selected = null;\n"
+            "});\n"
+            "</script>"
+            "</form></li>"
+        )
+    parts.append("</ol>")
+    if last_page > 1:
+        parts.append('<div class="pages"><ul class="items pages-items">')
+        for p in range(1, last_page + 1):
+            parts.append(f'<li class="item"><a class="page" href="?{base_query}&amp;p={p}"><span>{p}</span></a></li>')
+        if page < last_page:
+            parts.append(f'<li class="item pages-item-next"><a class="action next" href="?{base_query}&amp;p={page + 1}"></a></li>')
+        parts.append("</ul></div>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+# ================= SYNTHETIC STOCK STATUS =================
+
+def synthetic_partnumbers(count, seed=7):
+    """Part numbers shaped like the ones on the HPL catalog pages."""
+    rng = random.Random(seed)
+    grades = ["HGP", "VGP", "HGS", "VGS"]
+    sizes = ["48X96", "60X144", "60X120", "48X120", "60X96", "30X144", "36X96"]
+    return [
+        f"{1000 + n}{rng.choice(['60', '01', '12', '38'])}{rng.choice(grades)}{rng.choice(sizes)}"
+        for n in range(count)
+    ]
+
+
+def stock_response(partnumber, warehouse):
+    """Deterministic `~`-delimited stock-status body for a part number."""
+    rng = random.Random(f"{partnumber}|{warehouse}")
+    roll = rng.random()
+    if roll < 0.4:
+        return f"{rng.randint(1, 90)}~{rng.randint(0, 20)}~0~"
+    if roll < 0.6:
+        dates = ",".join(f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2026" for _ in range(rng.randint(1, 3)))
+        return f"0~{rng.randint(1, 40)}~0~{dates}"
+    if roll < 0.7:
+        return f"0~0~{rng.randint(1, 5)}"
+    return "0~0~0~"
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import config
+from http_client import get_client
+from metrics import get_metrics
+from page_parsers import get_parser
+from progress import get_progress
+
+# Magento pagination: <ul class="items pages-items"> ... <a class="page" href="...?p=3">
+PAGINATION_RE = re.compile(r'<ul[^>]*class="[^"]*\bpages-items\b[^"]*"[^>]*>(.*?)</ul>', re.DOTALL)
+PAGE_LINK_RE = re.compile(r"[?&;]p=(\d+)")
+
+
+# ================= PAGE PARSING =================
+
+def parse_catalog_page(html, parser=None):
+    """Rows [DesignID, DesignName, VendPartNumber, Grade, FinishID, Finish, SizeDescription] of one listing page."""
+    return get_parser(parser or config.CATALOG_PARSER)(html)
+
+
+def find_last_page(html):
+    """Highest page number linked from the pagination markup, or None if the page has none."""
+    pages = [
+        int(number)
+        for block in PAGINATION_RE.findall(html)
+        for number in PAGE_LINK_RE.findall(block)
+    ]
+    return max(pages) if pages else None
+
+
+# ================= CRAWL =================
+
+def fetch_page(zipcode, page, page_cache=None):
+    """
+    (rows, last page hint) of one listing page. With a catalog_cache.CatalogPageCache, a fresh
+    cached page is served without a request, an older one is revalidated with a conditional GET,
+    and only a body that differs from the cached one is parsed.
+    """
+    url = config.CATALOG_URL_TEMPLATE.format(zipcode=zipcode, page=page)
+    metrics = get_metrics()
+    cached = None if page_cache is None else page_cache.get(url)
+    if cached is not None and page_cache.is_fresh(cached):
+        page_cache.count("fresh")
+        metrics.count("catalog pages fresh")
+        return cached.rows, cached.last_page
+
+    headers = {} if cached is None else page_cache.conditional_headers(cached)
+    response = get_client().get(url, kind="catalog", headers=headers)
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    if cached is not None and response.status_code == 304:
+        page_cache.touch(url, etag, last_modified)
+        page_cache.count("not_modified")
+        metrics.count("catalog pages not modified")
+        return cached.rows, cached.last_page
+
+    # a 404, or a 429 / 5xx still failing after the retries, is not the end of the catalog:
+    # parsed as an empty page it would silently cut the region short
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"catalog page {page} of zipcode {zipcode} answered {response.status_code}", response=response
+        )
+
+    # servers that ignore the validators still send the same bytes for an unchanged page
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    if cached is not None and content_hash == cached.content_hash:
+        page_cache.touch(url, etag, last_modified)
+        page_cache.count("unchanged")
+        metrics.count("catalog pages unchanged")
+        return cached.rows, cached.last_page
+
+    with metrics.stage("parse"):
+        rows = parse_catalog_page(response.text)
+    metrics.add_rows("parse", len(rows))
+    last_page = find_last_page(response.text)
+    if page_cache is not None:
+        page_cache.put(url, etag, last_modified, content_hash, rows, last_page)
+        page_cache.count("parsed")
+    return rows, last_page
+
+
+def _fetch_page_checkpointed(state, region, zipcode, page, page_cache=None):
+    saved = state.load_page(region, page)
+    if saved is not None:
+        return saved
+    # a page that does not answer 200 raises here, so it is never checkpointed and --resume fetches it again
+    rows, last_page = fetch_page(zipcode, page, page_cache)
+    state.save_page(region, page, rows, last_page)
+    return rows, last_page
+
+
+def crawl_catalog(zipcodes, log_callback=None, workers=None, max_pages=None, state=None, on_page=None,
+                  keep_rows=True, page_cache=None, on_end=None):
+    """
+    Fetch every (region, page) of the catalog through a bounded worker pool.
+
+    The last page is taken from the pagination markup; Magento only links a window
+    of pages, so the hint is refreshed from every page fetched. Without pagination
+    markup the crawl probes ahead and stops at the first page that is empty or
+    repeats the previous one (Magento serves the last page again past the end). A page that
+    does not answer 200 raises requests.HTTPError instead of ending its region.
+
+    With a checkpoint.RunState, pages saved by an earlier attempt are not fetched again; with a
+    catalog_cache.CatalogPageCache, unchanged pages reuse the rows parsed by an earlier crawl.
+    on_page(region, page, rows) is called as soon as each page is parsed, in completion order, so it
+    also sees pages past the end of the catalog; on_end(region, page) gives the first of those once
+    the crawl is done, and only rows of earlier pages belong to the catalog.
+    Returns region -> rows, in page order; with keep_rows=False only on_page sees the rows
+    and every region's list is empty.
+    """
+    get_client(log_callback)  # limit changes and throttling show up in this crawl's log
+    with get_metrics().stage("crawl"):
+        region_rows, crawled = _crawl(zipcodes, workers, max_pages, state, on_page, keep_rows, page_cache, on_end)
+    get_metrics().add_rows("crawl", crawled)
+    if page_cache is not None:
+        page_cache.flush()
+        if log_callback is not None:
+            log_callback(page_cache.format_summary())
+    return region_rows
+
+
+def _page_signature(rows):
+    # enough to spot the empty page or the repeated last page that ends a crawl
+    return len(rows), hashlib.sha1(json.dumps(rows, default=str).encode("utf-8")).digest()
+
+
+def _crawl(zipcodes, workers, max_pages, state, on_page, keep_rows=True, page_cache=None, on_end=None):
+    workers = max(1, workers or config.CATALOG_WORKERS)
+    max_pages = max_pages or config.CATALOG_MAX_PAGES
+
+    pages = {region: {} for region in zipcodes}       # region -> page -> rows (if keep_rows)
+    signatures = {region: {} for region in zipcodes}  # region -> page -> (row count, digest)
+    hints = {region: None for region in zipcodes}     # highest page seen in pagination
+    end = {region: None for region in zipcodes}       # first page past the end of the catalog
+    frontier = {region: 0 for region in zipcodes}     # highest page requested so far
+    progress = get_progress()
+    for region in zipcodes:
+        progress.start(f"crawl {region}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = {}
+            for region, zipcode in zipcodes.items():
+                if end[region] is not None:
+                    continue
+                if frontier[region] == 0:
+                    wanted = [1]
+                elif hints[region] is not None:
+                    wanted = range(frontier[region] + 1, hints[region] + 1)
+                else:
+                    wanted = range(frontier[region] + 1, frontier[region] + 1 + workers)
+                wanted = [page for page in wanted if page <= max_pages]
+                if not wanted:
+                    end[region] = frontier[region] + 1
+                    continue
+                for page in wanted:
+                    if state is None:
+                        batch[(region, page)] = pool.submit(fetch_page, zipcode, page, page_cache)
+                    else:
+                        batch[(region, page)] = pool.submit(_fetch_page_checkpointed, state, region, zipcode, page,
+                                                            page_cache)
+                frontier[region] = wanted[-1]
+
+            if not batch:
+                break
+
+            keys = {future: key for key, future in batch.items()}
+            for future in as_completed(keys):
+                region, page = keys[future]
+                rows, last_page = future.result()
+                signatures[region][page] = _page_signature(rows)
+                if keep_rows:
+                    pages[region][page] = rows
+                if last_page is not None:
+                    hints[region] = max(hints[region] or 0, last_page)
+                progress.advance(f"crawl {region}", total=hints[region])
+                if on_page is not None:
+                    on_page(region, page, rows)
+
+            for region in zipcodes:
+                if end[region] is not None:
+                    continue
+                for page in sorted(signatures[region]):
+                    signature = signatures[region][page]
+                    if not signature[0] or (page > 1 and signature == signatures[region].get(page - 1)):
+                        end[region] = page
+                        break
+                else:
+                    if hints[region] is not None and frontier[region] >= hints[region]:
+                        end[region] = frontier[region] + 1
+
+    for region in zipcodes:
+        progress.finish(f"crawl {region}")
+        if on_end is not None:
+            on_end(region, end[region])
+    crawled = sum(count for region in zipcodes for page, (count, _) in signatures[region].items() if page < end[region])
+    return {
+        region: [row for page in sorted(pages[region]) if page < end[region] for row in pages[region][page]]
+        for region in zipcodes
+    }, crawled
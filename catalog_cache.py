@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+
+class CachedPage:
+    def __init__(self, etag, last_modified, content_hash, rows, last_page, checked_at):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.rows = rows
+        self.last_page = last_page
+        self.checked_at = checked_at
+
+
+def parser_version(parser):
+    """The parser backend and a hash of the parser code: rows cached before a parser change are not reused."""
+    from artifacts import source_hash
+
+    return f"{parser}@{source_hash(['page_parsers'])[:16]}"
+
+
+class CatalogPageCache:
+    """
+    On-disk cache of parsed catalog pages keyed by (page URL, parser version), so by (zipcode, page) of one site.
+    Each entry keeps the rows and pagination hint of the page with its ETag, Last-Modified and a
+    sha256 of the body. Entries checked less than freshness seconds ago are served without a request;
+    older ones are revalidated with a conditional GET. Shared by the crawl's worker threads.
+    """
+
+    COMMIT_EVERY = 50
+
+    def __init__(self, path=None, freshness=None, parser=None):
+        self.path = path or config.CATALOG_CACHE_PATH
+        self.freshness = config.CATALOG_FRESHNESS if freshness is None else freshness
+        self.parser = parser_version(parser or config.CATALOG_PARSER)
+        # how each page of this run was served
+        self.fresh = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.parsed = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog_pages ("
+            " url TEXT NOT NULL,"
+            " parser TEXT NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_hash TEXT NOT NULL,"
+            " rows TEXT NOT NULL,"
+            " last_page INTEGER,"
+            " checked_at REAL NOT NULL,"
+            " PRIMARY KEY (url, parser))"
+        )
+        # rows of an older version of this parser are never read again
+        backend = self.parser.split("@")[0]
+        self.conn.execute("DELETE FROM catalog_pages WHERE parser LIKE ? AND parser != ?", (f"{backend}@%", self.parser))
+        self.conn.commit()
+
+    def get(self, url):
+        """CachedPage of url parsed with this cache's parser, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content_hash, rows, last_page, checked_at FROM catalog_pages"
+                " WHERE url = ? AND parser = ?",
+                (url, self.parser)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, rows, last_page, checked_at = row
+        return CachedPage(etag, last_modified, content_hash, json.loads(rows), last_page, checked_at)
+
+    def is_fresh(self, page):
+        return page.checked_at >= time.time() - self.freshness
+
+    @staticmethod
+    def conditional_headers(page):
+        """If-None-Match / If-Modified-Since to revalidate a cached page."""
+        headers = {}
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def put(self, url, etag, last_modified, content_hash, rows, last_page):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO catalog_pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, self.parser, etag, last_modified, content_hash, json.dumps(rows), last_page, time.time())
+            )
+            self._written()
+
+    def touch(self, url, etag=None, last_modified=None):
+        """The cached page is still current: restart its freshness window, keep any new validators."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE catalog_pages SET checked_at = ?, etag = COALESCE(?, etag),"
+                " last_modified = COALESCE(?, last_modified) WHERE url = ? AND parser = ?",
+                (time.time(), etag, last_modified, url, self.parser)
+            )
+            self._written()
+
+    def _written(self):
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self.conn.commit()
+            self._pending = 0
+
+    def count(self, outcome):
+        """outcome: fresh | not_modified | unchanged | parsed"""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def format_summary(self):
+        return (f"Catalog page cache: {self.fresh} fresh, {self.not_modified} not modified, "
+                f"{self.unchanged} unchanged, {self.parsed} parsed")
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM catalog_pages")
+            self.conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self.conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import threading
+
+import config
+
+
+class RunState:
+    """
+    Checkpoints of an in-progress run in a local state directory:
+
+        state/catalog/<region>/<page>.json   parsed rows + pagination hint of each fetched page
+        state/stock/<warehouse>.jsonl        one raw stockstatus answer per line, appended as they arrive
+
+    A fresh run wipes the directory; a resumed run reuses whatever is in it.
+    """
+
+    def __init__(self, directory=None, resume=False):
+        self.directory = directory or config.STATE_DIR
+        if not resume and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(os.path.join(self.directory, "catalog"), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, "stock"), exist_ok=True)
+        self._files = {}
+        self._lock = threading.Lock()
+
+    # ================= CATALOG =================
+
+    def _page_path(self, region, page):
+        return os.path.join(self.directory, "catalog", region, f"{page}.json")
+
+    def load_page(self, region, page):
+        """(rows, last_page) of a page fetched by an earlier attempt, or None."""
+        try:
+            with open(self._page_path(region, page), encoding="utf-8") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # pages saved without "ok" may be a failed fetch parsed as an empty page: fetch them again
+        if not saved.get("ok"):
+            return None
+        return saved["rows"], saved["last_page"]
+
+    def save_page(self, region, page, rows, last_page):
+        """Only for pages that answered 200 (or were served from the page cache)."""
+        path = self._page_path(region, page)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write-then-rename so a killed run never leaves half a page behind
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "last_page": last_page, "ok": True}, f)
+        os.replace(tmp_path, path)
+
+    # ================= STOCK STATUS =================
+
+    def _stock_path(self, warehouse):
+        return os.path.join(self.directory, "stock", f"{warehouse}.jsonl")
+
+    def completed_parts(self, warehouse):
+        """partnumber -> raw answer for everything already queried in this warehouse."""
+        done = {}
+        try:
+            with open(self._stock_path(warehouse), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # last line of a killed run
+                    done[record["partnumber"]] = record["raw"]
+        except FileNotFoundError:
+            pass
+        return done
+
+    def record_part(self, warehouse, partnumber, raw):
+        with self._lock:
+            if warehouse not in self._files:
+                # line buffered: every answer hits the disk as soon as it arrives
+                self._files[warehouse] = open(self._stock_path(warehouse), "a", encoding="utf-8", buffering=1)
+            self._files[warehouse].write(json.dumps({"partnumber": partnumber, "raw": raw}) + "\n")
+
+    # ================= LIFECYCLE =================
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+    def clear(self):
+        """Drop the checkpoints once the report has been written."""
+        self.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
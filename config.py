@@ -0,0 +1,205 @@
+import json
+import os
+
+# ================= ENDPOINTS =================
+
+STOCK_STATUS_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "X-Requested-With": "XMLHttpRequest",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36",
+}
+
+
+def use_base_url(base_url):
+    """Re-point every endpoint at another host (used by the benchmarks' stand-in server)."""
+    global BASE_URL, CATALOG_URL_TEMPLATE, STOCK_STATUS_URL
+    BASE_URL = base_url.rstrip("/")
+    CATALOG_URL_TEMPLATE = BASE_URL + "/en/catalog/category/view/s/hpl/id/8/?zipcode={zipcode}&p={page}"
+    STOCK_STATUS_URL = BASE_URL + "/en/webservices/index/stockstatus/"
+
+
+# Point this at a local stand-in server (see benchmarks/) to run without hitting Wilsonart
+use_base_url(os.environ.get("WILSONART_BASE_URL", "https://business.wilsonart.com"))
+
+
+# ================= CATALOG =================
+
+# (region, page) fetches in flight at once
+CATALOG_WORKERS = int(os.environ.get("WILSONART_CATALOG_WORKERS", "4"))
+
+# page parser backend: regex | lxml | selectolax | bs4 (reference)
+CATALOG_PARSER = os.environ.get("WILSONART_CATALOG_PARSER", "regex")
+
+# safety cap for page discovery
+CATALOG_MAX_PAGES = int(os.environ.get("WILSONART_CATALOG_MAX_PAGES", "200"))
+
+# parsed rows, ETag / Last-Modified and a content hash of every catalog page; later crawls send
+# conditional requests and only parse pages that changed ("" disables the cache)
+CATALOG_CACHE_PATH = os.environ.get("WILSONART_CATALOG_CACHE", os.path.join("cache", "catalog_pages.sqlite3"))
+
+# pages checked less than this many seconds ago are reused without a request (0 = always revalidate)
+CATALOG_FRESHNESS = float(os.environ.get("WILSONART_CATALOG_FRESHNESS", "3600"))
+
+
+# ================= REGIONS =================
+
+# one entry per distribution center: region name, catalog zipcode, stockstatus warehouse code and
+# inforid, report column suffix and the label used in Availability_Status
+WAREHOUSES_FILE = os.environ.get(
+    "WILSONART_WAREHOUSES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "warehouses.json")
+)
+REGION_FIELDS = ("region", "zipcode", "warehouse", "inforid", "suffix", "label")
+
+
+def load_regions(path=None):
+    """Region entries of the warehouses file, in file order."""
+    path = path or WAREHOUSES_FILE
+    with open(path, encoding="utf-8") as f:
+        regions = json.load(f)["regions"]
+
+    for entry in regions:
+        missing = [field for field in REGION_FIELDS if field not in entry]
+        if missing:
+            raise ValueError(f"{path}: region {entry.get('region')!r} is missing {missing}")
+    for field in ("region", "warehouse", "suffix"):
+        values = [entry[field] for entry in regions]
+        if len(set(values)) != len(values):
+            raise ValueError(f"{path}: duplicate {field} in {values}")
+    if not regions:
+        raise ValueError(f"{path}: no regions")
+    return regions
+
+
+# ================= STOCK STATUS =================
+
+# stock-status requests queued at the client at once, across all warehouses;
+# the adaptive limit (HTTP_ADAPTIVE) decides how many of them are actually in flight
+STOCK_CONCURRENCY = int(os.environ.get("WILSONART_STOCK_CONCURRENCY", "32"))
+
+# optional hard requests-per-second cap shared by all warehouses (0 = none, the adaptive limit paces)
+STOCK_RPS = float(os.environ.get("WILSONART_STOCK_RPS", "0"))
+
+# raw stockstatus responses younger than the TTL (seconds) are reused; 0 disables the cache
+STOCK_CACHE_PATH = os.environ.get("WILSONART_STOCK_CACHE", os.path.join("cache", "stock_status.sqlite3"))
+STOCK_CACHE_TTL = float(os.environ.get("WILSONART_STOCK_CACHE_TTL", "3600"))
+
+# lookups still failing at the end of a run get this many more rounds, the first after
+# STOCK_RETRY_BACKOFF seconds and each later one after twice the previous wait
+STOCK_RETRY_ROUNDS = int(os.environ.get("WILSONART_STOCK_RETRY_ROUNDS", "3"))
+STOCK_RETRY_BACKOFF = float(os.environ.get("WILSONART_STOCK_RETRY_BACKOFF", "5"))
+
+# (part, warehouse) lookups that failed every round, re-queried by `run_scraper_job.py requery`
+DEAD_LETTER_FILE = os.environ.get("WILSONART_DEAD_LETTER_FILE", os.path.join("output", "dead_letters.json"))
+
+# format of each comma-separated arrival date in a stockstatus answer; anything else is left empty
+ARRIVAL_DATE_FORMAT = os.environ.get("WILSONART_ARRIVAL_DATE_FORMAT", "%m/%d/%Y")
+
+
+# ================= CHECKPOINTS =================
+
+# crawl pages and stock answers of the current run, used by --resume
+STATE_DIR = os.environ.get("WILSONART_STATE_DIR", "state")
+
+
+# ================= STAGE ARTIFACTS =================
+
+# content-hashed outputs of the crawl | stock | transform | compare | export commands
+ARTIFACT_DIR = os.environ.get("WILSONART_ARTIFACT_DIR", "artifacts")
+
+# crawl and stock artifacts older than this many seconds are fetched again even if their key
+# is unchanged, since the site can change under the same config (0 = always fetch again)
+ARTIFACT_NETWORK_MAX_AGE = float(os.environ.get("WILSONART_ARTIFACT_NETWORK_MAX_AGE", "3600"))
+
+
+# ================= SHARDING =================
+
+# crawl rows written once and read by every `--shard i/N` process
+CATALOG_ARTIFACT = os.environ.get("WILSONART_CATALOG_ARTIFACT", os.path.join("output", "catalog.json"))
+
+# each shard's stock-status answers, combined by `run_scraper_job.py merge`
+SHARD_DIR = os.environ.get("WILSONART_SHARD_DIR", os.path.join("output", "shards"))
+
+
+# ================= REPORT =================
+
+# comma-separated report formats written by run_scraper_job.py: xlsx, xlsx-openpyxl, parquet, csv
+REPORT_FORMATS = os.environ.get("WILSONART_REPORT_FORMATS", "xlsx").split(",")
+
+# every run's report is appended here (Parquet, partitioned by run date) for `run_scraper_job.py diff`
+HISTORY_DIR = os.environ.get("WILSONART_HISTORY_DIR", "history")
+
+# snapshot the Streamlit explorer opens (Parquet path or URL); empty = newest run in HISTORY_DIR
+EXPLORER_SNAPSHOT = os.environ.get("WILSONART_EXPLORER_SNAPSHOT", "")
+
+
+# ================= HOT-SET REFRESH =================
+
+# `run_scraper_job.py refresh` re-queries products that changed in the last run, arrive within
+# HOT_ARRIVAL_DAYS (or are overdue) or have 0 < availability <= HOT_LOW_STOCK, in that order
+HOT_LOW_STOCK = int(os.environ.get("WILSONART_HOT_LOW_STOCK", "20"))
+HOT_ARRIVAL_DAYS = int(os.environ.get("WILSONART_HOT_ARRIVAL_DAYS", "14"))
+# per-region cap on the hot set (0 = no cap)
+HOT_MAX_PARTS = int(os.environ.get("WILSONART_HOT_MAX_PARTS", "0"))
+
+
+# ================= SERVICE =================
+
+# `run_scraper_job.py serve`: local HTTP/JSON API over the newest report, refreshed in the background
+SERVICE_HOST = os.environ.get("WILSONART_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("WILSONART_SERVICE_PORT", "8780"))
+# seconds between hot-set refreshes and between full sweeps of the index
+SERVICE_REFRESH_INTERVAL = float(os.environ.get("WILSONART_SERVICE_REFRESH_INTERVAL", "900"))
+SERVICE_FULL_INTERVAL = float(os.environ.get("WILSONART_SERVICE_FULL_INTERVAL", "86400"))
+# checkpoints and dead letters of the service's full sweeps, apart from those of CLI runs in the same directory
+SERVICE_STATE_DIR = os.environ.get("WILSONART_SERVICE_STATE_DIR", "service_state")
+SERVICE_DEAD_LETTER_FILE = os.environ.get(
+    "WILSONART_SERVICE_DEAD_LETTER_FILE", os.path.join("output", "service_dead_letters.json")
+)
+
+
+# ================= PROGRESS =================
+
+# seconds between progress events of a task (done, total, rate, ETA); per-item updates in between only count
+PROGRESS_INTERVAL = float(os.environ.get("WILSONART_PROGRESS_INTERVAL", "2"))
+# recent log messages kept for sinks that redraw the log (the Streamlit app)
+PROGRESS_RING = int(os.environ.get("WILSONART_PROGRESS_RING", "200"))
+# also write every log and progress event of run_scraper_job.py to this JSON-lines file (empty = no file)
+EVENTS_FILE = os.environ.get("WILSONART_EVENTS_FILE", "")
+
+
+# ================= CHUNKED MODE =================
+
+# `run_scraper_job.py run --chunked`: crawl rows and stock answers are spilled to Parquet as they
+# arrive, hash-partitioned by part number into SPILL_BUCKETS, and the report is built one bucket at
+# a time. Peak memory follows the largest bucket instead of the whole catalog.
+SPILL_DIR = os.environ.get("WILSONART_SPILL_DIR", "spill")
+# records buffered before they are written out as one Parquet batch
+SPILL_BATCH_ROWS = int(os.environ.get("WILSONART_SPILL_BATCH_ROWS", "50000"))
+SPILL_BUCKETS = int(os.environ.get("WILSONART_SPILL_BUCKETS", "16"))
+
+
+# ================= HTTP CLIENT =================
+
+# keep-alive connections per host; should be >= HTTP_LIMIT_MAX
+HTTP_POOL_SIZE = int(os.environ.get("WILSONART_HTTP_POOL_SIZE", "32"))
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("WILSONART_HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.environ.get("WILSONART_HTTP_READ_TIMEOUT", "30"))
+
+# retries on connection errors / timeouts / 429 / 5xx, backoff doubles each attempt (+-50% jitter)
+HTTP_MAX_RETRIES = int(os.environ.get("WILSONART_HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF = float(os.environ.get("WILSONART_HTTP_BACKOFF", "0.5"))
+HTTP_BACKOFF_MAX = float(os.environ.get("WILSONART_HTTP_BACKOFF_MAX", "8"))
+# longest Retry-After pause honoured, in seconds
+HTTP_RETRY_AFTER_MAX = float(os.environ.get("WILSONART_HTTP_RETRY_AFTER_MAX", "120"))
+# latest request latencies kept per kind for the p50/p95 of the summary (count, mean, max cover all)
+HTTP_LATENCY_WINDOW = int(os.environ.get("WILSONART_HTTP_LATENCY_WINDOW", "100000"))
+
+# AIMD limit on requests in flight, shared by the catalog crawl and the stock-status queries:
+# +1 per window of clean responses, halved on 429/5xx/connection errors or when latency
+# climbs past HTTP_LIMIT_LATENCY_FACTOR x the best seen. 0 = fixed limit of HTTP_POOL_SIZE.
+HTTP_ADAPTIVE = os.environ.get("WILSONART_HTTP_ADAPTIVE", "1") == "1"
+HTTP_LIMIT_START = int(os.environ.get("WILSONART_HTTP_LIMIT_START", "4"))
+HTTP_LIMIT_MIN = int(os.environ.get("WILSONART_HTTP_LIMIT_MIN", "1"))
+HTTP_LIMIT_MAX = int(os.environ.get("WILSONART_HTTP_LIMIT_MAX", "32"))
+HTTP_LIMIT_LATENCY_FACTOR = float(os.environ.get("WILSONART_HTTP_LIMIT_LATENCY_FACTOR", "2.5"))
@@ -0,0 +1,233 @@
+"""
+Dead letters: stock-status lookups that still failed after the end-of-run retries.
+
+A run writes them to DEAD_LETTER_FILE, each with the catalog rows the part was listed with, so
+`run_scraper_job.py requery` can ask for just those (part, warehouse) pairs later and patch the
+answers into the newest history snapshot instead of repeating the whole sweep:
+
+    {"catalog_parts": {"LA": 5120, ...},
+     "entries": [{"warehouse": "LA", "inforid": 109284, "partnumber": "100060VGS30X144", "error": "status 503",
+                  "attempts": 1, "failed_at": "2026-10-18T06:41:09", "region": "LA", "catalog": [{...}, ...]}]}
+
+The report's Completeness sheet counts them per warehouse next to the parts that did answer, out of
+the part numbers the run's catalog listed in that region (catalog_parts).
+"""
+import datetime
+import json
+import os
+
+import config
+import history
+
+CATALOG_COLUMNS = ["Region", "VendPartNumber", "DesignID", "DesignName", "Grade", "FinishID", "Finish",
+                   "SizeDescription", "ProductType"]
+
+
+class DeadLetters:
+    """
+    (warehouse, partnumber) -> failure entry, and region -> part numbers in the run's catalog,
+    read from and saved to a JSON file.
+    """
+
+    def __init__(self, path=None, reset=False):
+        self.path = path or config.DEAD_LETTER_FILE
+        self.entries, self.catalog_parts = ({}, {}) if reset else self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return {}, {}
+        if isinstance(saved, list):
+            saved = {"entries": saved}  # written before catalog_parts were kept
+        entries = {(entry["warehouse"], entry["partnumber"]): entry for entry in saved["entries"]}
+        return entries, saved.get("catalog_parts", {})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, warehouse, inforid, partnumber, error):
+        entry = self.entries.setdefault((warehouse, partnumber), {
+            "warehouse": warehouse, "inforid": inforid, "partnumber": partnumber, "attempts": 0,
+        })
+        entry["error"] = error
+        entry["attempts"] += 1
+        entry["failed_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+
+    def discard(self, warehouse, partnumber):
+        self.entries.pop((warehouse, partnumber), None)
+
+    def update(self, other):
+        self.entries.update(other.entries)
+
+    def count(self, warehouse):
+        return sum(1 for entry_warehouse, _ in self.entries if entry_warehouse == warehouse)
+
+    def attach_catalog(self, catalog):
+        """
+        Store the catalog rows of every entry's part in its region, needed to place a later answer,
+        and count the catalog's part numbers per region. Called with part of the catalog (a bucket of
+        the chunked run), only the parts in it are filled in and its counts add to the earlier buckets'.
+        """
+        from main import WAREHOUSES
+
+        for region, count in catalog_parts(catalog).items():
+            self.catalog_parts[region] = self.catalog_parts.get(region, 0) + count
+        regions = {warehouse: region for region, (warehouse, _) in WAREHOUSES.items()}
+        failed = catalog[catalog["VendPartNumber"].isin({pn for _, pn in self.entries})]
+        rows = json.loads(failed[CATALOG_COLUMNS].to_json(orient="records"))
+        listed = set(failed["VendPartNumber"])
+        by_key = {}
+        for row in rows:
+            by_key.setdefault((row["Region"], row["VendPartNumber"]), []).append(row)
+        for (warehouse, pn), entry in self.entries.items():
+            entry["region"] = regions.get(warehouse)
+            if pn in listed or "catalog" not in entry:
+                entry["catalog"] = by_key.get((entry["region"], pn), [])
+
+    def catalog(self):
+        """Long catalog frame (as main.clean_catalog makes it) of the entries' parts."""
+        import pandas as pd
+        from main import CATEGORY_COLUMNS
+        from partnumbers import decode
+
+        rows = [row for entry in self.entries.values() for row in entry.get("catalog", [])]
+        df = pd.DataFrame(rows, columns=CATALOG_COLUMNS)
+        decoded = decode(df)
+        df[decoded.columns] = decoded
+        df[CATEGORY_COLUMNS] = df[CATEGORY_COLUMNS].astype("category")
+        return df
+
+    def jobs(self):
+        """warehouse -> (partnumbers, inforid) of the entries whose catalog rows are known."""
+        jobs = {}
+        for entry in self.entries.values():
+            if entry.get("catalog"):
+                jobs.setdefault(entry["warehouse"], ([], entry["inforid"]))[0].append(entry["partnumber"])
+        return jobs
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"catalog_parts": self.catalog_parts, "entries": list(self.entries.values())}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+# ================= COMPLETENESS =================
+
+def catalog_parts(catalog):
+    """region -> part numbers listed in the (long, cleaned) catalog for that region."""
+    return catalog.groupby("Region", observed=True)["VendPartNumber"].nunique().to_dict()
+
+
+def answered_parts(df_compare):
+    """region -> part numbers listed in the report for that region."""
+    from main import SUFFIXES
+
+    return {
+        region: df_compare.loc[df_compare[f"In_{suffix}"].astype(bool), "VendPartNumber"].nunique()
+        for region, suffix in SUFFIXES.items()
+    }
+
+
+def completeness(df_compare, dead_letters=None, answered=None):
+    """
+    Per warehouse: part numbers in the catalog, answered (listed in the report), dead letters, the
+    ones neither answered nor failed, and the answered share of the catalog. The catalog counts come
+    from dead_letters (DeadLetters.catalog_parts); a file without them counts answered + failed.
+    answered (region -> count, see answered_parts) replaces df_compare when the report is never in memory.
+    """
+    import pandas as pd
+    from main import WAREHOUSES
+
+    dead_letters = DeadLetters() if dead_letters is None else dead_letters
+    answered = answered_parts(df_compare) if answered is None else answered
+    rows = []
+    for region, (warehouse, _) in WAREHOUSES.items():
+        failed = dead_letters.count(warehouse)
+        listed = dead_letters.catalog_parts.get(region, answered[region] + failed)
+        rows.append({
+            "Region": region, "Warehouse": warehouse, "Catalog": listed, "Answered": answered[region],
+            "Failed": failed, "Unaccounted": max(listed - answered[region] - failed, 0),
+            "Complete": answered[region] / listed if listed else 1.0,
+        })
+    return pd.DataFrame(rows)
+
+
+# ================= REQUERY =================
+
+def patch_report(snapshot, recovered):
+    """
+    Merge the report rows of re-queried parts into a snapshot: a product already in it gets the
+    region columns it was recovered in, a product that failed everywhere is appended.
+    Returns the patched frame.
+    """
+    import pandas as pd
+    from hotset import update_totals
+    from main import SUFFIXES
+
+    for col in snapshot.columns:
+        # recovered rows may bring finishes, sizes, ... the snapshot's categoricals have not seen
+        if isinstance(snapshot[col].dtype, pd.CategoricalDtype):
+            unseen = pd.Index(recovered[col].dropna().unique()).difference(snapshot[col].cat.categories)
+            snapshot[col] = snapshot[col].cat.add_categories(unseen)
+
+    position = pd.Series(snapshot.index, index=pd.MultiIndex.from_frame(snapshot[history.KEYS]))
+    position = position[~position.index.duplicated()]
+    touched = pd.Series(False, index=snapshot.index)
+    new_rows = []
+    # a handful of failures, one row at a time is fine
+    for i, row in recovered.iterrows():
+        key = tuple(row[history.KEYS])
+        if key not in position.index:
+            new_rows.append(i)
+            continue
+        for suffix in SUFFIXES.values():
+            if row[f"In_{suffix}"]:
+                cols = [col for col in recovered.columns if col.endswith(f"_{suffix}")]
+                snapshot.loc[position[key], cols] = row[cols].to_numpy()
+        touched[position[key]] = True
+
+    update_totals(snapshot, touched)
+    if new_rows:
+        snapshot = pd.concat([snapshot, recovered.loc[new_rows, snapshot.columns]], ignore_index=True)
+    return snapshot
+
+
+def requery_failures(log_callback=None, history_dir=None, path=None):
+    """
+    Query only the dead letters again and patch the answers into the newest snapshot.
+    Returns (df_compare, both_available), or None when there is nothing to requery or patch.
+    """
+    log_callback = log_callback or (lambda msg: None)
+
+    from main import SUFFIXES, build_report, export_frames, stock_frames
+    from stock_status import get_answers_for_warehouses
+
+    dead_letters = DeadLetters(path)
+    snapshots = history.list_snapshots(history_dir)
+    jobs = dead_letters.jobs()
+    if not jobs or not snapshots:
+        log_callback(f"{len(dead_letters)} dead letters in {dead_letters.path}, {len(snapshots)} snapshots")
+        return None
+
+    catalog = dead_letters.catalog()
+    log_callback(f"Re-querying {sum(len(pns) for pns, _ in jobs.values())} failed lookups for {snapshots[-1]}")
+    answers = get_answers_for_warehouses(jobs, log_callback=log_callback, dead_letters=dead_letters)
+    dead_letters.save()
+    recovered = sum(len(raws) for raws in answers.values())
+    log_callback(f"Recovered {recovered}, {len(dead_letters)} still failing")
+    if not recovered:
+        return None
+
+    report = history.snapshot_frame(export_frames(*build_report(catalog, stock_frames(catalog, answers)))[0], None)
+    snapshot = history.load_snapshot(snapshots[-1]).drop(columns="Run_At")
+    # the report keeps the Arrival Dates{i} columns of a full run
+    snapshot = history.unfold_snapshot(patch_report(snapshot, report.drop(columns="Run_At")))
+
+    both_available = snapshot[snapshot["Available_Count"] == len(SUFFIXES)].copy()
+    return snapshot, both_available
@@ -0,0 +1,110 @@
+"""
+Query side of the Streamlit explorer (app.py): load a report snapshot, filter, search, aggregate
+and page through it. Everything works on the columnar snapshot loaded once per file (the app caches
+it with st.cache_data), so each interaction is a few vectorized masks, not a reload.
+
+Snapshots are the Parquet files of the history store (history.py) or a `--format parquet`
+`..._all_products.parquet` report; both have the Available_<suffix> and Availability_Status columns.
+"""
+import os
+
+import config
+import history
+
+SEARCH_KEY = "_search"
+PAGE_SIZES = (25, 50, 100, 250)
+
+
+def snapshot_source():
+    """WILSONART_EXPLORER_SNAPSHOT (path or URL) if set, else the newest snapshot of the history store."""
+    if config.EXPLORER_SNAPSHOT:
+        return config.EXPLORER_SNAPSHOT
+    snapshots = history.list_snapshots()
+    return snapshots[-1] if snapshots else None
+
+
+def snapshot_version(source):
+    """Changes whenever the file at `source` is rewritten, so a cache keyed on it reloads."""
+    return os.path.getmtime(source) if os.path.exists(source) else None
+
+
+def suffixes(df):
+    return [col[len("Available_"):] for col in df.columns if col.startswith("Available_") and col != "Available_Count"]
+
+
+def region_columns(df, name):
+    """`<name>_<suffix>` columns of every region, e.g. ProductType_LA, ProductType_SA."""
+    return [f"{name}_{suffix}" for suffix in suffixes(df) if f"{name}_{suffix}" in df.columns]
+
+
+def values(df, name):
+    """Sorted distinct values of a column, or of all its per-region columns."""
+    cols = [name] if name in df.columns else region_columns(df, name)
+    return sorted({value for col in cols for value in df[col].dropna().unique()})
+
+
+def load_report(source):
+    """
+    The snapshot as a DataFrame, plus a lower-cased search key per row
+    (part numbers, design ID and every region's design name).
+    """
+    import pandas as pd
+
+    df = pd.read_parquet(source)
+    text_cols = [col for col in ["PartNumber", "VendPartNumber", "DesignID"] if col in df.columns]
+    text_cols += [col for col in df.columns if col.startswith("DesignName_")]
+    key = pd.Series("", index=df.index)
+    for col in text_cols:
+        key = key + "|" + df[col].astype("string").fillna("")
+    df[SEARCH_KEY] = key.str.lower()
+    return df
+
+
+def filter_report(df, search="", statuses=(), available_in=(), grades=(), product_types=(), min_total=0):
+    """
+    Rows matching every filter given: search is a case-insensitive substring of the search key,
+    available_in lists region suffixes the product must be available in, the rest are allowed values.
+    """
+    import pandas as pd
+
+    mask = pd.Series(True, index=df.index)
+    if search:
+        mask &= df[SEARCH_KEY].str.contains(search.strip().lower(), regex=False)
+    if statuses:
+        mask &= df["Availability_Status"].isin(statuses)
+    for suffix in available_in:
+        mask &= df[f"Available_{suffix}"].astype(bool)
+    if grades:
+        mask &= df["Grade"].isin(grades)
+    if product_types:
+        # listed with that product type in any region
+        mask &= df[region_columns(df, "ProductType")].isin(product_types).any(axis=1)
+    if min_total:
+        mask &= df["Total_Availability"].fillna(0) >= min_total
+    return df[mask]
+
+
+def aggregate(df, by):
+    """Products, total availability and products available per region for each value of `by`."""
+    available = {f"Available {suffix}": (f"Available_{suffix}", "sum") for suffix in suffixes(df)}
+    return (
+        df.groupby(by, observed=True, dropna=False)
+        .agg(Products=("VendPartNumber", "size"), Total_Availability=("Total_Availability", "sum"), **available)
+        .sort_values("Products", ascending=False)
+        .reset_index()
+    )
+
+
+def page_count(rows, size):
+    return max(1, -(-rows // size))
+
+
+def page(df, number, size):
+    """Rows of 1-based page `number`."""
+    start = (number - 1) * size
+    return df.iloc[start:start + size]
+
+
+def to_csv(df):
+    """Filtered slice as CSV bytes for the download button, without the search key."""
+    return df.drop(columns=SEARCH_KEY, errors="ignore").to_csv(index=False).encode("utf-8")
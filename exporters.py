@@ -0,0 +1,164 @@
+"""
+Report writers.
+
+Every writer takes the report sheets as {sheet name: DataFrame} and an output stem (path without
+extension) and returns the paths it wrote. A sheet too large for memory (the chunked run) is a
+callable instead, returning its DataFrame chunks; it is called again for every format. "xlsx"
+streams the sheets row by row through xlsxwriter's constant-memory mode; "xlsx-openpyxl" is the
+original pandas/openpyxl path, kept as the reference.
+"parquet" and "csv" write one file per sheet for downstream systems.
+"""
+import os
+
+import config
+from metrics import get_metrics
+
+# same look as the header pandas writes
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+
+def _sheet_path(stem, sheet, extension):
+    return f"{stem}_{sheet.lower().replace(' ', '_')}.{extension}"
+
+
+def _chunks(sheet):
+    return sheet() if callable(sheet) else [sheet]
+
+
+def _cell_columns(df):
+    """Each column as a list of plain Python values, None for every kind of missing value."""
+    cells = []
+    for _, series in df.items():
+        values = series.to_numpy(dtype=object)
+        values[series.isna().to_numpy()] = None
+        cells.append(values)
+    return cells
+
+
+# ================= WRITERS =================
+
+def write_xlsx(sheets, stem):
+    """Row-major write in xlsxwriter constant_memory mode: only the current row is held in memory."""
+    import xlsxwriter
+
+    path = f"{stem}.xlsx"
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "default_date_format": DATETIME_FORMAT,
+        # cells are data: skip the per-string formula/URL sniffing
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+    })
+    header_format = workbook.add_format(HEADER_FORMAT)
+    try:
+        for sheet, frames in sheets.items():
+            worksheet = workbook.add_worksheet(sheet)
+            row = 0
+            for df in _chunks(frames):
+                if row == 0:
+                    worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
+                    row = 1
+                for values in zip(*_cell_columns(df)):
+                    worksheet.write_row(row, 0, values)
+                    row += 1
+    finally:
+        workbook.close()
+    return [path]
+
+
+def write_xlsx_openpyxl(sheets, stem):
+    import pandas as pd
+
+    path = f"{stem}.xlsx"
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet, frames in sheets.items():
+            df = pd.concat(_chunks(frames), ignore_index=True) if callable(frames) else frames
+            df.to_excel(writer, sheet_name=sheet, index=False)
+    return [path]
+
+
+def write_parquet(sheets, stem):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("the parquet report format needs `pip install pyarrow`") from e
+
+    paths = []
+    for sheet, frames in sheets.items():
+        path = _sheet_path(stem, sheet, "parquet")
+        if callable(frames):
+            write_parquet_chunks(frames(), path)
+        else:
+            frames.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def write_parquet_chunks(chunks, path):
+    """
+    One Parquet file from DataFrame chunks, a row group each. The first chunk fixes the schema:
+    categoricals stay dictionary-encoded (with int32 indices, as every chunk has its own categories)
+    so they read back as categoricals like a frame written in one go, and all-missing columns are
+    plain strings so every later chunk casts to them. Returns the rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, schema, rows = None, None, 0
+    try:
+        for df in chunks:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                # the pandas metadata stays: it brings nullable integers back as Int64
+                schema = pa.schema([
+                    pa.field(field.name, pa.dictionary(pa.int32(), pa.string())) if pa.types.is_dictionary(field.type)
+                    else pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ], metadata=table.schema.metadata)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(table.cast(schema))
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_csv(sheets, stem):
+    paths = []
+    for sheet, frames in sheets.items():
+        path = _sheet_path(stem, sheet, "csv")
+        for i, df in enumerate(_chunks(frames)):
+            df.to_csv(path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        paths.append(path)
+    return paths
+
+
+EXPORTERS = {
+    "xlsx": write_xlsx,
+    "xlsx-openpyxl": write_xlsx_openpyxl,
+    "parquet": write_parquet,
+    "csv": write_csv,
+}
+
+
+def get_exporter(name):
+    try:
+        return EXPORTERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown report format {name!r}, expected one of {sorted(EXPORTERS)}") from None
+
+
+def export_report(sheets, stem, formats=None):
+    """Write the sheets in every requested format, returns the paths written."""
+    directory = os.path.dirname(stem)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    paths = []
+    with get_metrics().stage("export"):
+        for name in formats or config.REPORT_FORMATS:
+            paths.extend(get_exporter(name)(sheets, stem))
+    # chunked sheets are not read again just to count them, their producer counts its rows
+    get_metrics().add_rows("export", sum(len(df) for df in sheets.values() if not callable(df)))
+    return paths
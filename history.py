@@ -0,0 +1,174 @@
+"""
+Run-over-run history of the report.
+
+Every run appends a snapshot of df_compare to a Parquet store partitioned by run date:
+
+    history/run_date=2026-10-18/run_20261018T061500.parquet
+
+Snapshots keep the same columns from run to run: the variable `Arrival Dates{i}_<suffix>` columns are
+folded into `Next_Arrival_<suffix>`; the raw `Arrival Dates_<suffix>` strings still list every date.
+unfold_snapshot() spreads them out again for reports patched from a snapshot (refresh, requery).
+The whole store reads as one table, e.g. in DuckDB:
+
+    SELECT * FROM read_parquet('history/*/*.parquet', hive_partitioning = true)
+"""
+import datetime
+import glob
+import os
+import re
+
+import config
+
+KEYS = ["PartNumber", "VendPartNumber"]
+QUANTITIES = ["Availability", "OnOrder", "Backorder"]
+DATED_COLUMN_RE = re.compile(r"^Arrival Dates\d+_(.+)$")
+
+
+def _suffixes(df):
+    return [col[len("In_"):] for col in df.columns if col.startswith("In_")]
+
+
+# ================= STORE =================
+
+def snapshot_frame(df_compare, run_at):
+    """df_compare with its dated arrival columns folded into one next-arrival column per region."""
+    import pandas as pd
+
+    dated = {}
+    for col in df_compare.columns:
+        match = DATED_COLUMN_RE.match(col)
+        if match:
+            dated.setdefault(match.group(1), []).append(col)
+
+    snapshot = df_compare.drop(columns=[col for cols in dated.values() for col in cols])
+    for suffix in _suffixes(df_compare):
+        cols = dated.get(suffix, [])
+        if cols:
+            snapshot[f"Next_Arrival_{suffix}"] = df_compare[cols].min(axis=1)
+        elif f"Next_Arrival_{suffix}" not in snapshot:
+            # already folded (a patched snapshot) keeps its column
+            snapshot[f"Next_Arrival_{suffix}"] = pd.Series(pd.NaT, index=df_compare.index, dtype="datetime64[ns]")
+    snapshot["Run_At"] = pd.Timestamp(run_at)
+    return snapshot.reset_index(drop=True)
+
+
+def unfold_snapshot(snapshot):
+    """
+    The wide report of a snapshot, laid out like export_frames(): each region's `Arrival Dates{i}_<suffix>`
+    columns parsed again from its raw `Arrival Dates_<suffix>` strings, in place of `Next_Arrival_<suffix>`.
+    """
+    from stock_status import arrival_dates
+
+    df = snapshot.drop(columns=[col for col in snapshot.columns if col.startswith("Next_Arrival_")])
+    arrival_cols = []
+    for suffix in _suffixes(snapshot):
+        raw = f"Arrival Dates_{suffix}"
+        # dates belong to the region's own rows, as in export_frames()
+        listed = df.loc[df[f"In_{suffix}"].astype(bool), [raw]].rename(columns={raw: "Arrival Dates"})
+        listed["Row"] = listed.index
+        dates = arrival_dates(listed, keys=["Row"]).pivot(index="Row", columns="Seq", values="Arrival Date")
+        dates.columns = [f"Arrival Dates{seq}_{suffix}" for seq in dates.columns]
+        df = df.join(dates)
+        arrival_cols += [raw] + list(dates.columns)
+    return df[[col for col in df.columns if not col.startswith("Arrival Dates")] + arrival_cols]
+
+
+def save_snapshot(df_compare, run_at=None, directory=None):
+    """
+    Append this run's report to the history store, returns the snapshot path.
+    df_compare may be a callable returning the report in chunks (the chunked run), written one at a time.
+    """
+    run_at = run_at or datetime.datetime.now()
+    partition = os.path.join(directory or config.HISTORY_DIR, f"run_date={run_at:%Y-%m-%d}")
+    os.makedirs(partition, exist_ok=True)
+
+    path = os.path.join(partition, f"run_{run_at:%Y%m%dT%H%M%S}.parquet")
+    tmp_path = path + ".tmp"
+    from exporters import write_parquet_chunks
+
+    # one writer for both, so a chunked run's snapshot has the schema of an in-memory run's
+    chunks = df_compare() if callable(df_compare) else [df_compare]
+    write_parquet_chunks((snapshot_frame(chunk, run_at) for chunk in chunks), tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def list_snapshots(directory=None):
+    """Snapshot paths, oldest run first."""
+    paths = glob.glob(os.path.join(directory or config.HISTORY_DIR, "run_date=*", "run_*.parquet"))
+    return sorted(paths, key=os.path.basename)
+
+
+def load_snapshot(path):
+    import pandas as pd
+
+    return pd.read_parquet(path)
+
+
+# ================= DIFF =================
+
+def _flag(series):
+    # missing (product not in that run) counts as False
+    return series.astype("boolean").fillna(False).astype(bool)
+
+
+def diff_snapshots(previous, current):
+    """
+    What changed between two snapshots, one row per (region, product) with any change:
+    newly available, out of stock, quantity deltas and shifts of the next arrival date.
+    Products are matched on PartNumber/VendPartNumber; a product missing from a run counts as unavailable.
+    """
+    import pandas as pd
+
+    before = previous.drop_duplicates(KEYS).set_index(KEYS)
+    after = current.drop_duplicates(KEYS).set_index(KEYS)
+    joined = before.join(after, how="outer", lsuffix="_Before", rsuffix="_After")
+
+    changes = []
+    for suffix in _suffixes(current):
+        def col(name, side):
+            return joined.get(f"{name}_{suffix}_{side}", pd.Series(pd.NA, index=joined.index))
+
+        in_both = _flag(col("In", "Before")) & _flag(col("In", "After"))
+        was_available = _flag(col("Available", "Before"))
+        is_available = _flag(col("Available", "After"))
+
+        frame = pd.DataFrame(index=joined.index)
+        frame["Region"] = suffix
+        frame["DesignName"] = col("DesignName", "After").fillna(col("DesignName", "Before"))
+
+        quantity_changed = pd.Series(False, index=joined.index)
+        for name in QUANTITIES:
+            old = pd.to_numeric(col(name, "Before")).astype("Int64")
+            new = pd.to_numeric(col(name, "After")).astype("Int64")
+            frame[f"{name}_Before"] = old
+            frame[f"{name}_After"] = new
+            frame[f"{name}_Delta"] = new.fillna(0) - old.fillna(0)
+            quantity_changed |= in_both & (frame[f"{name}_Delta"] != 0)
+
+        old_arrival = pd.to_datetime(col("Next_Arrival", "Before"))
+        new_arrival = pd.to_datetime(col("Next_Arrival", "After"))
+        frame["Next_Arrival_Before"] = old_arrival
+        frame["Next_Arrival_After"] = new_arrival
+        frame["Arrival_Shift_Days"] = (new_arrival - old_arrival).dt.days.astype("Int64")
+        arrival_shifted = in_both & (old_arrival.ne(new_arrival) & ~(old_arrival.isna() & new_arrival.isna()))
+
+        change = pd.Series("", index=joined.index)
+        for mask, label in [(~was_available & is_available, "Newly available"),
+                            (was_available & ~is_available, "Out of stock"),
+                            (quantity_changed, "Quantity change"),
+                            (arrival_shifted, "Arrival date shift")]:
+            change = change.mask(mask, change + label + "; ")
+        frame["Change"] = change.str.rstrip("; ")
+
+        changes.append(frame[frame["Change"] != ""])
+
+    result = pd.concat(changes).reset_index()
+    first = ["Region", "PartNumber", "VendPartNumber", "DesignName", "Change"]
+    return result[first + [c for c in result.columns if c not in first]]
+
+
+def summarize(changes):
+    """Change counts per region, for the console."""
+    labels = changes.assign(Change=changes["Change"].str.split("; ")).explode("Change")
+    return labels.groupby(["Region", "Change"]).size().unstack("Region", fill_value=0)
@@ -0,0 +1,136 @@
+"""
+Hot-set refresh: re-query only the products likely to have moved since the last run and patch
+them into the newest history snapshot, leaving the full sweep to the daily schedule.
+
+The hot set of a region is every product listed there that
+  * changed between the last two snapshots (history.diff_snapshots),
+  * has its next arrival within HOT_ARRIVAL_DAYS, or overdue, or
+  * has low stock, 0 < availability <= HOT_LOW_STOCK,
+in that priority order, capped at HOT_MAX_PARTS per region.
+
+Only the touched rows get their quantities, arrival dates, Available_<suffix>, Total_Availability,
+Available_Count and Availability_Status recomputed; the patched snapshot is the refresh's report.
+"""
+import datetime
+
+import config
+import history
+
+
+def hot_parts(snapshot, changes=None, now=None, low_stock=None, arrival_days=None, max_parts=None):
+    """suffix -> part numbers to re-query, highest priority first."""
+    import pandas as pd
+    from main import SUFFIXES
+
+    now = pd.Timestamp(now or datetime.datetime.now())
+    low_stock = config.HOT_LOW_STOCK if low_stock is None else low_stock
+    arrival_days = config.HOT_ARRIVAL_DAYS if arrival_days is None else arrival_days
+    max_parts = config.HOT_MAX_PARTS if max_parts is None else max_parts
+
+    parts = {}
+    for suffix in SUFFIXES.values():
+        listed = snapshot[f"In_{suffix}"].astype(bool)
+        if changes is not None and not changes.empty:
+            changed = snapshot["VendPartNumber"].isin(changes.loc[changes["Region"] == suffix, "VendPartNumber"])
+        else:
+            changed = pd.Series(False, index=snapshot.index)
+        arriving = snapshot[f"Next_Arrival_{suffix}"] <= now + pd.Timedelta(days=arrival_days)
+        availability = snapshot[f"Availability_{suffix}"].fillna(0)
+        low = (availability > 0) & (availability <= low_stock)
+
+        ordered = pd.concat([snapshot.loc[listed & mask, "VendPartNumber"] for mask in (changed, arriving, low)])
+        region_parts = list(dict.fromkeys(ordered))
+        parts[suffix] = region_parts[:max_parts] if max_parts else region_parts
+    return parts
+
+
+def patch_snapshot(snapshot, stock):
+    """
+    Write re-queried stock status into the snapshot, in place.
+    stock maps region -> results frame (stock_status.build_results_frame); parts whose query
+    failed are simply absent and keep their old values. Returns the mask of touched rows.
+    """
+    import pandas as pd
+    from main import SUFFIXES, is_available
+    from stock_status import arrival_dates
+
+    touched = pd.Series(False, index=snapshot.index)
+    for region, results in stock.items():
+        if results.empty:
+            continue
+        suffix = SUFFIXES[region]
+        results = results.drop_duplicates("Vendor Product")
+        next_arrival = arrival_dates(results).groupby("Vendor Product")["Arrival Date"].min()
+        results = results.set_index("Vendor Product")
+
+        rows = snapshot[f"In_{suffix}"].astype(bool) & snapshot["VendPartNumber"].isin(results.index)
+        pns = snapshot.loc[rows, "VendPartNumber"]
+        for column, source in [("Availability", "Current Availability"), ("OnOrder", "Quantity on Order"),
+                               ("Backorder", "Quantity on Backorder"), ("Arrival Dates", "Arrival Dates")]:
+            snapshot.loc[rows, f"{column}_{suffix}"] = pns.map(results[source])
+        snapshot.loc[rows, f"Availability_{suffix}"] = snapshot.loc[rows, f"Availability_{suffix}"].fillna(0)
+        snapshot.loc[rows, f"Next_Arrival_{suffix}"] = pns.map(next_arrival)
+
+        has_dates = snapshot.loc[rows, f"Arrival Dates_{suffix}"].notna() | \
+                    snapshot.loc[rows, f"Next_Arrival_{suffix}"].notna()
+        snapshot.loc[rows, f"Available_{suffix}"] = is_available(
+            True, snapshot.loc[rows, f"Availability_{suffix}"], has_dates
+        )
+        touched |= rows
+
+    update_totals(snapshot, touched)
+    return touched
+
+
+def update_totals(snapshot, rows):
+    """Recompute Total_Availability, Available_Count and Availability_Status of the masked rows, in place."""
+    from main import SUFFIXES, availability_status
+
+    suffixes = list(SUFFIXES.values())
+    available = snapshot.loc[rows, [f"Available_{s}" for s in suffixes]].astype(bool)
+    snapshot.loc[rows, "Total_Availability"] = snapshot.loc[rows, [f"Availability_{s}" for s in suffixes]].sum(axis=1)
+    snapshot.loc[rows, "Available_Count"] = available.sum(axis=1).astype("int16")
+    snapshot.loc[rows, "Availability_Status"] = availability_status(available)
+
+
+def refresh_hot_set(log_callback=None, history_dir=None, cache_ttl=None):
+    """
+    Re-query the hot set and patch the newest snapshot, returns (df_compare, both_available),
+    or None when the history store has no full run to start from.
+    """
+    log_callback = log_callback or (lambda msg: None)
+
+    from main import REGIONS, SUFFIXES, open_stock_cache
+    from stock_status import get_availability_for_warehouses
+
+    snapshots = history.list_snapshots(history_dir)
+    if not snapshots:
+        return None
+    snapshot = history.load_snapshot(snapshots[-1]).drop(columns="Run_At")
+    changes = history.diff_snapshots(history.load_snapshot(snapshots[-2]), snapshot) if len(snapshots) > 1 else None
+    log_callback(f"Refreshing {snapshots[-1]}")
+    if "Available_Count" not in snapshot:
+        # snapshots from before the k-of-N status
+        available = snapshot[[f"Available_{s}" for s in SUFFIXES.values()]].astype(bool)
+        snapshot.insert(snapshot.columns.get_loc("Availability_Status"), "Available_Count", available.sum(axis=1).astype("int16"))
+
+    parts = hot_parts(snapshot, changes)
+    jobs = {}
+    for entry in REGIONS:
+        region_parts = parts.get(entry["suffix"], [])
+        log_callback(f"{entry['region']}: {len(region_parts)} hot part numbers")
+        jobs[entry["warehouse"]] = (region_parts, entry["inforid"])
+
+    # hot parts are queried because they may have moved: cached answers are not reused
+    cache = open_stock_cache(cache_ttl, log_callback)
+    frames = get_availability_for_warehouses(jobs, log_callback=log_callback, cache=cache, refresh=True)
+    if cache is not None:
+        cache.close()
+
+    touched = patch_snapshot(snapshot, {entry["region"]: frames[entry["warehouse"]] for entry in REGIONS})
+    log_callback(f"Patched {int(touched.sum())} of {len(snapshot)} report rows")
+
+    # the report keeps the Arrival Dates{i} columns of a full run
+    snapshot = history.unfold_snapshot(snapshot)
+    both_available = snapshot[snapshot["Available_Count"] == len(SUFFIXES)].copy()
+    return snapshot, both_available
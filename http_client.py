@@ -0,0 +1,293 @@
+import email.utils
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from metrics import get_metrics
+
+
+# ================= LATENCY STATS =================
+
+# upper bounds (ms) of the latency histogram buckets; slower requests land in the last, open bucket
+HISTOGRAM_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+HISTOGRAM_LABELS = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+
+
+def histogram_label(seconds):
+    """Histogram bucket of a latency, e.g. "<=50ms" or ">10000ms"."""
+    ms = seconds * 1000
+    return HISTOGRAM_LABELS[next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if ms <= bound),
+                                 len(HISTOGRAM_BUCKETS_MS))]
+
+
+class LatencyStats:
+    """
+    Per-request latency grouped by kind ("catalog", "stockstatus", ...). Count, mean, max and the
+    histogram cover every request; p50/p95 come from the latest `window` samples, so a long-lived
+    process (the service) keeps a fixed amount of them.
+    """
+
+    def __init__(self, window=None):
+        self.lock = threading.Lock()
+        window = config.HTTP_LATENCY_WINDOW if window is None else window
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.counts = defaultdict(int)
+        self.totals = defaultdict(float)
+        self.slowest = defaultdict(float)
+        self.histograms = defaultdict(lambda: dict.fromkeys(HISTOGRAM_LABELS, 0))
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.retries = defaultdict(int)
+
+    def record(self, kind, seconds, status):
+        with self.lock:
+            self.samples[kind].append(seconds)
+            self.counts[kind] += 1
+            self.totals[kind] += seconds
+            self.slowest[kind] = max(self.slowest[kind], seconds)
+            self.histograms[kind][histogram_label(seconds)] += 1
+            self.statuses[kind][status] += 1
+
+    def record_retry(self, kind):
+        with self.lock:
+            self.retries[kind] += 1
+
+    def summary(self):
+        with self.lock:
+            out = {}
+            for kind, samples in self.samples.items():
+                ordered = sorted(samples)
+                out[kind] = {
+                    "count": self.counts[kind],
+                    "retries": self.retries[kind],
+                    "mean": self.totals[kind] / self.counts[kind],
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    "max": self.slowest[kind],
+                    "statuses": dict(self.statuses[kind]),
+                    "histogram": dict(self.histograms[kind]),
+                }
+            return out
+
+    def format_summary(self):
+        lines = []
+        for kind, s in self.summary().items():
+            lines.append(
+                f"{kind}: {s['count']} requests, {s['retries']} retries, "
+                f"mean {s['mean'] * 1000:.0f}ms, p50 {s['p50'] * 1000:.0f}ms, "
+                f"p95 {s['p95'] * 1000:.0f}ms, max {s['max'] * 1000:.0f}ms, statuses {s['statuses']}"
+            )
+        return "\n".join(lines)
+
+
+# ================= ADAPTIVE LIMIT =================
+
+def retry_after_seconds(response, limit=None):
+    """Seconds asked for by a Retry-After header (delay or HTTP date), None if there is none."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    limit = config.HTTP_RETRY_AFTER_MAX if limit is None else limit
+    return min(max(seconds, 0.0), limit)
+
+
+def is_throttle(status):
+    """429, 5xx and connection errors / timeouts (recorded by exception name) mean: slow down."""
+    return isinstance(status, str) or status == 429 or status >= 500
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on the requests in flight, shared by every thread using the client.
+
+    Every window of `limit` clean responses raises the limit by one. A 429, a 5xx, a connection
+    error, or a smoothed latency above latency_factor x the best smoothed latency of that kind
+    halves it; responses to requests sent before the last cut don't cut again, so one burst of
+    failures counts once. Retry-After holds back every request until it has passed.
+    """
+
+    def __init__(self, start, minimum, maximum, latency_factor=None, log_callback=None):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(start, self.minimum), self.maximum)
+        self.peak = self.limit
+        self.latency_factor = latency_factor or config.HTTP_LIMIT_LATENCY_FACTOR
+        self.log_callback = log_callback or (lambda msg: None)
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.clean = 0                      # clean responses since the last change of limit
+        self.cut_at = 0.0                   # monotonic time of the last decrease
+        self.paused_until = 0.0             # monotonic time Retry-After holds requests until
+        self.smoothed = {}                  # kind -> latency EWMA
+        self.best = {}                      # kind -> lowest EWMA seen
+        self.samples = defaultdict(int)     # kind -> responses seen
+
+    def acquire(self):
+        """Wait for a free slot, returns the send time to hand back to release()."""
+        with self.condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.in_flight < self.limit:
+                    break
+                self.condition.wait(pause if pause > 0 else None)
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, kind, sent, seconds, status, retry_after=None):
+        with self.condition:
+            self.in_flight -= 1
+            reason = None
+            if is_throttle(status):
+                reason = status if isinstance(status, str) else ("429" if status == 429 else "5xx")
+            else:
+                reason = self._latency_signal(kind, seconds)
+
+            if retry_after:
+                until = time.monotonic() + retry_after
+                if until > self.paused_until:
+                    self.paused_until = until
+                    get_metrics().count("throttle retry-after")
+                    self.log_callback(f"Throttled: {kind} answered {status}, pausing requests {retry_after:.1f}s")
+
+            if reason is None:
+                self.clean += 1
+                if self.clean >= self.limit and self.limit < self.maximum:
+                    self._set_limit(self.limit + 1, f"{self.clean} clean responses")
+            elif sent > self.cut_at:
+                get_metrics().count(f"throttle {reason}")
+                self.cut_at = time.monotonic()
+                self._set_limit(max(self.minimum, self.limit // 2), f"{kind} {reason}")
+            self.condition.notify_all()
+
+    def _latency_signal(self, kind, seconds):
+        self.samples[kind] += 1
+        smoothed = self.smoothed.get(kind, seconds) * 0.8 + seconds * 0.2
+        self.smoothed[kind] = smoothed
+        self.best[kind] = min(self.best.get(kind, smoothed), smoothed)
+        # a handful of samples before the baseline means anything
+        if self.samples[kind] > 10 and smoothed > self.best[kind] * self.latency_factor:
+            return "latency"
+        return None
+
+    def _set_limit(self, limit, why):
+        self.clean = 0
+        if limit == self.limit:
+            return
+        self.log_callback(f"Concurrency limit {self.limit} -> {limit} ({why})")
+        self.limit = limit
+        self.peak = max(self.peak, limit)
+
+    def format_summary(self):
+        return f"concurrency limit {self.limit} (peak {self.peak}, range {self.minimum}-{self.maximum})"
+
+
+# ================= CLIENT =================
+
+# connection failures retried like a 5xx: a dropped connection mid-body fails as a chunked or decoding error
+RETRYABLE_ERRORS = (
+    requests.ConnectionError, requests.Timeout,
+    requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError,
+)
+
+class WilsonartClient:
+    """
+    Pooled keep-alive session shared by the catalog crawl and the stock-status queries.
+    Connection errors, timeouts, 429 and 5xx responses are retried with jittered exponential backoff,
+    and every request waits for a slot of the shared AdaptiveLimiter.
+    """
+
+    def __init__(self, pool_size=None, timeout=None, max_retries=None, backoff=None, backoff_max=None,
+                 limiter=None):
+        self.timeout = timeout or (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
+        self.max_retries = config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = config.HTTP_BACKOFF if backoff is None else backoff
+        self.backoff_max = config.HTTP_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.stats = LatencyStats()
+
+        pool_size = pool_size or config.HTTP_POOL_SIZE
+        if limiter is None:
+            if config.HTTP_ADAPTIVE:
+                limiter = AdaptiveLimiter(config.HTTP_LIMIT_START, config.HTTP_LIMIT_MIN, config.HTTP_LIMIT_MAX)
+            else:
+                limiter = AdaptiveLimiter(pool_size, pool_size, pool_size)
+        self.limiter = limiter
+
+        self.session = requests.Session()
+        # retries are handled below so they can be jittered and counted
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+    def _sleep_before_retry(self, attempt):
+        delay = min(self.backoff_max, self.backoff * (2 ** attempt))
+        time.sleep(delay * random.uniform(0.5, 1.5))
+
+    def request(self, method, url, kind="other", **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            sent = self.limiter.acquire()
+            start = time.perf_counter()
+            response, retry_after = None, None
+            try:
+                response = self.session.request(method, url, **kwargs)
+                status, retry_after = response.status_code, retry_after_seconds(response)
+            except RETRYABLE_ERRORS as e:
+                status = type(e).__name__
+                if last_attempt:
+                    raise
+            except BaseException as e:
+                # anything else is not retried, but its slot is still handed back
+                status = type(e).__name__
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                self.stats.record(kind, seconds, status)
+                self.limiter.release(kind, sent, seconds, status, retry_after)
+
+            if response is not None and (not is_throttle(response.status_code) or last_attempt):
+                return response
+
+            self.stats.record_retry(kind)
+            self._sleep_before_retry(attempt)
+
+    def get(self, url, kind="other", **kwargs):
+        return self.request("GET", url, kind=kind, **kwargs)
+
+    def post(self, url, kind="other", **kwargs):
+        return self.request("POST", url, kind=kind, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(log_callback=None):
+    """
+    The process-wide shared client, created on first use.
+    log_callback, if given, receives its concurrency-limit and throttle messages from then on.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WilsonartClient()
+        if log_callback is not None:
+            _client.limiter.log_callback = log_callback
+        return _client
@@ -1,453 +1,399 @@
-def run_scraper(log_callback=None):
+import config
+from metrics import get_metrics, timed
+
+# ================= CONFIG =================
+
+# distribution centers, from warehouses.json (WILSONART_WAREHOUSES_FILE)
+REGIONS = config.load_regions()
+
+# region -> catalog zipcode
+ZIPCODES = {entry["region"]: entry["zipcode"] for entry in REGIONS}
+
+# region -> (warehouse code, inforid) for the stockstatus endpoint
+WAREHOUSES = {entry["region"]: (entry["warehouse"], entry["inforid"]) for entry in REGIONS}
+
+# region -> column suffix in the report
+SUFFIXES = {entry["region"]: entry["suffix"] for entry in REGIONS}
+
+# region -> name in Availability_Status ("Seattle Only")
+LABELS = {entry["region"]: entry["label"] for entry in REGIONS}
+
+# low-cardinality catalog columns kept as pandas categoricals
+CATEGORY_COLUMNS = ["Grade", "FinishID", "Finish", "ProductType"]
+
+columns = [
+    "DesignID",
+    "DesignName",
+    "VendPartNumber",
+    "Grade",
+    "FinishID",
+    "Finish",
+    "SizeDescription"
+]
+
+
+# ================= SCRAPING =================
+
+def open_page_cache(catalog_freshness=None, log_callback=None):
+    """CatalogPageCache for this crawl, or None when CATALOG_CACHE_PATH is empty."""
     log_callback = log_callback or (lambda msg: None)
 
+    from catalog_cache import CatalogPageCache
+
+    if not config.CATALOG_CACHE_PATH:
+        return None
+    cache = CatalogPageCache(freshness=catalog_freshness)
+    if cache.freshness > 0:
+        log_callback(f"Catalog pages checked in the last {cache.freshness:g}s are reused without a request")
+    else:
+        log_callback("Every cached catalog page is revalidated with a conditional request")
+    return cache
+
+
+def crawl(log_callback=None, state=None, catalog_freshness=None):
+    """Raw catalog rows per region, every (region, page) fetched concurrently."""
+    from catalog import crawl_catalog
+
+    page_cache = open_page_cache(catalog_freshness, log_callback)
+    try:
+        return crawl_catalog(ZIPCODES, log_callback=log_callback, state=state, page_cache=page_cache)
+    finally:
+        if page_cache is not None:
+            page_cache.close()
+
+
+@timed("clean", rows=len)
+def clean_catalog(region_rows, log_callback=None):
+    """Cleaned, de-duplicated catalog of every region in one long frame with a Region column."""
+    log_callback = log_callback or (lambda msg: None)
 
     import pandas as pd
-    import numpy as np
-    import time
-    import requests
-    #============================
-    from bs4 import BeautifulSoup
-    import json
-    import re
-    import streamlit as st
-    import os
-    
-    from datetime import datetime
-    # ================= CONFIG =================
-
-
-    
-    NUM_PAGES = 21  # number of pages to scrape
-    
-    ZIPCODES = {
-        "LA": "90058",       # Santa Fe Springs
-        "SEATTLE": "98001"   # Seattle
-    }
-    
-    URL_TEMPLATE = (
-        "https://business.wilsonart.com/en/catalog/category/view/"
-        "s/hpl/id/8/?zipcode={zipcode}&p={page}"
-    )
-    
-    columns = [
-        "DesignID",
-        "DesignName",
-        "VendPartNumber",
-        "Grade",
-        "FinishID",
-        "Finish",
-        "SizeDescription"
-    ]
-    
-    # ================= SCRAPING =================
-    
-    dfs = {}
+    from partnumbers import decode as decode_partnumbers
 
+    frames = []
     for region, zipcode in ZIPCODES.items():
-        log_callback(f"\n===== Scraping {region} ({zipcode}) =====")
-    
-        data = []
-    
-        for page in range(1, NUM_PAGES + 1):
-            url = URL_TEMPLATE.format(zipcode=zipcode, page=page)
-            log_callback(f"{region}: Scraping page {page}")
-    
-            response = requests.get(url, timeout=30)
-            soup = BeautifulSoup(response.text, "html.parser")
-    
-            forms = soup.find_all("form", {"data-role": "tocart-form"})
-    
-            for form in forms:
-                # ---------------- Design ID / Name ----------------
-                rec_heading = form.find("div", class_="rec_heading")
-                if rec_heading:
-                    lines = rec_heading.get_text(separator="\n").split("\n")
-                    design_id = lines[0].strip() if len(lines) > 0 else ""
-                    design_name = lines[1].strip() if len(lines) > 1 else ""
-                else:
-                    design_id = ""
-                    design_name = ""
-    
-                # ---------------- Prototypes JSON ----------------
-                prototypes_json = None
-                for script in form.find_all("script", text=True):
-                    if script.string:
-                        match = re.search(
-                            r"\$scope\.prototypes\s*=\s*(\[.*?\]);",
-                            script.string,
-                            re.DOTALL
-                        )
-                        if match:
-                            prototypes_json = match.group(1)
-                            break
-    
-                if not prototypes_json:
-                    continue
-    
-                prototypes = json.loads(prototypes_json)
-
-                # -------------------Iterate -----------------
-
-                for product_type in prototypes:
-
-                    # normalize to iterable of dicts
-                    product_types = product_type if isinstance(product_type, list) else [product_type]
-                
-                    for pt in product_types:
-                        grade = pt.get("name", "")
-                
-                        for finish in pt.get("finishes", []):
-                            finish_name = finish.get("name", "")
-                            for size in finish.get("sizes", []):
-                                size_desc = size.get("name", "")
-                                for part in size.get("partnumber", []):
-                                    vend_part_number = str(part.get("name") or "")
-                
-                                    design_id_match = re.match(r"(\d{4,6})", vend_part_number)
-                                    design_id = design_id_match.group(1) if design_id_match else ""
-                
-                                    data.append([
-                                        design_id,
-                                        design_name,
-                                        vend_part_number,
-                                        grade,
-                                        "",
-                                        finish_name,
-                                        size_desc
-                                    ])
-
-
-               
-    
-            #     # ---------------- Iterate ----------------
-            #     for product_type in prototypes:
-            #         grade = product_type.get("name", "")
-            #         for finish in product_type.get("finishes", []):
-            #             finish_name = finish.get("name", "")
-            #             for size in finish.get("sizes", []):
-            #                 size_desc = size.get("name", "")
-            #                 for part in size.get("partnumber", []):
-            #                     vend_part_number = str(part.get("name") or "")
-    
-            #                     design_id_match = re.match(r"(\d{4,6})", vend_part_number)
-            #                     design_id = design_id_match.group(1) if design_id_match else ""
-    
-            #                     data.append([
-            #                         design_id,
-            #                         design_name,
-            #                         vend_part_number,
-            #                         grade,
-            #                         "",
-            #                         finish_name,
-            #                         size_desc
-            #                     ])
-    
-            # -------- Deley--------
-            time.sleep(0.3)
-    
-        # ====================================================================
-    
-        df = pd.DataFrame(data, columns=columns)
-    
-        # Clean strings
-        #df = df.applymap(lambda x: x.strip().upper() if isinstance(x, str) else x)
-        df = df.apply(lambda col: col.astype(str).str.strip().str.upper())
-
-
-    
-        # Split Grade / ProductType
-        df['ProductType'] = df['Grade'].str.split(' ').str[1]
-        df['Grade'] = df['Grade'].str.split(' ').str[0]
-    
-        # Split FinishID / Finish
-        df['FinishID'] = df['Finish'].str.split(' ').str[0]
-        df['Finish'] = df['Finish'].str.split(' ').str[1:].str.join(' ')
-    
-        dfs[region] = df
-        log_callback(f"{region} completed - {df.shape[0]} rows")
-    
-    # ================= FINAL =================
-    
-    df_main_la = dfs["LA"]
-    df_main_sa = dfs["SEATTLE"]
-    
+        log_callback(f"\n===== Scraped {region} ({zipcode}) =====")
+        frames.append(pd.DataFrame(region_rows[region], columns=columns))
+        log_callback(f"{region} completed - {len(region_rows[region])} rows")
+
+    df = pd.concat(frames, keys=list(ZIPCODES), names=["Region"]).reset_index(level="Region")
+    df = df.reset_index(drop=True)
+
     log_callback("\nScraping complete!")
-    log_callback("LA shape: " + str(df_main_la.shape))
-    log_callback("Seattle shape:"+ str(df_main_sa.shape))
-    #===============================================================================cleaning===================================
-    ##2---------------------------------dnt----------------------------------------------
-    
-    #=====================================================================================================================
-    df_main_la['FinishID'] = np.where(
-        df_main_la['FinishID'].isna(),
-        df_main_la['VendPartNumber'].astype(str).str.split('K').str[1].str[:2],
-        df_main_la['FinishID']
-    )
-    
-    df_main_la['Finish'] = df_main_la['Finish'].fillna('')
-    #==============================================================
-    df_main_sa['FinishID'] = np.where(
-        df_main_sa['FinishID'].isna(),
-        df_main_sa['VendPartNumber'].astype(str).str.split('K').str[1].str[:2],
-        df_main_sa['FinishID']
-    )
-    
-    df_main_la['Finish'] = df_main_la['Finish'].fillna('')
-    #==============================================================
-    df_main_sa['DesignID'] = np.where(
-        df_main_sa['DesignID'] == '',
-        df_main_sa['VendPartNumber'].str[:4],
-        df_main_sa['DesignID']
+
+    # Clean strings
+    df[columns] = df[columns].apply(lambda col: col.astype(str).str.strip().str.upper())
+
+    # Split Grade / ProductType
+    grade = df['Grade'].str.split(' ')
+    df['ProductType'] = grade.str[1]
+    df['Grade'] = grade.str[0]
+
+    # Split FinishID / Finish
+    finish = df['Finish'].str.split(' ')
+    df['FinishID'] = finish.str[0]
+    df['Finish'] = finish.str[1:].str.join(' ')
+
+    df['Finish'] = df['Finish'].fillna('')
+    df = df.drop_duplicates(ignore_index=True)
+
+    # DesignID, FinishID backfill, SizeDescription and Size decoded from the part numbers in one pass
+    decoded = decode_partnumbers(df)
+    df[decoded.columns] = decoded
+    issues = decoded['Decode_Issue'].value_counts()
+    for issue, rows in issues[issues > 0].items():
+        get_metrics().count(f"decode {issue}", int(rows))
+        log_callback(f"{rows} part numbers with {issue}")
+
+    # a handful of distinct values each, stored once per frame instead of once per row
+    df[CATEGORY_COLUMNS] = df[CATEGORY_COLUMNS].astype('category')
+    for region, rows in df.groupby('Region', sort=False).size().items():
+        log_callback(f"{region} shape: {(rows, df.shape[1] - 1)}")
+
+    return df
+
+
+#========================================================part II==============================================================
+
+def open_stock_cache(cache_ttl=None, log_callback=None):
+    """StockCache for this run, or None when cache_ttl is 0."""
+    log_callback = log_callback or (lambda msg: None)
+
+    import config
+    from stock_cache import StockCache
+
+    cache_ttl = config.STOCK_CACHE_TTL if cache_ttl is None else cache_ttl
+    if cache_ttl <= 0:
+        return None
+    cache = StockCache(ttl=cache_ttl)
+    log_callback(f"Evicted {cache.evict_stale()} stale stock-status cache entries")
+    return cache
+
+
+def get_stock_answers(catalog, log_callback=None, refresh=False, cache_ttl=None, state=None, shard=None,
+                      dead_letters=None):
+    """
+    warehouse code -> {partnumber: raw answer} for the catalog part numbers.
+    shard=(index, count) only queries that stable hash-partition of the part numbers.
+    Lookups that fail every retry are recorded in dead_letters (deadletter.DeadLetters) with their catalog rows.
+    """
+    log_callback = log_callback or (lambda msg: None)
+
+    from sharding import in_shard
+
+    #process the whse id's -- every warehouse shares one event loop and one request budget
+    from stock_status import get_answers_for_warehouses
+
+    cache = open_stock_cache(cache_ttl, log_callback)
+
+    jobs = {}
+    for region, (warehouse, inforid) in WAREHOUSES.items():
+        partnumbers = region_partnumbers(catalog, region)
+        if shard is not None:
+            partnumbers = [pn for pn in partnumbers if in_shard(pn, *shard)]
+        jobs[warehouse] = (partnumbers, inforid)
+
+    answers = get_answers_for_warehouses(
+        jobs, log_callback=log_callback, cache=cache, refresh=refresh, state=state, dead_letters=dead_letters
     )
-    df_main_la['DesignID'] = np.where(
-        df_main_la['DesignID'] == '',
-        df_main_la['VendPartNumber'].str[:4],
-        df_main_la['DesignID']
+    if cache is not None:
+        cache.close()
+    if dead_letters is not None:
+        dead_letters.attach_catalog(catalog)
+        dead_letters.save()
+    return answers
+
+
+def get_stock(catalog, log_callback=None, refresh=False, cache_ttl=None, state=None, shard=None, dead_letters=None):
+    """region -> stock-status frame for the catalog part numbers (see get_stock_answers)."""
+    return stock_frames(
+        catalog, get_stock_answers(catalog, log_callback, refresh, cache_ttl, state, shard, dead_letters)
     )
-    
-    #======================================
-    
-    df_main_sa=df_main_sa.drop_duplicates()
-    df_main_la=df_main_la.drop_duplicates()
-    
-    sa = df_main_sa.copy()
-    la = df_main_la.copy()
-    #================================================================================================================
-    
-    #========================================================part II==============================================================
-    
-    
-    
-    #process the whse id's
-    def get_vendor_availability(partnumbers, warehouse, inforid):
-    
-        API_URL = "https://business.wilsonart.com/en/webservices/index/stockstatus/"
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-            "X-Requested-With": "XMLHttpRequest",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36",
-        }
-    
-        results = []
-    
-        for index, pn in enumerate(partnumbers, start=1):
-            payload = {
-                "partnumber": pn,
-                "warehouse": warehouse,
-                "inforid": inforid
-            }
-    
-            try:
-                response = requests.post(API_URL, data=payload, headers=headers)
-    
-                if response.status_code == 200:
-                    fields = response.text.strip().split("~")
-                    current_avail = fields[0]
-                    on_order = fields[1]
-                    backorder = fields[2]
-                    arrival_dates = fields[3] if len(fields) > 3 else "None"
-    
-                    row = {
-                        "Vendor Product": pn,
-                        "Current Availability": current_avail,
-                        "Quantity on Order": on_order,
-                        "Quantity on Backorder": backorder,
-                        "Arrival Dates": arrival_dates
-                    }
-                    results.append(row)
-    
-                else:
-                    log_callback(f"Failed for {pn}, status code: {response.status_code}")
-    
-            except Exception as e:
-                log_callback(f"Error for {pn}: {e}")
-    
-            log_callback(f"Processed {warehouse} ->  {index}/{len(partnumbers)}: {pn}")
-            time.sleep(0.3)
-    
-        # DataFrame from the scrapes
-        df_results = pd.DataFrame(results)
-    
-        # split  dates 
-        df_dates = df_results['Arrival Dates'].str.split(',', expand=True)
-        df_dates = df_dates.apply(pd.to_datetime, errors='coerce')
-        df_dates.columns = [f'Arrival Dates{i+1}' for i in range(df_dates.shape[1])]
-    
-        # combine 
-        df_results = pd.concat([df_results, df_dates], axis=1)
-        
-        return df_results
-    #======================================================================
-    #**************************************************************************
-    #8888888888888888888888888888888888888888888888888888888888888888888888888
-    #======================================================================
-    partnumbers_sa = sa["VendPartNumber"].tolist()
-    warehouse_sa = get_vendor_availability(partnumbers_sa, warehouse="SEA", inforid=109283)
-    
-    partnumbers_la = la["VendPartNumber"].tolist()
-    warehouse_la = get_vendor_availability(partnumbers_la, warehouse="LA", inforid=109284)
-    
+
+
+def region_partnumbers(catalog, region):
+    """Unique part numbers of one region, in catalog order."""
+    return list(dict.fromkeys(catalog.loc[catalog['Region'] == region, 'VendPartNumber']))
+
+
+@timed("merge")
+def stock_frames(catalog, answers):
+    """region -> stock-status frame from warehouse code -> {partnumber: raw answer}."""
+    from stock_status import results_frame
+
+    return {
+        region: results_frame(region_partnumbers(catalog, region), answers.get(warehouse, {}))
+        for region, (warehouse, _) in WAREHOUSES.items()
+    }
+
+
+@timed("merge", rows=lambda result: len(result[0]))
+def build_report(catalog, stock, log_callback=None):
+    """
+    Merge the long catalog frame and region -> stock-status frame into (report, arrivals):
+    one row per product with a column per region for everything that differs between warehouses,
+    and the long arrival-date table (Region, VendPartNumber, Seq, Arrival Date).
+    export_frames() turns both into the wide (df_compare, both_available) of the Excel report.
+    """
+    log_callback = log_callback or (lambda msg: None)
+
+    import pandas as pd
+    import numpy as np
+    from stock_status import arrival_dates
+
     #======================================================================================================
-    warehouse_sa.rename(columns={'Vendor Product':'VendPartNumber'}, inplace=True)
-    df_results_sa = warehouse_sa.merge(sa, on='VendPartNumber', how='left')
-    duplicates_all_sa_new1 = df_results_sa[df_results_sa.duplicated(keep=False)]
-    
-    warehouse_la.rename(columns={'Vendor Product':'VendPartNumber'}, inplace=True)
-    df_results_la = warehouse_la.merge(la, on='VendPartNumber', how='left')
-    duplicates_all_la_new1 = df_results_la[df_results_la.duplicated(keep=False)]
-    
-    # Dynamically select arrival date columns
-    sa_arrival_cols = [c for c in df_results_sa.columns if c.startswith("Arrival Dates")]
-    la_arrival_cols = [c for c in df_results_la.columns if c.startswith("Arrival Dates")]
-    
-    # Filter results including all dynamic arrival columns
-    df_results_sa_filtered = df_results_sa[['VendPartNumber', 'DesignID', 'DesignName', 'Grade', 'FinishID', 'Finish', 
-                                            'SizeDescription', 'ProductType', 'Current Availability', 'Quantity on Order', 
-                                            'Quantity on Backorder'] + sa_arrival_cols]
-    
-    df_results_la_filtered = df_results_la[['VendPartNumber', 'DesignID', 'DesignName', 'Grade', 'FinishID', 'Finish', 
-                                            'SizeDescription', 'ProductType', 'Current Availability', 'Quantity on Order', 
-                                            'Quantity on Backorder'] + la_arrival_cols]
-    
-    #=====================================
-    
-    # compare with last 2 chars of FinishID in DesignID
-    for df_filtered in [df_results_sa_filtered, df_results_la_filtered]:
-        df_filtered['FinishID_str'] = df_filtered['FinishID'].astype(str).str.zfill(2)
-        condition = (df_filtered['DesignID'].str.len() == 6) & \
-                    (df_filtered['DesignID'].str[-2:] == df_filtered['FinishID_str'])
-        df_filtered.loc[condition, 'DesignID'] = df_filtered.loc[condition, 'DesignID'].str[:-2]
-        df_filtered.drop('FinishID_str', axis=1, inplace=True)
-    
-    #========================================================================
-    # Mapping sizes
-    size_mapping_df = pd.DataFrame({
-        "SizeDescription": [
-            "48 X 96", "60 X 144", "60 X 120", "48 X 120", "60 X 96",
-            "48 X 144", "30 X 144", "36 X 96", "30 X 120", "36 X 144",
-            "30 X 96", "36 X 120", "36 X 84", "48 X 84", "60 X 84",
-            "60 X 72", "60 X 60", "48 X 48", "48 X 72", "30 X 72",
-            "30 X 48", "48 X 60", "30 X 60", "36 X 72", "36 X 48",
-            "60 X 48", "36 X 60", "24 X 48", "24 X 72", "24 X 60",
-            "24 X 96", "24 X 120", "24 X 144", "49 X 97", "30 X 84",
-            "36 X 108"
-        ],
-        "Size": [
-            "C1", "D3", "D2", "C2", "D1",
-            "C3", "A3", "B1", "A2", "B3",
-            "A1", "B2", "B7", "C7", "D7",
-            "D6", "D5", "C4", "C6", "A6",
-            "A4", "C5", "A5", "B6", "B4",
-            "D4", "B5", "E4", "E6", "E5",
-            "E1", "E2", "E3", "F1", "A7",
-            "B9"
-        ]
-    })
-    
-    # Clean up size descriptions
-    for df_filtered in [df_results_sa_filtered, df_results_la_filtered]:
-        df_filtered['SizeDescription'] = df_filtered['SizeDescription'].str.replace('X', ' X ', regex=False)\
-                                                                     .str.replace(r'\s+', ' ', regex=True)\
-                                                                     .str.strip()
-        df_filtered['Size'] = df_filtered['SizeDescription'].map(size_mapping_df.set_index('SizeDescription')['Size'])
-    
+    # every region's stock status in one long frame, joined to that region's catalog rows
+    results = pd.concat(
+        [frame.assign(Region=region) for region, frame in stock.items()], ignore_index=True
+    ).rename(columns={'Vendor Product': 'VendPartNumber'})
+    arrivals = arrival_dates(results, keys=['Region', 'VendPartNumber'])
+    df = results.merge(catalog, on=['Region', 'VendPartNumber'], how='left')
+
+    df = df[['Region', 'VendPartNumber', 'DesignID', 'DesignName', 'Grade', 'FinishID', 'Finish',
+             'SizeDescription', 'Size', 'ProductType', 'Current Availability', 'Quantity on Order',
+             'Quantity on Backorder', 'Arrival Dates']]
+
     #==============================creating/combining part number from multiple columns =======================================
-    for df_filtered in [df_results_sa_filtered, df_results_la_filtered]:
-        df_filtered['PartNumber'] = (df_filtered['DesignID'].astype(str) + '-' +
-                                     df_filtered['FinishID'].astype(str) + '-' +
-                                     df_filtered['Grade'].astype(str) +
-                                     df_filtered['Size'].astype(str))
-    
-    #==================================================================
-    
-    #========================================================last process combining both sa / la 
-    # --- 1- Rename main quantity columns for clarity ---
-    la = df_results_la_filtered.rename(columns={
-        "Current Availability": "Availability_LA",
-        "Quantity on Order": "OnOrder_LA",
-        "Quantity on Backorder": "Backorder_LA"
-    })
-    
-    sa = df_results_sa_filtered.rename(columns={
-        "Current Availability": "Availability_SA",
-        "Quantity on Order": "OnOrder_SA",
-        "Quantity on Backorder": "Backorder_SA"
+    df['PartNumber'] = (df['DesignID'].astype(str) + '-' +
+                        df['FinishID'].astype(str) + '-' +
+                        df['Grade'].astype(str) +
+                        df['Size'].astype(str))
+
+    df = df.rename(columns={
+        "Current Availability": "Availability",
+        "Quantity on Order": "OnOrder",
+        "Quantity on Backorder": "Backorder"
     })
-    
-    # --- 2- Dynamically rename arrival date columns ---
-    for col in [c for c in la.columns if c.startswith("Arrival Dates")]:
-        la.rename(columns={col: f"{col}_LA"}, inplace=True)
-    for col in [c for c in sa.columns if c.startswith("Arrival Dates")]:
-        sa.rename(columns={col: f"{col}_SA"}, inplace=True)
-    
-    # --- 3- Merge on stable product keys ---
-    merge_cols = ["VendPartNumber","PartNumber", "DesignID", "FinishID", "Grade"]
-    
-    df_compare = la.merge(sa, on=merge_cols, how="outer", indicator=True, suffixes=("_LA", "_SA"))
-    
-    # --- 4- Identify product presence in each warehouse ---
-    df_compare["In_LA"] = df_compare["_merge"].isin(["left_only", "both"])
-    df_compare["In_SA"] = df_compare["_merge"].isin(["right_only", "both"])
-    
-    # --- 5- Ensure numeric availability columns ---
-    for col in ["Availability_LA", "Availability_SA"]:
-        df_compare[col] = pd.to_numeric(df_compare[col], errors='coerce').fillna(0)
-    
-    # --- 6- Dynamically select arrival date columns ---
-    la_date_cols = [c for c in df_compare.columns if c.startswith("Arrival Dates") and c.endswith("_LA")]
-    sa_date_cols = [c for c in df_compare.columns if c.startswith("Arrival Dates") and c.endswith("_SA")]
-    
-    # --- 7- Compute availability: quantity > 0 OR any arrival date exists ---
-    df_compare["Available_LA"] = df_compare["In_LA"] & ((df_compare["Availability_LA"] > 0) | df_compare[la_date_cols].notna().any(axis=1))
-    df_compare["Available_SA"] = df_compare["In_SA"] & ((df_compare["Availability_SA"] > 0) | df_compare[sa_date_cols].notna().any(axis=1))
-    
-    # --- 8- Compute total availability ---
-    df_compare["Total_Availability"] = df_compare["Availability_LA"] + df_compare["Availability_SA"]
-    
-    # --- 9- Human-readable availability status ---
-    df_compare["Availability_Status"] = np.select(
-        [
-            df_compare["Available_LA"] & df_compare["Available_SA"],
-            df_compare["Available_LA"] & (~df_compare["Available_SA"]),
-            (~df_compare["Available_LA"]) & df_compare["Available_SA"]
-        ],
-        ["Available in Both", "LA Only", "Seattle Only"],
-        default="Not Available"
-    )
-    
-    # --- 10 Create filtered subsets for export ---
-    both_available = df_compare[df_compare["Available_LA"] & df_compare["Available_SA"]].copy()
-    la_only = df_compare[df_compare["Available_LA"] & (~df_compare["Available_SA"])].copy()
-    sa_only = df_compare[(~df_compare["Available_LA"]) & df_compare["Available_SA"]].copy()
-    
-    for df in (both_available, la_only, sa_only):
-        df.drop("_merge", axis=1, inplace=True)
-    
+
+    #========================================================last process combining the regions
+    # --- 1- One row per product, one column per region: pivot on the stable product keys ---
+    merge_cols = ["VendPartNumber", "PartNumber", "DesignID", "FinishID", "Grade"]
+    value_cols = ["DesignName", "Finish", "SizeDescription", "ProductType", "Size",
+                  "Availability", "OnOrder", "Backorder", "Arrival Dates", "In"]
+
+    # a product listed several times in a region pairs up with the other region's rows in order
+    df["In"] = True
+    df["Occurrence"] = df.groupby(["Region"] + merge_cols, dropna=False, observed=True).cumcount()
+    df_compare = df.set_index(merge_cols + ["Occurrence", "Region"])[value_cols].unstack("Region")
+    df_compare.columns = [f"{col}_{SUFFIXES[region]}" for col, region in df_compare.columns]
+
+    # regions missing from this run still get their (empty) columns
+    region_cols = [f"{col}_{suffix}" for suffix in SUFFIXES.values() for col in value_cols]
+    df_compare = df_compare.reindex(columns=region_cols).reset_index().drop(columns="Occurrence")
+
+    dated = arrivals.loc[arrivals["Arrival Date"].notna(), ["Region", "VendPartNumber"]]
+
+    for region, suffix in SUFFIXES.items():
+        # --- 2- Identify product presence in each warehouse ---
+        df_compare[f"In_{suffix}"] = df_compare[f"In_{suffix}"].notna()
+
+        # --- 3- Missing availability counts as none ---
+        df_compare[f"Availability_{suffix}"] = df_compare[f"Availability_{suffix}"].fillna(0)
+
+        # --- 4- Compute availability: quantity > 0 OR any arrival date exists ---
+        has_dates = df_compare[f"Arrival Dates_{suffix}"].notna() | \
+                    df_compare["VendPartNumber"].isin(dated.loc[dated["Region"] == region, "VendPartNumber"])
+        df_compare[f"Available_{suffix}"] = is_available(
+            df_compare[f"In_{suffix}"], df_compare[f"Availability_{suffix}"], has_dates
+        )
+
+    suffixes = list(SUFFIXES.values())
+    available = df_compare[[f"Available_{s}" for s in suffixes]]
+
+    # --- 5- Compute total availability ---
+    df_compare["Total_Availability"] = df_compare[[f"Availability_{s}" for s in suffixes]].sum(axis=1)
+    df_compare["Available_Count"] = available.sum(axis=1).astype("int16")
+
+    # --- 6- Human-readable availability status: k of N warehouses ---
+    df_compare["Availability_Status"] = availability_status(available)
+
     #====================================================================
-    # Dynamically combine size descriptions
-    for df in [both_available, df_compare]:
-        for col in ["SizeDescription_LA", "SizeDescription_SA", "Size_LA", "Size_SA"]:
-            df[col] = df[col].replace(['', ' ', 'NaN'], np.nan)
-        df["SizeDescription"] = df["SizeDescription_LA"].combine_first(df["SizeDescription_SA"])
-        df["Size"] = df["Size_LA"].combine_first(df["Size_SA"])
-        for col in ["SizeDescription_LA", "SizeDescription_SA"]:
-            df[col] = df[col].fillna(df["SizeDescription"])
-        for col in ["Size_LA", "Size_SA"]:
-            df[col] = df[col].fillna(df["Size"])
-    
+    # Dynamically combine size descriptions: the first region listing the product wins
+    for suffix in suffixes:
+        df_compare[f"SizeDescription_{suffix}"] = df_compare[f"SizeDescription_{suffix}"].replace(['', ' ', 'NaN'], np.nan)
+    df_compare["SizeDescription"] = df_compare[f"SizeDescription_{suffixes[0]}"]
+    df_compare["Size"] = df_compare[f"Size_{suffixes[0]}"]
+    for suffix in suffixes[1:]:
+        df_compare["SizeDescription"] = df_compare["SizeDescription"].combine_first(df_compare[f"SizeDescription_{suffix}"])
+        df_compare["Size"] = df_compare["Size"].combine_first(df_compare[f"Size_{suffix}"])
+    for suffix in suffixes:
+        df_compare[f"SizeDescription_{suffix}"] = df_compare[f"SizeDescription_{suffix}"].fillna(df_compare["SizeDescription"])
+        df_compare[f"Size_{suffix}"] = df_compare[f"Size_{suffix}"].fillna(df_compare["Size"])
+
     #=====================================================================
-    # Reorder columns dynamically
-    base_cols = ['PartNumber','VendPartNumber', 'DesignID', 'DesignName_LA', 'Grade', 'FinishID','SizeDescription', 'Size',
-                 'Finish_LA', 'ProductType_LA', 'Availability_LA', 'OnOrder_LA','Backorder_LA',
-                 'DesignName_SA', 'Finish_SA', 'ProductType_SA', 'Availability_SA', 'OnOrder_SA', 
-                 'Backorder_SA', 'In_LA', 'In_SA', 'Available_LA', 'Available_SA', 'Total_Availability', 'Availability_Status']
-    arrival_cols = [col for col in df_compare.columns if 'Arrival Dates' in col]
-    final_cols = base_cols + arrival_cols
-    
-    df_compare = df_compare[[col for col in final_cols if col in df_compare.columns]]
-    both_available = both_available[[col for col in final_cols if col in both_available.columns]]
-    
-
-
-    return df_compare, both_available 
+    # Reorder columns dynamically: the first region's details lead, the others follow
+    first, others = suffixes[0], suffixes[1:]
+    base_cols = ['PartNumber', 'VendPartNumber', 'DesignID', f'DesignName_{first}', 'Grade', 'FinishID',
+                 'SizeDescription', 'Size', f'Finish_{first}', f'ProductType_{first}',
+                 f'Availability_{first}', f'OnOrder_{first}', f'Backorder_{first}']
+    for suffix in others:
+        base_cols += [f'DesignName_{suffix}', f'Finish_{suffix}', f'ProductType_{suffix}',
+                      f'Availability_{suffix}', f'OnOrder_{suffix}', f'Backorder_{suffix}']
+    base_cols += [f'In_{s}' for s in suffixes] + [f'Available_{s}' for s in suffixes]
+    base_cols += ['Total_Availability', 'Available_Count', 'Availability_Status']
+    report = df_compare[base_cols + [f"Arrival Dates_{suffix}" for suffix in suffixes]]
+
+    return report, arrivals
+
+
+def is_available(listed, availability, has_dates):
+    """Listed in the region and quantity > 0 OR any arrival date exists."""
+    return (listed & ((availability > 0) | has_dates)).astype(bool)
+
+
+def availability_status(available):
+    """
+    "Available in Both"/"Available in All", "<label> Only", "Available in k of N" or "Not Available"
+    from the Available_<suffix> columns, one label per row.
+    """
+    import numpy as np
+    import pandas as pd
+
+    count = available.sum(axis=1).to_numpy()
+    total = available.shape[1]
+    labels = np.full(len(available), "", dtype=object)
+    labels[count == total] = "Available in Both" if total == 2 else "Available in All"
+    # a single warehouse: name it, its column is the position of the first True
+    only = (count == 1) & (total > 1)
+    names = np.array([f"{LABELS[region]} Only" for region in SUFFIXES], dtype=object)
+    labels[only] = names[available.to_numpy()[only].argmax(axis=1)]
+    partial = (count > 1) & (count < total)
+    labels[partial] = [f"Available in {k} of {total}" for k in count[partial]]
+    labels[count == 0] = "Not Available"
+    return pd.Series(labels, index=available.index)
+
+
+@timed("merge")
+def export_frames(report, arrivals):
+    """
+    Wide (df_compare, both_available) for the Excel report: each region's arrival dates are spread
+    into `Arrival Dates{i}_<suffix>` columns after its raw `Arrival Dates_<suffix>` column.
+    """
+    import pandas as pd
+
+    df_compare = report
+    arrival_cols = []
+    for region, suffix in SUFFIXES.items():
+        dates = arrivals[arrivals["Region"] == region].pivot(index="VendPartNumber", columns="Seq", values="Arrival Date")
+        dates.columns = [f"Arrival Dates{seq}_{suffix}" for seq in dates.columns]
+        df_compare = df_compare.join(dates, on="VendPartNumber")
+        # dates belong to the region's own rows of the part number only
+        df_compare.loc[~df_compare[f"In_{suffix}"], list(dates.columns)] = pd.NaT
+        arrival_cols += [f"Arrival Dates_{suffix}"] + list(dates.columns)
+
+    df_compare = df_compare[[c for c in report.columns if not c.startswith("Arrival Dates")] + arrival_cols]
+
+    # --- Filtered subset for export: available in every warehouse ---
+    both_available = df_compare[df_compare["Available_Count"] == len(SUFFIXES)].copy()
+
+    return df_compare, both_available
+
+
+def run_scraper(log_callback=None, refresh=False, cache_ttl=None, resume=False, catalog_freshness=None,
+                state_dir=None, dead_letter_path=None):
+    """
+    Scrape the catalog and stock status, returns (df_compare, both_available).
+    refresh ignores cached stock-status answers; cache_ttl=0 turns the stock-status cache off.
+    Catalog pages checked less than catalog_freshness seconds ago come from the page cache.
+    resume picks up the pages and part numbers checkpointed by an interrupted run.
+    Lookups that fail every retry are written to the dead-letter file (deadletter.py).
+    state_dir and dead_letter_path replace STATE_DIR and DEAD_LETTER_FILE, for a caller (the service)
+    whose runs must not wipe those of the CLI.
+    """
+    log_callback = log_callback or (lambda msg: None)
+
+    from http_client import get_client
+    from checkpoint import RunState
+    from deadletter import DeadLetters
+    from pipeline import stream_catalog_and_stock
+
+    # pages and stock answers are checkpointed as they arrive so a killed run can --resume
+    state = RunState(state_dir, resume=resume)
+    if resume:
+        log_callback(f"Resuming from checkpoints in {state.directory}")
+
+    # part numbers are queried as soon as their catalog page is parsed
+    cache = open_stock_cache(cache_ttl, log_callback)
+    page_cache = open_page_cache(catalog_freshness, log_callback)
+    dead_letters = DeadLetters(dead_letter_path, reset=True)
+    region_rows, answers = stream_catalog_and_stock(
+        ZIPCODES, WAREHOUSES, log_callback=log_callback, cache=cache, refresh=refresh, state=state,
+        dead_letters=dead_letters, page_cache=page_cache
+    )
+    if cache is not None:
+        cache.close()
+    if page_cache is not None:
+        page_cache.close()
+    state.close()
+
+    catalog = clean_catalog(region_rows, log_callback)
+    dead_letters.attach_catalog(catalog)
+    dead_letters.save()
+    if dead_letters:
+        log_callback(f"{len(dead_letters)} failed stock lookups saved to {dead_letters.path}")
+    df_compare, both_available = export_frames(*build_report(catalog, stock_frames(catalog, answers), log_callback))
+
+    client = get_client()
+    log_callback("\nHTTP latency:\n" + client.stats.format_summary() + "\n" + client.limiter.format_summary())
+
+    return df_compare, both_available
@@ -0,0 +1,161 @@
+"""
+Run metrics: wall time and rows per stage, counters, and the HTTP latency stats of the shared client.
+
+Sequential stages are timed with `with get_metrics().stage("clean"):`. Stages that run as many
+concurrent pieces (stock queries of a warehouse) are spans: their wall time runs from the first
+piece's start to the last one's end. "parse" adds up the parse time of every page over all crawl
+threads, so it can be compared with the crawl's wall time.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}                    # name -> {"seconds", "rows"}, in first-seen order
+        self.spans = {}                     # name -> [first start, last end]
+        self.counters = defaultdict(int)
+
+    def _stage(self, name):
+        return self.stages.setdefault(name, {"seconds": 0.0, "rows": 0})
+
+    @contextmanager
+    def stage(self, name):
+        with self.lock:
+            self._stage(name)  # listed in the order stages start
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            self._stage(name)["seconds"] += seconds
+
+    def span(self, name, start, end):
+        """One piece of a concurrent stage, perf_counter() start and end."""
+        with self.lock:
+            window = self.spans.setdefault(name, [start, end])
+            window[0], window[1] = min(window[0], start), max(window[1], end)
+            self._stage(name)["seconds"] = window[1] - window[0]
+
+    def add_rows(self, name, rows):
+        with self.lock:
+            self._stage(name)["rows"] += rows
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    # ================= OUTPUT =================
+
+    def to_dict(self, http_stats=None):
+        with self.lock:
+            out = {
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+        if http_stats is not None:
+            out["http"] = http_stats.summary()
+        return out
+
+    def write_json(self, path, http_stats=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(http_stats), f, indent=2, default=str)
+        return path
+
+    def format_table(self, http_stats=None):
+        data = self.to_dict(http_stats)
+        lines = [f"{'stage':<16} {'seconds':>9} {'rows':>9}"]
+        for name, stage in data["stages"].items():
+            lines.append(f"{name:<16} {stage['seconds']:>9.2f} {stage['rows']:>9}")
+        for name, value in data["counters"].items():
+            lines.append(f"{name:<16} {value:>19}")
+        for kind, s in data.get("http", {}).items():
+            lines.append(
+                f"http {kind:<11} {s['count']:>9} requests, {s['retries']} retries, "
+                f"p50 {s['p50'] * 1000:.0f}ms, p95 {s['p95'] * 1000:.0f}ms, statuses {s['statuses']}"
+            )
+        return "\n".join(lines)
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """The process-wide metrics of this run."""
+    return _metrics
+
+
+def timed(name, rows=None):
+    """Decorator: every call is timed as stage `name`; rows(result) gives its row count."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _metrics.stage(name):
+                result = fn(*args, **kwargs)
+            if rows is not None:
+                _metrics.add_rows(name, rows(result))
+            return result
+        return wrapper
+    return decorate
+
+
+# ================= PROFILING =================
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+@contextmanager
+def profiled(profiler, stem, log_callback=None):
+    """
+    Profile the block with cProfile (stats saved to <stem>.prof, top functions logged)
+    or pyinstrument (HTML saved to <stem>.html). profiler=None does nothing.
+    """
+    log_callback = log_callback or (lambda msg: None)
+
+    if profiler is None:
+        yield
+        return
+
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError("--profile pyinstrument needs `pip install pyinstrument`") from e
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            with open(f"{stem}.html", "w", encoding="utf-8") as f:
+                f.write(profile.output_html())
+            log_callback(f"Profile saved: {stem}.html")
+        return
+
+    import cProfile
+    import io
+    import pstats
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(f"{stem}.prof")
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(25)
+        log_callback(out.getvalue())
+        log_callback(f"Profile saved: {stem}.prof")
@@ -0,0 +1,214 @@
+"""
+Catalog page parser backends.
+
+Every backend returns the same rows as the original BeautifulSoup code:
+[DesignID, DesignName, VendPartNumber, Grade, FinishID, Finish, SizeDescription].
+DesignID and FinishID are left empty: clean_catalog decodes them from the part numbers (partnumbers.py).
+"bs4" is the reference; "regex" works straight off the raw HTML and is the fastest.
+"""
+import html as html_lib
+import json
+import re
+
+PROTOTYPES_RE = re.compile(r"\$scope\.prototypes\s*=\s*(\[.*?\]);", re.DOTALL)
+
+# BeautifulSoup collapses whitespace-only strings to "\n" or " " -- the other backends copy that
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+NON_TEXT_TAGS = ("script", "style", "template")
+
+
+# ================= SHARED =================
+
+def prototype_rows(design_name, prototypes):
+    rows = []
+    for product_type in prototypes:
+
+        # normalize to iterable of dicts
+        product_types = product_type if isinstance(product_type, list) else [product_type]
+
+        for pt in product_types:
+            grade = pt.get("name", "")
+
+            for finish in pt.get("finishes", []):
+                finish_name = finish.get("name", "")
+                for size in finish.get("sizes", []):
+                    size_desc = size.get("name", "")
+                    for part in size.get("partnumber", []):
+                        rows.append([
+                            "",
+                            design_name,
+                            str(part.get("name") or ""),
+                            grade,
+                            "",
+                            finish_name,
+                            size_desc
+                        ])
+    return rows
+
+
+def _soup_string(text):
+    if text.strip(ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def _design_name(strings):
+    lines = "\n".join(_soup_string(s) for s in strings if s).split("\n")
+    return lines[1].strip() if len(lines) > 1 else ""
+
+
+def _form_rows(design_name, scripts):
+    for script in scripts:
+        if script:
+            match = PROTOTYPES_RE.search(script)
+            if match:
+                return prototype_rows(design_name, json.loads(match.group(1)))
+    return []
+
+
+# ================= BEAUTIFULSOUP (reference) =================
+
+def parse_bs4(html):
+    from bs4 import BeautifulSoup
+
+    data = []
+    soup = BeautifulSoup(html, "html.parser")
+
+    forms = soup.find_all("form", {"data-role": "tocart-form"})
+
+    for form in forms:
+        # ---------------- Design ID / Name ----------------
+        rec_heading = form.find("div", class_="rec_heading")
+        if rec_heading:
+            lines = rec_heading.get_text(separator="\n").split("\n")
+            design_name = lines[1].strip() if len(lines) > 1 else ""
+        else:
+            design_name = ""
+
+        # ---------------- Prototypes JSON ----------------
+        prototypes_json = None
+        for script in form.find_all("script", text=True):
+            if script.string:
+                match = PROTOTYPES_RE.search(script.string)
+                if match:
+                    prototypes_json = match.group(1)
+                    break
+
+        if not prototypes_json:
+            continue
+
+        data.extend(prototype_rows(design_name, json.loads(prototypes_json)))
+
+    return data
+
+
+# ================= LXML =================
+
+def _lxml_strings(element):
+    if element.text and element.tag not in NON_TEXT_TAGS:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str):
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def parse_lxml(html):
+    import lxml.html
+
+    data = []
+    doc = lxml.html.fromstring(html)
+
+    for form in doc.xpath('//form[@data-role="tocart-form"]'):
+        headings = form.xpath('.//div[contains(concat(" ", normalize-space(@class), " "), " rec_heading ")]')
+        design_name = _design_name(_lxml_strings(headings[0])) if headings else ""
+        data.extend(_form_rows(design_name, (script.text for script in form.iter("script"))))
+
+    return data
+
+
+# ================= SELECTOLAX =================
+
+def _selectolax_strings(node):
+    for child in node.traverse(include_text=True):
+        if child.tag == "-text" and child.parent.tag not in NON_TEXT_TAGS:
+            yield child.text_content
+
+
+def parse_selectolax(html):
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError as e:
+        raise ImportError("the selectolax parser backend needs `pip install selectolax`") from e
+
+    data = []
+    tree = LexborHTMLParser(html)
+
+    for form in tree.css('form[data-role="tocart-form"]'):
+        heading = form.css_first("div.rec_heading")
+        design_name = _design_name(_selectolax_strings(heading)) if heading else ""
+        data.extend(_form_rows(design_name, (script.text(deep=True) for script in form.css("script"))))
+
+    return data
+
+
+# ================= REGEX (streaming) =================
+
+FORM_RE = re.compile(r"<form\b([^>]*)>(.*?)</form\s*>", re.DOTALL | re.IGNORECASE)
+TOCART_ROLE_RE = re.compile(r"""\bdata-role\s*=\s*(["'])tocart-form\1""", re.IGNORECASE)
+HEADING_OPEN_RE = re.compile(
+    r"""<div\b[^>]*\bclass\s*=\s*(["'])(?:[^"']*\s)?rec_heading(?:\s[^"']*)?\1[^>]*>""", re.IGNORECASE
+)
+DIV_TAG_RE = re.compile(r"<(/?)div\b[^>]*>", re.IGNORECASE)
+SCRIPT_RE = re.compile(r"<script\b[^>]*>(.*?)</script\s*>", re.DOTALL | re.IGNORECASE)
+# comments and script/style/template blocks end a text node without contributing text
+NON_TEXT_RE = re.compile(
+    r"<!--.*?-->|<(script|style|template)\b[^>]*>.*?</\1\s*>|<[^>]*>", re.DOTALL | re.IGNORECASE
+)
+
+
+def _heading_inner(form_html):
+    opening = HEADING_OPEN_RE.search(form_html)
+    if not opening:
+        return None
+    depth = 1
+    for tag in DIV_TAG_RE.finditer(form_html, opening.end()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return form_html[opening.end():tag.start()]
+    return form_html[opening.end():]
+
+
+def parse_regex(html):
+    data = []
+
+    for form in FORM_RE.finditer(html):
+        if not TOCART_ROLE_RE.search(form.group(1)):
+            continue
+        form_html = form.group(2)
+
+        heading = _heading_inner(form_html)
+        if heading is None:
+            design_name = ""
+        else:
+            design_name = _design_name(html_lib.unescape(text) for text in NON_TEXT_RE.split(heading)[::2])
+
+        data.extend(_form_rows(design_name, (script.group(1) for script in SCRIPT_RE.finditer(form_html))))
+
+    return data
+
+
+PARSERS = {
+    "bs4": parse_bs4,
+    "lxml": parse_lxml,
+    "selectolax": parse_selectolax,
+    "regex": parse_regex,
+}
+
+
+def get_parser(name):
+    try:
+        return PARSERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown catalog parser {name!r}, expected one of {sorted(PARSERS)}") from None
@@ -0,0 +1,99 @@
+"""
+Streaming scrape: catalog pages feed the stock-status queue as soon as they are parsed,
+so stock queries run while the rest of the catalog is still being crawled.
+
+    crawl thread --(region, rows)--> asyncio queue --> StockFetcher tasks --> answers
+
+With a spill.Spill (the chunked run) rows and answers go to its Parquet batches instead of memory.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from catalog import crawl_catalog
+from progress import get_progress
+from stock_status import StockFetcher
+
+VEND_PART_NUMBER = 2  # column of VendPartNumber in the crawl rows
+
+
+def normalize_partnumber(raw):
+    # same cleaning the catalog frame gets before its part numbers are queried
+    return str(raw).strip().upper()
+
+
+async def _stream(zipcodes, warehouses, log_callback, concurrency, rps, cache, refresh, state, dead_letters,
+                  spill=None, page_cache=None):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    answers = {warehouse: {} for warehouse, _ in warehouses.values()} if spill is None else spill.answers
+    queued = {warehouse: set() for warehouse, _ in warehouses.values()}
+    progress = get_progress()
+    for warehouse in queued:
+        progress.start(f"stock {warehouse}")
+
+    def on_page(region, page, rows):
+        # runs on the crawl thread
+        if spill is not None:
+            spill.add_page(region, page, rows)
+        loop.call_soon_threadsafe(queue.put_nowait, (region, rows))
+
+    crawl = loop.run_in_executor(
+        None, lambda: crawl_catalog(zipcodes, log_callback=log_callback, state=state, on_page=on_page,
+                                    keep_rows=spill is None, page_cache=page_cache,
+                                    on_end=None if spill is None else spill.end_region)
+    )
+    crawl.add_done_callback(lambda _: queue.put_nowait(None))
+
+    async def fetch_one(fetcher, warehouse, inforid, pn):
+        raw = await fetcher.fetch(warehouse, inforid, pn)
+        if raw is not None:
+            answers[warehouse][pn] = raw
+        # the total grows while the crawl is still queueing part numbers
+        progress.advance(f"stock {warehouse}", total=len(queued[warehouse]))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        fetcher = StockFetcher(executor, concurrency, rps, log_callback, cache, refresh, state, dead_letters)
+        tasks = []
+
+        while (item := await queue.get()) is not None:
+            region, rows = item
+            warehouse, inforid = warehouses[region]
+            for row in rows:
+                pn = normalize_partnumber(row[VEND_PART_NUMBER])
+                if pn not in queued[warehouse]:
+                    queued[warehouse].add(pn)
+                    tasks.append(asyncio.create_task(fetch_one(fetcher, warehouse, inforid, pn)))
+
+        region_rows = await crawl
+        await asyncio.gather(*tasks)
+        for warehouse in queued:
+            progress.finish(f"stock {warehouse}")
+        await fetcher.retry_failed(answers)
+
+    return region_rows, answers
+
+
+def stream_catalog_and_stock(zipcodes, warehouses, log_callback=None, concurrency=None, rps=None,
+                             cache=None, refresh=False, state=None, dead_letters=None, spill=None, page_cache=None):
+    """
+    Crawl the catalog and query stock status for every part number as it is discovered.
+
+    warehouses maps region -> (warehouse code, inforid).
+    Catalog pages unchanged since an earlier crawl come from page_cache (catalog_cache.CatalogPageCache).
+    Failed lookups are retried once everything else is done, the rest go to dead_letters.
+    Returns (region -> crawl rows, warehouse code -> {partnumber: raw answer}); with a spill.Spill
+    both are written to it as they arrive and come back empty / as its answer sinks.
+    """
+    log_callback = log_callback or (lambda msg: None)
+    concurrency = max(1, concurrency or config.STOCK_CONCURRENCY)
+    rps = config.STOCK_RPS if rps is None else rps
+
+    region_rows, answers = asyncio.run(
+        _stream(zipcodes, warehouses, log_callback, concurrency, rps, cache, refresh, state, dead_letters, spill,
+                page_cache)
+    )
+    if cache is not None:
+        cache.flush()
+        log_callback(f"Stock-status cache: {cache.hits} hits, {cache.misses} misses")
+    return region_rows, answers
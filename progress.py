@@ -0,0 +1,228 @@
+"""
+Run progress and log messages as typed events, for the console, a JSON-lines file and the Streamlit app.
+
+    bus = get_progress()
+    bus.start("stock LA", total=1200)
+    bus.advance("stock LA")             # once per part number: a counter update
+    bus.finish("stock LA")
+    bus.message("Scraping complete!")   # the bus is also callable, as a log_callback
+
+advance() only counts; a task's Progress event (done, total, rate, ETA) goes to the sinks at most
+every PROGRESS_INTERVAL seconds, and once more from finish(), so reporting costs the same for a
+hundred parts or a million. Messages go out at once, and the last PROGRESS_RING of them stay in a
+ring buffer for sinks that redraw the log instead of appending to it.
+"""
+import collections
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
+import config
+
+
+# ================= EVENTS =================
+
+class Message:
+    type = "message"
+
+    def __init__(self, text):
+        self.time = time.time()
+        self.text = text
+
+    def format(self):
+        return self.text
+
+    def to_dict(self):
+        return {"type": self.type, "time": self.time, "text": self.text}
+
+
+class Progress:
+    type = "progress"
+
+    def __init__(self, task, done, total, seconds, finished):
+        self.time = time.time()
+        self.task = task
+        self.done = done
+        self.total = total
+        self.seconds = seconds
+        self.rate = done / seconds if seconds > 0 else 0.0
+        remaining = None if total is None else max(total - done, 0)
+        self.eta = None if remaining is None or not self.rate else remaining / self.rate
+        self.finished = finished
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else None
+
+    def format(self):
+        parts = [f"{self.task}: {self.done}" + (f"/{self.total} ({self.fraction:.0%})" if self.total else "")]
+        parts.append(f"{self.rate:.1f}/s")
+        if self.finished:
+            parts.append(f"done in {datetime.timedelta(seconds=round(self.seconds))}")
+        elif self.eta is not None:
+            parts.append(f"ETA {datetime.timedelta(seconds=round(self.eta))}")
+        return ", ".join(parts)
+
+    def to_dict(self):
+        return {
+            "type": self.type, "time": self.time, "task": self.task, "done": self.done, "total": self.total,
+            "seconds": self.seconds, "rate": self.rate, "eta": self.eta, "finished": self.finished,
+        }
+
+
+# ================= BUS =================
+
+class ProgressBus:
+    def __init__(self, interval=None, ring=None):
+        self.lock = threading.Lock()
+        # events come from the crawl, stock and limiter threads: sinks see them one at a time
+        self.emit_lock = threading.RLock()
+        self.interval = config.PROGRESS_INTERVAL if interval is None else interval
+        self.recent = collections.deque(maxlen=ring or config.PROGRESS_RING)
+        self.tasks = {}   # name -> [done, total, started, last emitted], monotonic times
+        self.sinks = []
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+        sink.close()
+
+    def close(self):
+        while self.sinks:
+            self.remove_sink(self.sinks[-1])
+
+    def _emit(self, event):
+        with self.emit_lock:
+            for sink in list(self.sinks):
+                sink.handle(event)
+
+    def __call__(self, text):
+        self.message(text)
+
+    def message(self, text):
+        event = Message(str(text))
+        with self.lock:
+            self.recent.append(event)
+        self._emit(event)
+
+    def start(self, task, total=None):
+        """(Re)start counting a task, e.g. a warehouse's stock lookups of this run."""
+        with self.lock:
+            self.tasks[task] = [0, total, time.monotonic(), 0.0]
+
+    def advance(self, task, n=1, total=None):
+        """n more items of task done; total updates a total that grows while the task runs."""
+        now = time.monotonic()
+        with self.lock:
+            state = self.tasks.get(task)
+            if state is None:
+                state = self.tasks[task] = [0, None, now, 0.0]
+            state[0] += n
+            if total is not None:
+                state[1] = total
+            if now - state[3] < self.interval:
+                return
+            state[3] = now
+            event = Progress(task, state[0], state[1], now - state[2], finished=False)
+        self._emit(event)
+
+    def finish(self, task):
+        now = time.monotonic()
+        with self.lock:
+            state = self.tasks.get(task)
+            if state is None:
+                return
+            event = Progress(task, state[0], state[0] if state[1] is None else state[1], now - state[2], finished=True)
+        self._emit(event)
+
+
+_progress = ProgressBus()
+
+
+def get_progress():
+    """The process-wide progress bus of this run."""
+    return _progress
+
+
+# ================= SINKS =================
+
+class ConsoleSink:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def handle(self, event):
+        # one write per line, so a line is never split by another thread's output
+        self.stream.write(event.format() + "\n")
+        if event.type == "progress":
+            self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+class JsonLinesSink:
+    """Every event as one JSON object per line, e.g. for a dashboard tailing the file."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def handle(self, event):
+        self.file.write(json.dumps(event.to_dict()) + "\n")
+        if event.type == "progress":
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class StreamlitSink:
+    """
+    A progress bar per task and the bus's recent messages, drawn into the page being run.
+    Streamlit can only draw from the script thread: events from other threads (the crawl) are kept
+    and drawn with the next event on it. The log is redrawn at most every interval seconds.
+    """
+
+    def __init__(self, bus, interval=None):
+        import streamlit as st
+
+        self.st = st
+        self.bus = bus
+        self.interval = bus.interval if interval is None else interval
+        self.thread = threading.get_ident()
+        self.container = st.container()
+        self.log = st.empty()
+        self.bars = {}
+        self.pending = {}
+        self.drawn = 0.0
+
+    def handle(self, event):
+        if event.type == "progress":
+            self.pending[event.task] = event
+        if threading.get_ident() != self.thread:
+            return
+        for task in list(self.pending):
+            progress = self.pending.pop(task)
+            if task not in self.bars:
+                self.bars[task] = self.container.progress(0.0)
+            fraction = progress.fraction
+            self.bars[task].progress(1.0 if progress.finished else fraction or 0.0, text=progress.format())
+        if event.type == "message" and time.monotonic() - self.drawn >= self.interval:
+            self._draw_log()
+
+    def _draw_log(self):
+        self.log.code("\n".join(message.text for message in list(self.bus.recent)), language=None)
+        self.drawn = time.monotonic()
+
+    def close(self):
+        if threading.get_ident() == self.thread:
+            self._draw_log()
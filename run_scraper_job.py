@@ -1,25 +1,319 @@
-from main import run_scraper
-import pandas as pd
+import argparse
 import datetime
 import os
+import shutil
+import sys
+
+import config
+import deadletter
+import history
+import hotset
+import sharding
+from artifacts import ArtifactStore, file_hash, load_frames, load_json, save_frames, save_json
+from checkpoint import RunState
+from exporters import EXPORTERS, export_report
+from main import (ZIPCODES, WAREHOUSES, run_scraper, crawl, clean_catalog, get_stock, get_stock_answers,
+                  build_report, export_frames, stock_frames, region_partnumbers)
+from metrics import PROFILERS, get_metrics, profiled
+from progress import ConsoleSink, JsonLinesSink, get_progress
+
+# crawl -> stock -> transform -> compare -> export; every stage command first brings the stages
+# it reads up to date, each skipped while its artifact key (inputs, parameters, code) is unchanged
+STAGES = ["crawl", "stock", "transform", "compare", "export"]
 
 def log(msg):
-    print(msg)
+    get_progress().message(msg)
 
-def main():
-    os.makedirs("output", exist_ok=True)
+def http_stats():
+    # requests is only imported by commands that go to the network
+    if "http_client" not in sys.modules:
+        return None
+    from http_client import get_client
+    return get_client().stats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Wilsonart scraper and save the Excel report.")
+    parser.add_argument("command", nargs="?", default="run",
+                        choices=["run"] + STAGES + ["merge", "diff", "refresh", "requery", "serve"],
+                        help="run: full streaming scrape (or one shard with --shard); "
+                             "crawl | stock | transform | compare | export: run the pipeline up to that stage, "
+                             "reusing every stage artifact whose inputs are unchanged (crawl also writes --catalog); "
+                             "merge: build the report from the catalog artifact and every shard's output; "
+                             "diff: what changed between the last two runs in the history store; "
+                             "refresh: re-query only the hot set and patch the newest snapshot; "
+                             "requery: re-query only the dead-letter lookups of the last run and patch the newest snapshot; "
+                             "serve: HTTP/JSON availability API over the newest snapshot, refreshed in the background")
+    parser.add_argument("--refresh", action="store_true",
+                        help="ignore cached stock-status answers and query every part again")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="reuse stock-status answers younger than this many seconds (0 disables the cache)")
+    parser.add_argument("--catalog-freshness", type=float, default=None,
+                        help="reuse cached catalog pages checked less than this many seconds ago without a request "
+                             "(0 revalidates every page)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from the checkpoints in the state directory")
+    parser.add_argument("--chunked", action="store_true",
+                        help="run: spill crawl rows and stock answers to Parquet batches in the spill directory "
+                             "and build the report bucket by bucket, for catalogs larger than memory")
+    parser.add_argument("--shard", type=sharding.parse_shard, default=None, metavar="i/N",
+                        help="only query stock status for shard i of N (0-based) of the part numbers")
+    parser.add_argument("--catalog", default=config.CATALOG_ARTIFACT,
+                        help="catalog artifact shared by the shards (crawled and written if missing)")
+    parser.add_argument("--shard-dir", default=config.SHARD_DIR,
+                        help="where each shard writes its stock-status answers")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=sorted(EXPORTERS),
+                        default=config.REPORT_FORMATS,
+                        help="report formats to write (default: %(default)s)")
+    parser.add_argument("--history-dir", default=config.HISTORY_DIR,
+                        help="history store every report is appended to, and `diff` reads from")
+    parser.add_argument("--artifact-dir", default=config.ARTIFACT_DIR,
+                        help="where the stage commands keep their artifacts")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild the requested stage and the stages it reads even if their inputs are unchanged")
+    parser.add_argument("--events", default=config.EVENTS_FILE or None, metavar="PATH",
+                        help="also write every log and progress event to this JSON-lines file")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILERS, default=None,
+                        help="profile the main thread of the run (cprofile by default) into output/profile_*")
+    return parser.parse_args()
+
+def save_report(df_compare, both_available, formats=None, history_dir=None, completeness=None):
+    # df_compare/both_available are frames, or callables yielding chunks (spill.run_chunked)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+    stem = f"output/warehouse_availability_report_{timestamp}"
+    if completeness is None:
+        completeness = deadletter.completeness(df_compare)
+    log("Completeness:\n" + completeness.to_string(index=False))
+    sheets = {"All Products": df_compare, "Both Available": both_available, "Completeness": completeness}
+    output_file = ", ".join(export_report(sheets, stem, formats))
+    log(f"History snapshot saved: {history.save_snapshot(df_compare, directory=history_dir)}")
+    log(f"Metrics saved: {get_metrics().write_json(f'{stem}_metrics.json', http_stats())}")
+    return output_file
+
+def load_or_crawl_catalog(path):
+    if os.path.exists(path):
+        log(f"Using catalog artifact {path}")
+        return sharding.load_catalog(path)
+    region_rows = crawl(log)
+    sharding.save_catalog(region_rows, path)
+    log(f"Catalog artifact saved: {path}")
+    return region_rows
+
+def run_shard(args):
+    index, count = args.shard
+    catalog = clean_catalog(load_or_crawl_catalog(args.catalog), log)
+
+    # the shard's checkpoint directory doubles as its output for `merge`
+    state = RunState(sharding.shard_directory(index, count, args.shard_dir), resume=args.resume)
+    manifest = os.path.join(state.directory, sharding.MANIFEST_NAME)
+    if os.path.exists(manifest):
+        os.remove(manifest)  # a resumed shard is unfinished again until it completes
+    dead_letters = deadletter.DeadLetters(os.path.join(state.directory, sharding.DEAD_LETTER_NAME), reset=True)
+    get_stock(catalog, log, args.refresh, args.cache_ttl, state, shard=(index, count), dead_letters=dead_letters)
+    state.close()
+    get_metrics().write_json(os.path.join(state.directory, "metrics.json"), http_stats())
+    # last, so merge only ever sees finished shards of this catalog
+    sharding.save_manifest(state.directory, index, count, sharding.run_id(args.catalog))
+    print(f"✅ Shard {index}/{count} saved: {state.directory}")
+
+def merge(args):
+    # refuses unless shards 0..N-1 of this catalog's run have all finished
+    directories = sharding.complete_shards(sharding.run_id(args.catalog), args.shard_dir)
+    log(f"Merging {len(directories)} shards: {', '.join(directories)}")
+    catalog = clean_catalog(sharding.load_catalog(args.catalog), log)
+    stock = stock_frames(catalog, sharding.collect_answers(directories))
+    log("Merged stock status: " + ", ".join(
+        f"{region} {len(frame)}/{len(region_partnumbers(catalog, region))}"
+        for region, frame in stock.items()
+    ))
+    dead_letters = sharding.collect_dead_letters(directories)
+    dead_letters.attach_catalog(catalog)
+    dead_letters.save()
+
+    output_file = save_report(*export_frames(*build_report(catalog, stock, log)), args.formats, args.history_dir)
+    print(f"✅ Report saved: {output_file}")
+
+def diff(args):
+    snapshots = history.list_snapshots(args.history_dir)
+    if len(snapshots) < 2:
+        print(f"Need two runs in {args.history_dir} to diff, found {len(snapshots)}")
+        return
+    previous, current = snapshots[-2:]
+    log(f"Changes from {previous} to {current}")
+
+    changes = history.diff_snapshots(history.load_snapshot(previous), history.load_snapshot(current))
+    if changes.empty:
+        print("✅ No changes since the previous run")
+        return
+    log(history.summarize(changes).to_string())
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+    output_file = ", ".join(export_report({"Changes": changes}, f"output/availability_changes_{timestamp}", args.formats))
+    print(f"✅ Changes saved: {output_file}")
+
+def refresh(args):
+    result = hotset.refresh_hot_set(log, args.history_dir, args.cache_ttl)
+    if result is None:
+        print(f"No run in {args.history_dir} to refresh, run a full scrape first")
+        return
+    output_file = save_report(*result, args.formats, args.history_dir)
+    print(f"✅ Refreshed report saved: {output_file}")
+
+def requery(args):
+    result = deadletter.requery_failures(log, args.history_dir)
+    if result is None:
+        print("Nothing recovered, the newest snapshot is unchanged")
+        return
+    output_file = save_report(*result, args.formats, args.history_dir)
+    print(f"✅ Patched report saved: {output_file}")
+
+def run_stage(args, store, stage, done=None):
+    """Bring `stage` and the stages it reads up to date, returns its artifact path."""
+    done = {} if done is None else done
+    if stage not in done:
+        done[stage] = _run_stage(args, store, stage, done)
+    return done[stage]
+
+def _run_stage(args, store, stage, done):
+    # --force rebuilds the requested stage and every stage it reads
+    force = args.force
+    # config the report is built from besides code: region suffixes / labels and the arrival date format
+    report_config = {"warehouses_file": file_hash(config.WAREHOUSES_FILE),
+                     "arrival_date_format": config.ARRIVAL_DATE_FORMAT}
+
+    if stage == "crawl":
+        return store.run("crawl", 1, lambda: crawl(log, catalog_freshness=args.catalog_freshness), save_json,
+                         force=force, max_age=config.ARTIFACT_NETWORK_MAX_AGE,
+                         params={"zipcodes": ZIPCODES, "base_url": config.BASE_URL,
+                                 "max_pages": config.CATALOG_MAX_PAGES, "parser": config.CATALOG_PARSER})
+
+    if stage == "stock":
+        run_stage(args, store, "crawl", done)
+
+        def fetch():
+            catalog = clean_catalog(store.load("crawl", load_json))
+            state = RunState(resume=args.resume)
+            answers = get_stock_answers(catalog, log, args.refresh, args.cache_ttl, state,
+                                        dead_letters=deadletter.DeadLetters(reset=True))
+            state.clear()
+            return answers
+
+        return store.run("stock", 1, fetch, save_json, inputs=["crawl"], force=force,
+                         max_age=config.ARTIFACT_NETWORK_MAX_AGE,
+                         params={"warehouses": WAREHOUSES, "base_url": config.BASE_URL})
+
+    if stage == "transform":
+        run_stage(args, store, "crawl", done)
+        return store.run("transform", 1, lambda: {"catalog": clean_catalog(store.load("crawl", load_json), log)},
+                         save_frames, inputs=["crawl"], code=["main", "partnumbers"], extension=None,
+                         force=force)
+
+    if stage == "compare":
+        run_stage(args, store, "transform", done)
+        run_stage(args, store, "stock", done)
+
+        def compare():
+            catalog = store.load("transform", load_frames)["catalog"]
+            stock = stock_frames(catalog, store.load("stock", load_json))
+            report, arrivals = build_report(catalog, stock, log)
+            return {"report": report, "arrivals": arrivals}
+
+        return store.run("compare", 1, compare, save_frames, inputs=["transform", "stock"],
+                         code=["main", "stock_status"], extension=None, force=force, params=report_config)
+
+    if stage == "export":
+        run_stage(args, store, "compare", done)
+
+        def export():
+            frames = store.load("compare", load_frames)
+            return {"files": save_report(*export_frames(frames["report"], frames["arrivals"]),
+                                         args.formats, args.history_dir)}
+
+        return store.run("export", 1, export, save_json, inputs=["compare"], force=force,
+                         code=["main", "exporters", "history"],
+                         params={"formats": args.formats, "history_dir": args.history_dir, **report_config})
+
+    raise ValueError(f"Unknown stage {stage!r}, expected one of {STAGES}")
+
+def dispatch(args):
+    if args.command in STAGES:
+        store = ArtifactStore(args.artifact_dir, log)
+        path = run_stage(args, store, args.command)
+        if args.command == "crawl":
+            # the shards of `--shard i/N` read the crawl from --catalog
+            os.makedirs(os.path.dirname(args.catalog) or ".", exist_ok=True)
+            shutil.copyfile(path, args.catalog)
+            print(f"✅ Catalog saved: {args.catalog}")
+        elif args.command == "export":
+            print(f"✅ Report saved: {load_json(path)['files']}")
+        else:
+            print(f"✅ {args.command.capitalize()} artifact: {path}")
+        return
+    if args.command == "merge":
+        merge(args)
+        return
+    if args.command == "diff":
+        diff(args)
+        return
+    if args.command == "refresh":
+        refresh(args)
+        return
+    if args.command == "requery":
+        requery(args)
+        return
+    if args.command == "serve":
+        import service
+        service.serve(args.history_dir, log_callback=log)
+        return
+    if args.shard is not None:
+        run_shard(args)
+        return
+
+    if args.chunked:
+        import spill
+
+        df_compare, both_available, completeness = spill.run_chunked(
+            log_callback=log, refresh=args.refresh, cache_ttl=args.cache_ttl, resume=args.resume,
+            catalog_freshness=args.catalog_freshness
+        )
+        output_file = save_report(df_compare, both_available, args.formats, args.history_dir, completeness)
+        spill.clear()
+        RunState(resume=True).clear()
+        print(f"✅ Report saved: {output_file}")
+        return
 
     # Run scraper with logging
-    df_compare, both_available = run_scraper(log_callback=log)
+    df_compare, both_available = run_scraper(
+        log_callback=log, refresh=args.refresh, cache_ttl=args.cache_ttl, resume=args.resume,
+        catalog_freshness=args.catalog_freshness
+    )
 
     # Save Excel
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
-    output_file = f"output/warehouse_availability_report_{timestamp}.xlsx"
-    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-        df_compare.to_excel(writer, sheet_name="All Products", index=False)
-        both_available.to_excel(writer, sheet_name="Both Available", index=False)
+    output_file = save_report(df_compare, both_available, args.formats, args.history_dir)
+
+    # the report is safe on disk, checkpoints are no longer needed
+    RunState(resume=True).clear()
 
     print(f"✅ Report saved: {output_file}")
 
+def main():
+    args = parse_args()
+    os.makedirs("output", exist_ok=True)
+
+    # log lines and throttled progress (done, rate, ETA per crawl region and warehouse) go to the sinks
+    progress = get_progress()
+    progress.add_sink(ConsoleSink())
+    if args.events:
+        progress.add_sink(JsonLinesSink(args.events))
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+    try:
+        with profiled(args.profile, f"output/profile_{timestamp}", log):
+            dispatch(args)
+    finally:
+        progress.close()
+
+    if args.command not in ("diff", "serve"):
+        print("\n" + get_metrics().format_table(http_stats()))
+
 if __name__ == "__main__":
     main()
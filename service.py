@@ -0,0 +1,233 @@
+"""
+Availability service: the newest report held in memory and served as local HTTP/JSON.
+
+    python run_scraper_job.py serve
+
+    GET /parts/<PartNumber>            report rows of a product, every warehouse's columns
+    GET /vendparts/<VendPartNumber>
+    GET /designs/<DesignID>            a design in every finish, size and warehouse
+    GET /stock/<region>/<VendPartNumber>   live stockstatus answer of one warehouse
+    GET /status                        snapshot, row count, refresh times, coalesced lookups
+
+Lookups are dict hits on rows that were JSON-ready when the index was built. A background thread
+patches the hot set every SERVICE_REFRESH_INTERVAL (hotset.py) and sweeps everything every
+SERVICE_FULL_INTERVAL (run_scraper), saves each result to the history store and swaps in a new index.
+Identical /stock lookups in flight at the same time share a single upstream call.
+"""
+import datetime
+import json
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+import config
+import history
+
+# URL prefix -> report column it looks up
+INDEX_KEYS = {"parts": "PartNumber", "vendparts": "VendPartNumber", "designs": "DesignID"}
+
+
+class AvailabilityIndex:
+    """Report rows as plain dicts, keyed by each INDEX_KEYS column (upper-cased)."""
+
+    def __init__(self, snapshot, source):
+        rows = json.loads(snapshot.drop(columns="Run_At", errors="ignore").to_json(orient="records", date_format="iso"))
+        self.maps = {name: defaultdict(list) for name in INDEX_KEYS}
+        for row in rows:
+            for name, column in INDEX_KEYS.items():
+                self.maps[name][str(row[column]).upper()].append(row)
+        self.rows = len(rows)
+        self.source = source
+        self.loaded_at = datetime.datetime.now()
+
+    def lookup(self, name, value):
+        return self.maps[name].get(value.strip().upper(), [])
+
+
+class SingleFlight:
+    """Calls with the same key that overlap in time share one execution of fn."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    del self.calls[key]
+        return future.result()
+
+
+class AvailabilityService:
+    def __init__(self, history_dir=None, refresh_interval=None, full_interval=None, log_callback=None):
+        self.history_dir = history_dir or config.HISTORY_DIR
+        self.refresh_interval = refresh_interval or config.SERVICE_REFRESH_INTERVAL
+        self.full_interval = full_interval or config.SERVICE_FULL_INTERVAL
+        self.log_callback = log_callback or (lambda msg: None)
+        self.index = None
+        self.last_refresh = None
+        self.last_full = None
+        self.stock_calls = SingleFlight()
+        self.stop = threading.Event()
+
+    # ================= INDEX =================
+
+    def load_latest(self):
+        """Index the newest history snapshot, False if there is none yet."""
+        snapshots = history.list_snapshots(self.history_dir)
+        if not snapshots:
+            return False
+        snapshot = history.load_snapshot(snapshots[-1])
+        if self.last_full is None and len(snapshot):
+            # a restarted service counts the newest run as the last sweep
+            self.last_full = snapshot["Run_At"].iloc[0].to_pydatetime()
+        self.index = AvailabilityIndex(snapshot, snapshots[-1])  # one reference swap, readers never wait
+        self.log_callback(f"Index: {self.index.rows} rows from {snapshots[-1]}")
+        return True
+
+    def full_sweep(self):
+        from main import run_scraper
+
+        # own checkpoints and dead letters: a sweep must not wipe those of a CLI run next to it
+        df_compare, _ = run_scraper(self.log_callback, state_dir=config.SERVICE_STATE_DIR,
+                                    dead_letter_path=config.SERVICE_DEAD_LETTER_FILE)
+        history.save_snapshot(df_compare, directory=self.history_dir)
+        self.last_full = self.last_refresh = datetime.datetime.now()
+        self.load_latest()
+
+    def hot_refresh(self):
+        import hotset
+
+        result = hotset.refresh_hot_set(self.log_callback, self.history_dir)
+        if result is None:
+            self.full_sweep()
+            return
+        history.save_snapshot(result[0], directory=self.history_dir)
+        self.last_refresh = datetime.datetime.now()
+        self.load_latest()
+
+    def refresh_loop(self):
+        """Background refresh until stop is set; a failed refresh is logged and retried next interval."""
+        # without an index to serve, the first refresh starts at once
+        delay = 0 if self.index is None else self.refresh_interval
+        while not self.stop.wait(delay):
+            delay = self.refresh_interval
+            full_due = self.last_full is None or \
+                (datetime.datetime.now() - self.last_full).total_seconds() >= self.full_interval
+            try:
+                if full_due:
+                    self.full_sweep()
+                else:
+                    self.hot_refresh()
+            except Exception as e:
+                self.log_callback(f"Refresh failed: {e!r}")
+
+    # ================= QUERIES =================
+
+    def lookup(self, name, value):
+        index = self.index
+        return [] if index is None else index.lookup(name, value)
+
+    def live_stock(self, region, partnumber):
+        from main import WAREHOUSES
+        from stock_status import query_stock_status
+
+        warehouse, inforid = WAREHOUSES[region.upper()]
+        partnumber = partnumber.strip().upper()
+        return self.stock_calls.do(
+            (warehouse, partnumber), lambda: query_stock_status(partnumber, warehouse, inforid)
+        )
+
+    def status(self):
+        index = self.index
+        return {
+            "snapshot": index.source if index else None,
+            "rows": index.rows if index else 0,
+            "indexed_at": index.loaded_at.isoformat(timespec="seconds") if index else None,
+            "last_refresh": self.last_refresh.isoformat(timespec="seconds") if self.last_refresh else None,
+            "last_full": self.last_full.isoformat(timespec="seconds") if self.last_full else None,
+            "coalesced_stock_lookups": self.stock_calls.coalesced,
+        }
+
+
+# ================= HTTP =================
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        service = self.server.service
+        parts = [unquote(part) for part in urlparse(self.path).path.strip("/").split("/")]
+
+        if parts == ["status"]:
+            self._send_json(200, service.status())
+        elif len(parts) == 2 and parts[0] in INDEX_KEYS:
+            rows = service.lookup(parts[0], parts[1])
+            self._send_json(200 if rows else 404, {"count": len(rows), "rows": rows})
+        elif len(parts) == 3 and parts[0] == "stock":
+            try:
+                row = service.live_stock(parts[1], parts[2])
+            except KeyError:
+                self._send_json(404, {"error": f"unknown region {parts[1]!r}"})
+                return
+            except Exception as e:
+                self._send_json(502, {"error": f"stockstatus lookup failed: {e!r}"})
+                return
+            self._send_json(200 if row else 502, {"region": parts[1].upper(), "answer": row})
+        else:
+            self._send_json(404, {"error": "not found", "routes": [f"/{name}/<value>" for name in INDEX_KEYS]
+                                  + ["/stock/<region>/<VendPartNumber>", "/status"]})
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog of 5 drops connections of a burst of clients
+
+    def __init__(self, service, host=None, port=None):
+        super().__init__((host or config.SERVICE_HOST, config.SERVICE_PORT if port is None else port), ServiceHandler)
+        self.service = service
+
+
+def serve(history_dir=None, host=None, port=None, log_callback=None):
+    """Index the newest snapshot, start the background refresh and serve until interrupted."""
+    log_callback = log_callback or (lambda msg: None)
+
+    service = AvailabilityService(history_dir, log_callback=log_callback)
+    service.load_latest()
+    threading.Thread(target=service.refresh_loop, name="refresh", daemon=True).start()
+
+    server = ServiceServer(service, host, port)
+    log_callback(f"Serving availability on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop.set()
+        server.server_close()
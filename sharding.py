@@ -0,0 +1,124 @@
+import glob
+import json
+import os
+import zlib
+
+import config
+
+
+def parse_shard(text):
+    """'i/N' -> (i, N), with 0 <= i < N."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard expects i/N, got {text!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"--shard {text}: need 0 <= i < N")
+    return index, count
+
+
+def shard_of(partnumber, count):
+    """Stable hash-partition of part numbers (same answer on every machine and Python version)."""
+    return zlib.crc32(partnumber.encode("utf-8")) % count
+
+
+def in_shard(partnumber, index, count):
+    return shard_of(partnumber, count) == index
+
+
+# each shard's failed lookups, next to its answers
+DEAD_LETTER_NAME = "dead_letters.json"
+
+
+def shard_directory(index, count, base=None):
+    return os.path.join(base or config.SHARD_DIR, f"shard_{index}of{count}")
+
+
+# ================= CATALOG ARTIFACT =================
+
+def save_catalog(region_rows, path):
+    """Raw crawl rows shared by every shard, so the catalog is crawled once."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(region_rows, f)
+    os.replace(tmp_path, path)
+
+
+def load_catalog(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ================= MERGE =================
+
+# written by a shard once all its lookups are done: which shard of which run the directory holds
+MANIFEST_NAME = "shard.json"
+
+
+def run_id(catalog_path):
+    """Shards of one run query the same catalog artifact: its content hash identifies the run."""
+    from artifacts import file_hash
+
+    return file_hash(catalog_path)[:16]
+
+
+def save_manifest(directory, index, count, run):
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"index": index, "count": count, "run_id": run}, f)
+
+
+def complete_shards(run, shard_base=None):
+    """
+    The directories of shards 0..N-1 of run, in shard order. Raises ValueError unless every shard
+    of that run has finished and they all agree on N; directories of other runs are left out.
+    """
+    manifests, stale = {}, []
+    for directory in sorted(glob.glob(os.path.join(shard_base or config.SHARD_DIR, "shard_*"))):
+        try:
+            with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            stale.append(directory)  # still running, or killed before it finished
+            continue
+        if manifest["run_id"] != run:
+            stale.append(directory)
+            continue
+        manifests[directory] = manifest
+
+    counts = {manifest["count"] for manifest in manifests.values()}
+    if len(counts) != 1:
+        raise ValueError(f"No complete set of shards for catalog run {run}: "
+                         f"shard counts {sorted(counts)} among {sorted(manifests)}, unfinished or other runs: {stale}")
+    count, = counts
+    by_index = {manifest["index"]: directory for directory, manifest in manifests.items()}
+    missing = [index for index in range(count) if index not in by_index]
+    if missing:
+        raise ValueError(f"Shards {', '.join(f'{index}/{count}' for index in missing)} of catalog run {run} "
+                         f"are missing or unfinished, not merging a partial report")
+    return [by_index[index] for index in range(count)]
+
+
+def collect_answers(directories):
+    """warehouse -> {partnumber: raw answer} over the given shard directories."""
+    from checkpoint import RunState
+
+    answers = {}
+    for directory in directories:
+        state = RunState(directory, resume=True)
+        for path in glob.glob(os.path.join(directory, "stock", "*.jsonl")):
+            warehouse = os.path.splitext(os.path.basename(path))[0]
+            answers.setdefault(warehouse, {}).update(state.completed_parts(warehouse))
+    return answers
+
+
+def collect_dead_letters(directories):
+    """deadletter.DeadLetters of the given shard directories, combined."""
+    from deadletter import DeadLetters
+
+    dead_letters = DeadLetters(reset=True)
+    for directory in directories:
+        dead_letters.update(DeadLetters(os.path.join(directory, DEAD_LETTER_NAME)))
+    return dead_letters
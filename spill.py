@@ -0,0 +1,291 @@
+"""
+Chunked mode: a full run whose memory does not grow with the catalog.
+
+    python run_scraper_job.py run --chunked
+
+Crawl rows and stock-status answers are written to SPILL_DIR as they arrive, hash-partitioned by
+part number (crc32, like the shards) and flushed as Parquet batches once SPILL_BATCH_ROWS records
+are buffered:
+
+    spill/catalog/bucket=03/part-00012.parquet    Region, Page, Row + the crawl columns
+    spill/answers/bucket=03/part-00012.parquet    Warehouse, VendPartNumber, Raw
+    spill/report/bucket=03.parquet                build_report() of the bucket
+    spill/arrivals/bucket=03.parquet
+
+Every row of a part number lands in the same bucket, so the merge and compare run one bucket at a
+time with the in-memory code (clean_catalog, build_report, export_frames), and the report writers
+and the history snapshot take the buckets' chunks one after the other. Rows come out grouped by
+bucket rather than in catalog order. The crawl's and the stock queue's per-part bookkeeping (part
+numbers queued, checkpoints) still lives in memory.
+"""
+import os
+import shutil
+
+import config
+from metrics import get_metrics
+from sharding import shard_of
+
+
+def bucket_of(partnumber, buckets):
+    # same cleaning the catalog frame and the stock queue give a part number
+    return shard_of(str(partnumber).strip().upper(), buckets)
+
+
+def _bucket_name(bucket):
+    return f"bucket={bucket:02d}"
+
+
+class BucketWriter:
+    """
+    Records hash-partitioned on the part number at position key, written to
+    directory/bucket=<k>/part-<n>.parquet whenever batch_rows of them are buffered.
+    """
+
+    def __init__(self, directory, schema, key, buckets, batch_rows):
+        self.directory = directory
+        self.schema = schema
+        self.key = key
+        self.buffers = [[] for _ in range(buckets)]
+        self.batch_rows = batch_rows
+        self.buffered = 0
+        self.batches = 0
+        self.rows = 0
+
+    def append(self, record):
+        self.buffers[bucket_of(record[self.key], len(self.buffers))].append(record)
+        self.buffered += 1
+        if self.buffered >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for bucket, records in enumerate(self.buffers):
+            if not records:
+                continue
+            table = pa.Table.from_arrays(
+                [pa.array(column, field.type) for column, field in zip(zip(*records), self.schema)],
+                schema=self.schema,
+            )
+            directory = os.path.join(self.directory, _bucket_name(bucket))
+            os.makedirs(directory, exist_ok=True)
+            pq.write_table(table, os.path.join(directory, f"part-{self.batches:05d}.parquet"))
+            self.rows += len(records)
+            records.clear()
+        self.batches += 1
+        self.buffered = 0
+
+    def read(self, bucket):
+        """Every record of a bucket as a DataFrame, in the order they were appended."""
+        import pandas as pd
+
+        directory = os.path.join(self.directory, _bucket_name(bucket))
+        if not os.path.isdir(directory):
+            return pd.DataFrame(columns=self.schema.names)
+        return pd.read_parquet(directory)
+
+
+class _AnswerSink:
+    """warehouse's answers[partnumber] = raw, as the stock queue stores them, appended to the spill."""
+
+    def __init__(self, writer, warehouse):
+        self.writer = writer
+        self.warehouse = warehouse
+
+    def __setitem__(self, partnumber, raw):
+        self.writer.append([self.warehouse, partnumber, raw])
+
+
+class Spill:
+    """The catalog and stock-answer batches of one chunked run; directory is emptied first."""
+
+    def __init__(self, directory=None, buckets=None, batch_rows=None):
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("the chunked mode needs `pip install pyarrow`") from e
+        from main import WAREHOUSES, columns
+
+        self.directory = directory or config.SPILL_DIR
+        self.buckets = max(1, buckets or config.SPILL_BUCKETS)
+        batch_rows = max(1, batch_rows or config.SPILL_BATCH_ROWS)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+        catalog_schema = pa.schema(
+            [("Region", pa.string()), ("Page", pa.int32()), ("Row", pa.int32())]
+            + [(column, pa.string()) for column in columns]
+        )
+        self.catalog = BucketWriter(os.path.join(self.directory, "catalog"), catalog_schema,
+                                    catalog_schema.get_field_index("VendPartNumber"), self.buckets, batch_rows)
+        answer_schema = pa.schema([("Warehouse", pa.string()), ("VendPartNumber", pa.string()), ("Raw", pa.string())])
+        self.answer_writer = BucketWriter(os.path.join(self.directory, "answers"), answer_schema, 1,
+                                          self.buckets, batch_rows)
+        # warehouse -> answer sink, in place of the {partnumber: raw} dicts of the in-memory run
+        self.answers = {warehouse: _AnswerSink(self.answer_writer, warehouse) for warehouse, _ in WAREHOUSES.values()}
+        # region -> first page past the end of its catalog, known once the crawl is done
+        self.end_pages = {}
+
+    def add_page(self, region, page, rows):
+        # str() as clean_catalog's astype(str) would, so the spilled column is all strings
+        for i, row in enumerate(rows):
+            self.catalog.append([region, page, i] + [str(value) for value in row])
+
+    def end_region(self, region, end_page):
+        """Pages from end_page on were fetched past the end of the region's catalog: read_bucket skips them."""
+        self.end_pages[region] = end_page
+
+    def close(self):
+        self.catalog.flush()
+        self.answer_writer.flush()
+
+    def read_bucket(self, bucket):
+        """(region -> crawl rows in page order, warehouse -> {partnumber: raw}) of one bucket."""
+        from main import WAREHOUSES, ZIPCODES, columns
+
+        rows = self.catalog.read(bucket)
+        # the same pages the in-memory crawl keeps
+        kept = rows["Page"] < rows["Region"].map(self.end_pages).fillna(float("inf"))
+        rows = rows[kept].assign(Order=rows["Region"].map({region: i for i, region in enumerate(ZIPCODES)}))
+        rows = rows.sort_values(["Order", "Page", "Row"], kind="stable")
+        region_rows = {
+            region: list(frame[columns].itertuples(index=False, name=None))
+            for region, frame in rows.groupby("Region", sort=False)
+        }
+        region_rows = {region: region_rows.get(region, []) for region in ZIPCODES}
+
+        answers = {warehouse: {} for warehouse, _ in WAREHOUSES.values()}
+        found = self.answer_writer.read(bucket)
+        for warehouse, partnumber, raw in found.itertuples(index=False, name=None):
+            answers[warehouse][partnumber] = raw
+        return region_rows, answers
+
+    def path(self, kind, bucket):
+        return os.path.join(self.directory, kind, f"{_bucket_name(bucket)}.parquet")
+
+
+def clear(directory=None):
+    shutil.rmtree(directory or config.SPILL_DIR, ignore_errors=True)
+
+
+# ================= BUCKETS =================
+
+def build_buckets(spill, dead_letters, log_callback=None):
+    """
+    Build the report of every bucket with the in-memory code and write its report and arrivals
+    to the spill. Returns (buckets built, report columns, region -> arrival Seqs seen,
+    region -> part numbers answered, rows of both sheets).
+    """
+    log_callback = log_callback or (lambda msg: None)
+
+    from main import SUFFIXES, build_report, clean_catalog, stock_frames
+    from deadletter import answered_parts
+
+    built, report_columns, rows = [], None, 0
+    seqs = {region: set() for region in SUFFIXES}
+    answered = dict.fromkeys(SUFFIXES, 0)
+    for bucket in range(spill.buckets):
+        region_rows, answers = spill.read_bucket(bucket)
+        if not any(region_rows.values()):
+            continue
+        catalog = clean_catalog(region_rows)
+        dead_letters.attach_catalog(catalog)
+        if not any(answers.values()):
+            continue
+
+        report, arrivals = build_report(catalog, stock_frames(catalog, answers))
+        for region, count in answered_parts(report).items():
+            answered[region] += count
+        for region, frame in arrivals.groupby("Region", sort=False):
+            seqs[region].update(frame["Seq"].unique().tolist())
+        rows += len(report) + int((report["Available_Count"] == len(SUFFIXES)).sum())
+
+        for kind, frame in (("report", report), ("arrivals", arrivals)):
+            os.makedirs(os.path.dirname(spill.path(kind, bucket)), exist_ok=True)
+            frame.to_parquet(spill.path(kind, bucket), index=False)
+        report_columns = list(report.columns)
+        built.append(bucket)
+        log_callback(f"Bucket {bucket}: {len(catalog)} catalog rows, {len(report)} report rows")
+    return built, report_columns, seqs, answered, rows
+
+
+def wide_columns(report_columns, seqs):
+    """export_frames() columns with every Arrival Dates{i}_<suffix> any bucket has."""
+    from main import SUFFIXES
+
+    columns = [col for col in report_columns if not col.startswith("Arrival Dates")]
+    for region, suffix in SUFFIXES.items():
+        columns += [f"Arrival Dates_{suffix}"] + [f"Arrival Dates{seq}_{suffix}" for seq in sorted(seqs[region])]
+    return columns
+
+
+def report_chunks(spill, buckets, columns, both_available=False):
+    """Callable yielding the wide report (or its both-available rows) one bucket at a time."""
+    def chunks():
+        import pandas as pd
+        from main import export_frames
+
+        for bucket in buckets:
+            report = pd.read_parquet(spill.path("report", bucket))
+            arrivals = pd.read_parquet(spill.path("arrivals", bucket))
+            chunk = export_frames(report, arrivals)[1 if both_available else 0]
+            # a bucket without a part's n-th arrival date still gets that (empty) column
+            missing = [col for col in columns if col not in chunk.columns]
+            chunk = chunk.reindex(columns=columns)
+            if missing:
+                chunk[missing] = chunk[missing].astype("datetime64[ns]")
+            yield chunk
+    return chunks
+
+
+# ================= RUN =================
+
+def run_chunked(log_callback=None, refresh=False, cache_ttl=None, resume=False, directory=None,
+                catalog_freshness=None):
+    """
+    run_scraper() with the crawl rows and answers spilled to directory (SPILL_DIR) and the report
+    built bucket by bucket. Returns (df_compare, both_available, completeness): the first two are
+    callables yielding the report in chunks, for export_report() and history.save_snapshot().
+    """
+    log_callback = log_callback or (lambda msg: None)
+
+    from http_client import get_client
+    from checkpoint import RunState
+    from deadletter import DeadLetters, completeness
+    from main import WAREHOUSES, ZIPCODES, open_page_cache, open_stock_cache
+    from pipeline import stream_catalog_and_stock
+
+    state = RunState(resume=resume)
+    if resume:
+        log_callback(f"Resuming from checkpoints in {state.directory}")
+
+    spill = Spill(directory)
+    cache = open_stock_cache(cache_ttl, log_callback)
+    page_cache = open_page_cache(catalog_freshness, log_callback)
+    dead_letters = DeadLetters(reset=True)
+    stream_catalog_and_stock(
+        ZIPCODES, WAREHOUSES, log_callback=log_callback, cache=cache, refresh=refresh, state=state,
+        dead_letters=dead_letters, spill=spill, page_cache=page_cache
+    )
+    spill.close()
+    if cache is not None:
+        cache.close()
+    if page_cache is not None:
+        page_cache.close()
+    state.close()
+    log_callback(f"Spilled {spill.catalog.rows} catalog rows and {spill.answer_writer.rows} stock answers "
+                 f"to {spill.directory} in {spill.buckets} buckets")
+
+    with get_metrics().stage("spill"):
+        buckets, report_columns, seqs, answered, rows = build_buckets(spill, dead_letters, log_callback)
+    get_metrics().add_rows("export", rows)
+    dead_letters.save()
+    if dead_letters:
+        log_callback(f"{len(dead_letters)} failed stock lookups saved to {dead_letters.path}")
+
+    client = get_client()
+    log_callback("\nHTTP latency:\n" + client.stats.format_summary() + "\n" + client.limiter.format_summary())
+
+    columns = wide_columns(report_columns or [], seqs)
+    return (report_chunks(spill, buckets, columns), report_chunks(spill, buckets, columns, both_available=True),
+            completeness(None, dead_letters, answered))
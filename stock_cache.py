@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import time
+
+import config
+
+
+class StockCache:
+    """
+    On-disk cache of raw `~`-delimited stockstatus responses keyed by (partnumber, warehouse, inforid).
+    Entries younger than ttl seconds are served without a network call.
+    """
+
+    COMMIT_EVERY = 200
+
+    def __init__(self, path=None, ttl=None):
+        self.path = path or config.STOCK_CACHE_PATH
+        self.ttl = config.STOCK_CACHE_TTL if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS stock_status ("
+            " partnumber TEXT NOT NULL,"
+            " warehouse TEXT NOT NULL,"
+            " inforid TEXT NOT NULL,"
+            " raw TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (partnumber, warehouse, inforid))"
+        )
+        self.conn.commit()
+
+    def get(self, partnumber, warehouse, inforid):
+        """Raw response if a fresh entry exists, else None."""
+        row = self.conn.execute(
+            "SELECT raw FROM stock_status WHERE partnumber = ? AND warehouse = ? AND inforid = ? AND fetched_at >= ?",
+            (partnumber, warehouse, str(inforid), time.time() - self.ttl)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, partnumber, warehouse, inforid, raw, fetched_at=None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO stock_status VALUES (?, ?, ?, ?, ?)",
+            (partnumber, warehouse, str(inforid), raw, fetched_at or time.time())
+        )
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self.flush()
+
+    def evict_stale(self, ttl=None):
+        """Delete entries older than ttl (defaults to the cache ttl); returns how many were removed."""
+        ttl = self.ttl if ttl is None else ttl
+        cursor = self.conn.execute("DELETE FROM stock_status WHERE fetched_at < ?", (time.time() - ttl,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        self.conn.execute("DELETE FROM stock_status")
+        self.conn.commit()
+
+    def flush(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,272 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from http_client import get_client
+from metrics import get_metrics
+from progress import get_progress
+
+
+# ================= RATE LIMIT =================
+
+class RateLimiter:
+    """
+    Global requests-per-second budget shared by every coroutine in the event loop.
+    Each acquire() reserves the next free slot, so bursts are spread out evenly.
+    """
+
+    def __init__(self, rps):
+        self.interval = 1.0 / rps if rps and rps > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# ================= PARSING =================
+
+def parse_stock_response(partnumber, text):
+    """Turn a `~`-delimited stockstatus body into a results row."""
+    fields = text.strip().split("~")
+    return {
+        "Vendor Product": partnumber,
+        "Current Availability": fields[0],
+        "Quantity on Order": fields[1],
+        "Quantity on Backorder": fields[2],
+        "Arrival Dates": fields[3] if len(fields) > 3 else "None"
+    }
+
+
+QUANTITY_COLUMNS = ["Current Availability", "Quantity on Order", "Quantity on Backorder"]
+
+
+def build_results_frame(results):
+    """DataFrame from the scraped rows, quantities as nullable integers and `Arrival Dates` kept raw."""
+    import pandas as pd
+
+    df_results = pd.DataFrame(results, columns=[
+        "Vendor Product", "Current Availability", "Quantity on Order",
+        "Quantity on Backorder", "Arrival Dates"
+    ])
+
+    for col in QUANTITY_COLUMNS:
+        df_results[col] = pd.to_numeric(df_results[col], errors='coerce', dtype_backend='numpy_nullable')
+    return df_results
+
+
+def arrival_dates(results, keys=("Vendor Product",)):
+    """
+    Long table of the comma-separated `Arrival Dates`: one row per date with the key columns,
+    its 1-based position `Seq` and the parsed `Arrival Date` (NaT when it does not match the format).
+    """
+    import pandas as pd
+
+    keys = list(keys)
+    parts = results['Arrival Dates'].str.split(',').explode()
+    arrivals = results.loc[parts.index, keys].reset_index(drop=True)
+    arrivals['Seq'] = parts.groupby(level=0).cumcount().add(1).astype('int16').to_numpy()
+    arrivals['Arrival Date'] = pd.to_datetime(
+        parts.str.strip().to_numpy(), format=config.ARRIVAL_DATE_FORMAT, errors='coerce'
+    )
+    return arrivals
+
+
+def results_frame(partnumbers, answers):
+    """Results frame in partnumbers order from partnumber -> raw answer; parts without an answer are left out."""
+    return build_results_frame([parse_stock_response(pn, answers[pn]) for pn in partnumbers if pn in answers])
+
+
+# ================= FETCHING =================
+
+def _post_stock_status(partnumber, warehouse, inforid):
+    payload = {
+        "partnumber": partnumber,
+        "warehouse": warehouse,
+        "inforid": inforid
+    }
+    return get_client().post(
+        config.STOCK_STATUS_URL, kind="stockstatus", data=payload, headers=config.STOCK_STATUS_HEADERS
+    )
+
+
+def query_stock_status(partnumber, warehouse, inforid):
+    """One blocking stockstatus lookup: the results row, or None if the answer was not a 200."""
+    response = _post_stock_status(partnumber, warehouse, inforid)
+    if response.status_code != 200:
+        return None
+    return parse_stock_response(partnumber, response.text)
+
+
+class StockFetcher:
+    """
+    One stockstatus lookup at a time per caller, bounded by a shared semaphore and request budget.
+    Answers come from the run's checkpoints, then the cache, then the network.
+    Lookups that fail are remembered for retry_failed(); with a deadletter.DeadLetters, what still
+    fails after the retries is recorded there and answered entries are dropped from it.
+    Must be created inside the running event loop.
+    """
+
+    def __init__(self, executor, concurrency, rps, log_callback, cache=None, refresh=False, state=None,
+                 dead_letters=None):
+        self.executor = executor
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(rps)
+        self.log_callback = log_callback
+        self.cache = cache
+        self.refresh = refresh
+        self.state = state
+        self.dead_letters = dead_letters
+        self.resumed = {}
+        self.failed = {}  # (warehouse, partnumber) -> (inforid, error) of the last failed attempt
+
+    def _checkpointed(self, warehouse):
+        if warehouse not in self.resumed:
+            self.resumed[warehouse] = self.state.completed_parts(warehouse) if self.state is not None else {}
+        return self.resumed[warehouse]
+
+    async def fetch(self, warehouse, inforid, pn):
+        """Raw `~`-delimited answer, or None if the part failed."""
+        start = time.perf_counter()
+        raw = await self._fetch(warehouse, inforid, pn)
+
+        metrics = get_metrics()
+        metrics.span(f"stock {warehouse}", start, time.perf_counter())
+        if raw is None:
+            metrics.count("stock failures")
+        else:
+            metrics.add_rows(f"stock {warehouse}", 1)
+            self.failed.pop((warehouse, pn), None)
+            if self.dead_letters is not None:
+                self.dead_letters.discard(warehouse, pn)
+        return raw
+
+    async def retry_failed(self, answers):
+        """
+        Re-query the failed lookups for up to STOCK_RETRY_ROUNDS rounds with exponential backoff,
+        adding what they recover to answers (warehouse -> {partnumber: raw}).
+        Lookups that fail every round go to the dead letters.
+        """
+        for attempt in range(config.STOCK_RETRY_ROUNDS):
+            if not self.failed:
+                break
+            delay = config.STOCK_RETRY_BACKOFF * 2 ** attempt
+            self.log_callback(f"Retrying {len(self.failed)} failed stock lookups in {delay:g}s "
+                              f"(round {attempt + 1}/{config.STOCK_RETRY_ROUNDS})")
+            await asyncio.sleep(delay)
+
+            pending = list(self.failed.items())
+            raws = await asyncio.gather(*(
+                self.fetch(warehouse, inforid, pn) for (warehouse, pn), (inforid, _) in pending
+            ))
+            for ((warehouse, pn), _), raw in zip(pending, raws):
+                if raw is not None:
+                    answers[warehouse][pn] = raw
+                    get_metrics().count("stock recovered by retry")
+
+        if self.failed:
+            self.log_callback(f"{len(self.failed)} stock lookups failed every retry")
+        if self.dead_letters is not None:
+            for (warehouse, pn), (inforid, error) in self.failed.items():
+                self.dead_letters.add(warehouse, inforid, pn, error)
+
+    async def _fetch(self, warehouse, inforid, pn):
+        raw = self._checkpointed(warehouse).get(pn)
+        if raw is None and self.cache is not None and not self.refresh:
+            raw = self.cache.get(pn, warehouse, inforid)
+            if raw is not None and self.state is not None:
+                self.state.record_part(warehouse, pn, raw)
+        if raw is not None:
+            return raw
+
+        async with self.semaphore:
+            await self.limiter.acquire()
+            try:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self.executor, _post_stock_status, pn, warehouse, inforid)
+                if response.status_code == 200:
+                    if self.cache is not None:
+                        self.cache.put(pn, warehouse, inforid, response.text)
+                    if self.state is not None:
+                        self.state.record_part(warehouse, pn, response.text)
+                    return response.text
+                self.log_callback(f"Failed for {pn}, status code: {response.status_code}")
+                self.failed[(warehouse, pn)] = (inforid, f"status {response.status_code}")
+            except Exception as e:
+                self.log_callback(f"Error for {pn}: {e}")
+                self.failed[(warehouse, pn)] = (inforid, repr(e))
+        return None
+
+
+async def _fetch_warehouses(jobs, concurrency, rps, log_callback, cache, refresh, state, dead_letters):
+    answers = {warehouse: {} for warehouse in jobs}
+    progress = get_progress()
+    for warehouse, (partnumbers, _) in jobs.items():
+        progress.start(f"stock {warehouse}", total=len(partnumbers))
+
+    async def fetch_one(fetcher, warehouse, inforid, pn):
+        raw = await fetcher.fetch(warehouse, inforid, pn)
+        if raw is not None:
+            answers[warehouse][pn] = raw
+        progress.advance(f"stock {warehouse}")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        fetcher = StockFetcher(executor, concurrency, rps, log_callback, cache, refresh, state, dead_letters)
+        await asyncio.gather(*(
+            fetch_one(fetcher, warehouse, inforid, pn)
+            for warehouse, (partnumbers, inforid) in jobs.items()
+            for pn in partnumbers
+        ))
+        for warehouse in jobs:
+            progress.finish(f"stock {warehouse}")
+        await fetcher.retry_failed(answers)
+    return answers
+
+
+def get_answers_for_warehouses(jobs, log_callback=None, concurrency=None, rps=None, cache=None, refresh=False,
+                               state=None, dead_letters=None):
+    """
+    Query stock status for several warehouses in one event loop.
+
+    jobs maps warehouse code -> (partnumbers, inforid), e.g.
+    {"SEA": (sa_parts, 109283), "LA": (la_parts, 109284)}.
+    With a StockCache, fresh entries are served from disk (unless refresh) and new responses are stored.
+    With a checkpoint.RunState, parts answered by an earlier attempt of this run are skipped.
+    Failed parts are retried at the end (StockFetcher.retry_failed) and, with a deadletter.DeadLetters,
+    recorded there if they never answer.
+    Returns warehouse code -> {partnumber: raw answer}; parts that failed are left out.
+    """
+    get_client(log_callback)
+    log_callback = log_callback or (lambda msg: None)
+    concurrency = max(1, concurrency or config.STOCK_CONCURRENCY)
+    rps = config.STOCK_RPS if rps is None else rps
+
+    answers = asyncio.run(_fetch_warehouses(jobs, concurrency, rps, log_callback, cache, refresh, state, dead_letters))
+    if cache is not None:
+        cache.flush()
+        log_callback(f"Stock-status cache: {cache.hits} hits, {cache.misses} misses")
+    return answers
+
+
+def get_availability_for_warehouses(jobs, log_callback=None, concurrency=None, rps=None, cache=None, refresh=False,
+                                    state=None):
+    """
+    get_answers_for_warehouses() parsed: warehouse code -> results DataFrame,
+    rows in the same order as partnumbers.
+    """
+    answers = get_answers_for_warehouses(jobs, log_callback, concurrency, rps, cache, refresh, state)
+    return {warehouse: results_frame(partnumbers, answers[warehouse]) for warehouse, (partnumbers, _) in jobs.items()}
+
+
+def get_vendor_availability(partnumbers, warehouse, inforid, log_callback=None, concurrency=None, rps=None,
+                            cache=None, refresh=False):
+    jobs = {warehouse: (partnumbers, inforid)}
+    return get_availability_for_warehouses(jobs, log_callback, concurrency, rps, cache, refresh)[warehouse]